@@ -0,0 +1,157 @@
+"""Level-of-detail scheduling for enemy AI.
+
+Enemies near the player run their AI every tick.  Further away, or off
+screen, they are updated every few ticks instead and catch up with one
+coarse step covering the ticks they skipped.  Each enemy gets a staggered
+phase so the ones sharing a period don't all come due on the same tick.
+
+The due enemies are updated nearest tier first within a per-tick time
+budget; whatever doesn't fit waits for the next tick (near enemies are
+never deferred).  ``summary`` reports how the work was spread over tiers.
+"""
+
+import os
+import random
+import time
+
+import pygame
+
+# Tiers, most detailed first, and how often each is updated in ticks
+NEAR = 0
+MID = 1
+FAR = 2
+OFFSCREEN = 3
+TIER_PERIODS = (1, 2, 4, 8)
+NEAR_DISTANCE = 200
+MID_DISTANCE = 450
+
+# Seconds of AI work per tick before the rest waits for the next one
+BUDGET = 0.002
+# Skipped ticks made up in one step at most
+MAX_STEPS = 16
+
+
+class AIScheduler:
+    def __init__(self, view, budget=BUDGET, periods=TIER_PERIODS):
+        self.view = pygame.Rect(view)
+        self.budget = budget
+        self.periods = periods
+        # enemy -> ticks since its last update
+        self.owed = {}
+        self.ticks = 0
+        # This tick's counts
+        self.updated = 0
+        self.deferred = 0
+        self.tiers = [0, 0, 0, 0]
+        self.totals = [0, 0, 0, 0, 0, 0]
+
+    def reset(self):
+        self.owed.clear()
+
+    def tier(self, rect, center):
+        if not self.view.colliderect(rect):
+            return OFFSCREEN
+        dx = rect.centerx - center[0]
+        dy = rect.centery - center[1]
+        distance = dx * dx + dy * dy
+        if distance <= NEAR_DISTANCE * NEAR_DISTANCE:
+            return NEAR
+        if distance <= MID_DISTANCE * MID_DISTANCE:
+            return MID
+        return FAR
+
+    def update(self, enemies, center, step):
+        """Update the due enemies with ``step(enemy, ticks, coarse)``.
+
+        ``ticks`` is how many ticks the update covers; ``coarse`` is set
+        for enemies off screen, which may skip expensive steering.
+        """
+        if self.ticks:
+            counts = (self.updated, self.deferred, *self.tiers)
+            self.totals = [t + c for t, c in zip(self.totals, counts)]
+        self.ticks += 1
+        self.updated = self.deferred = 0
+        self.tiers = [0, 0, 0, 0]
+        start = time.perf_counter()
+
+        owed = self.owed
+        periods = self.periods
+        tiers = self.tiers
+        # Near enemies update straight away; the rest queue up by tier
+        waiting = ([], [], [])
+        for i, enemy in enumerate(enemies):
+            if not enemy.active:
+                continue
+            # New enemies start at staggered phases
+            ticks = owed.get(enemy, i % periods[-1]) + 1
+            tier = self.tier(enemy.rect, center)
+            if tier == NEAR:
+                step(enemy, min(ticks, MAX_STEPS), False)
+                owed[enemy] = 0
+                tiers[NEAR] += 1
+            else:
+                owed[enemy] = ticks
+                if ticks >= periods[tier]:
+                    waiting[tier - 1].append((ticks, i, enemy))
+
+        for tier, due in enumerate(waiting, 1):
+            # The most overdue first
+            due.sort(reverse=True, key=lambda entry: entry[:2])
+            for ticks, _, enemy in due:
+                if time.perf_counter() - start > self.budget:
+                    self.deferred += 1
+                    continue
+                step(enemy, min(ticks, MAX_STEPS), tier == OFFSCREEN)
+                owed[enemy] = 0
+                tiers[tier] += 1
+        self.updated = sum(tiers)
+
+    def summary(self):
+        ticks = max(self.ticks - 1, 1)
+        updated, deferred, near, mid, far, offscreen = (t / ticks for t in self.totals)
+        return (
+            f"enemy AI per tick: {updated:.1f} updates ({near:.1f} near, "
+            f"{mid:.1f} mid, {far:.1f} far, {offscreen:.1f} off screen), "
+            f"{deferred:.1f} deferred by the budget"
+        )
+
+
+def benchmark(enemies=400, ticks=600):
+    """AI time per tick for a crowded encounter, with and without LOD."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    # Imported lazily: the game module opens its window on import
+    from claude_game_DS import SCREEN_HEIGHT, SCREEN_WIDTH, Game, GameState
+
+    game = Game()
+    game.state = GameState.SNAKE_ENCOUNTER
+    rng = random.Random(1)
+    spots = [
+        (rng.randint(-800, SCREEN_WIDTH + 800), rng.randint(0, SCREEN_HEIGHT - 100))
+        for _ in range(enemies)
+    ]
+
+    view = (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+    for name, scheduler in [
+        ("every enemy every tick", AIScheduler(view, float("inf"), (1, 1, 1, 1))),
+        ("LOD scheduler", AIScheduler(view)),
+    ]:
+        game.init_level()
+        for x, y in spots:
+            game.enemies.append(game.snake_pool.acquire(x, y))
+        game.ai = scheduler
+        elapsed = 0.0
+        for tick in range(ticks):
+            # Sweep the player back and forth across the level
+            phase = tick % 300
+            game.player.rect.x = game.player.x = 50 + min(phase, 300 - phase) * 4.5
+            game.flow_field.update_target(*game.player.rect.center)
+            game.flow_field.steer(game.enemies)
+            start = time.perf_counter()
+            scheduler.update(game.enemies, game.player.rect.center, game.update_enemy)
+            elapsed += time.perf_counter() - start
+        print(f"{name}: {elapsed / ticks * 1000:.3f} ms per tick")
+        print(f"  {scheduler.summary()}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,151 @@
+"""Time-based sprite animation with one batched update for every animator.
+
+A ``Clip`` is a run of frame rects in a sprite sheet with a duration per
+frame, prepared once: frames are subsurfaces of the sheet, with mirrored
+copies for facing left and a collision mask per frame (see collision.py).
+
+``AnimationSystem`` keeps every animator's clip, playback time and speed in
+NumPy arrays.  ``update(dt)`` advances them all with a few array operations
+driven by the simulation's dt, so playback speed no longer depends on the
+frame rate and no per-object code runs each tick.  An ``Animator`` is an
+entity's handle into the system: it switches clips by name (idle, fly,
+peck, hurt...) and returns the current frame and mask.
+"""
+
+import numpy as np
+import pygame
+
+from collision import SpriteMask
+
+MAX_ANIMATORS = 256
+
+
+class Clip:
+    def __init__(self, sheet, rects, durations, loop=True):
+        if len(rects) != len(durations):
+            raise ValueError("a clip needs one duration per frame")
+        self.frames = [sheet.subsurface(rect) for rect in rects]
+        self.frames_left = [
+            pygame.transform.flip(frame, True, False) for frame in self.frames
+        ]
+        self.masks = [SpriteMask(frame) for frame in self.frames]
+        self.masks_left = [SpriteMask(frame) for frame in self.frames_left]
+        self.durations = list(durations)
+        self.loop = loop
+
+
+class AnimationSystem:
+    def __init__(self, capacity=MAX_ANIMATORS):
+        self.capacity = capacity
+        # Registered clips and their frame end times, padded with infinity
+        self.clips = []
+        self.clip_ids = {}
+        self.ends = np.full((0, 1), np.inf)
+        self.totals = np.zeros(0)
+        self.loops = np.zeros(0, bool)
+        self.last_frames = np.zeros(0, np.intp)
+
+        # Per-animator state
+        self.clip = np.zeros(capacity, np.intp)
+        self.time = np.zeros(capacity)
+        self.speed = np.zeros(capacity)
+        self.frame = np.zeros(capacity, np.intp)
+        self.size = 0
+        self.free = []
+
+    def register(self, clip):
+        clip_id = self.clip_ids.get(clip)
+        if clip_id is not None:
+            return clip_id
+        clip_id = self.clip_ids[clip] = len(self.clips)
+        self.clips.append(clip)
+
+        width = max(self.ends.shape[1], len(clip.durations))
+        ends = np.full((len(self.clips), width), np.inf)
+        ends[:-1, : self.ends.shape[1]] = self.ends
+        ends[-1, : len(clip.durations)] = np.cumsum(clip.durations)
+        self.ends = ends
+        self.totals = np.append(self.totals, sum(clip.durations))
+        self.loops = np.append(self.loops, clip.loop)
+        self.last_frames = np.append(self.last_frames, len(clip.durations) - 1)
+        return clip_id
+
+    def add(self, clips):
+        """A new Animator over ``clips``, a dict of clip name to Clip."""
+        if self.free:
+            index = self.free.pop()
+        elif self.size < self.capacity:
+            index = self.size
+            self.size += 1
+        else:
+            raise RuntimeError("too many animators")
+        return Animator(self, index, clips)
+
+    def remove(self, animator):
+        self.speed[animator.index] = 0.0
+        self.free.append(animator.index)
+
+    def update(self, dt):
+        n = self.size
+        if not n or not self.clips:
+            return
+        clip = self.clip[:n]
+        time = self.time[:n] + dt * self.speed[:n]
+        totals = self.totals[clip]
+        # Looping clips wrap, one-shots hold their last frame
+        time = np.where(
+            self.loops[clip], np.mod(time, totals), np.minimum(time, totals)
+        )
+        self.time[:n] = time
+        frame = (time[:, np.newaxis] >= self.ends[clip]).sum(axis=1)
+        np.minimum(frame, self.last_frames[clip], out=self.frame[:n])
+
+
+class Animator:
+    def __init__(self, system, index, clips):
+        self.system = system
+        self.index = index
+        self.clips = clips
+        self.name = None
+        self.clip = None
+        for clip in clips.values():
+            system.register(clip)
+
+    def play(self, name, restart=False, speed=1.0):
+        # Switching to the clip already playing keeps its place
+        if name == self.name and not restart:
+            return
+        system = self.system
+        self.name = name
+        self.clip = self.clips[name]
+        system.clip[self.index] = system.register(self.clip)
+        system.time[self.index] = 0.0
+        system.speed[self.index] = speed
+        system.frame[self.index] = 0
+
+    @property
+    def time(self):
+        return float(self.system.time[self.index])
+
+    @time.setter
+    def time(self, value):
+        self.system.time[self.index] = value
+        ends = self.system.ends[self.system.clip[self.index]]
+        frame = int((value >= ends).sum())
+        self.system.frame[self.index] = min(frame, len(self.clip.durations) - 1)
+
+    @property
+    def finished(self):
+        # One-shot clips finish on reaching their end; loops never do
+        if self.clip is None or self.clip.loop:
+            return False
+        system = self.system
+        return system.time[self.index] >= system.totals[system.clip[self.index]]
+
+    def image(self, facing_right=True):
+        frames = self.clip.frames if facing_right else self.clip.frames_left
+        return frames[self.system.frame[self.index]]
+
+    def mask(self, facing_right=True):
+        masks = self.clip.masks if facing_right else self.clip.masks_left
+        return masks[self.system.frame[self.index]]
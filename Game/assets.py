@@ -0,0 +1,372 @@
+"""Game assets packed into one memory-mapped bundle file.
+
+``python assets.py`` packs the images, fonts and data files next to the game
+into ``assets.bundle``:
+
+    header   magic, format version, index size
+    index    JSON: name -> {"offset", "size", "kind"}
+    data     each asset's bytes, 16-byte aligned
+
+The build also bakes the images the game draws at a fixed size
+(``PREBAKED``) into raw pixels at that size and at smaller mip levels, in
+the display's byte order.  ``load_scaled`` wraps those with
+``pygame.image.frombuffer`` instead of decoding and rescaling the full
+1024x1024 PNG on every launch; for a size that isn't baked it scales down
+from the nearest larger level.  Surfaces it returns remember how to make
+themselves at another size, so a canvas drawing below full resolution
+takes the baked level for its render scale (``rescaled``).
+
+At runtime the bundle is mapped once, so startup costs a single open
+however many assets there are.  Baked pixels are used in place.  Encoded
+assets (PNGs, fonts) are copied out of the mapping into a ``BytesIO`` for
+pygame to read, which takes a fraction of a millisecond next to decoding
+them.  Names are looked up relative to this directory rather than the
+working directory, and without a bundle (or for a name missing from it)
+``load_image`` and friends fall back to the loose file.  Rebuild the bundle
+after changing any asset.
+"""
+
+import argparse
+import io
+import json
+import mmap
+import os
+import struct
+import time
+import weakref
+
+import pygame
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLE_PATH = os.path.join(ASSET_DIR, "assets.bundle")
+
+MAGIC = b"WWAB"
+VERSION = 1
+HEADER = struct.Struct("<4sII")  # magic, version, index size
+ALIGN = 16
+
+# Sizes images are drawn at, baked at each of the MIP_SCALES
+PREBAKED = {
+    "background_forest.png": [(800, 600)],
+    "william_bird.png": [(40, 34), (40, 30)],
+}
+# The canvas's render scales below 1 (canvas.RENDER_SCALES)
+MIP_SCALES = (1.0, 0.5, 0.25)
+# Byte order of a 32-bit display surface (XRGB8888, little-endian)
+RAW_FORMAT = "BGRA"
+
+# Bundled files by extension
+KINDS = {
+    ".png": "image",
+    ".jpg": "image",
+    ".bmp": "image",
+    ".ttf": "font",
+    ".otf": "font",
+    ".json": "data",
+    ".txt": "data",
+}
+
+_bundle = None
+# How to make a loaded Surface at another size: {surface: recipe(size)}
+_recipes = weakref.WeakKeyDictionary()
+
+
+class AssetBundle:
+    def __init__(self, path=BUNDLE_PATH):
+        self.path = path
+        # Copy-on-write, so surfaces wrapping the pixels can still be drawn on
+        with open(path, "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        magic, version, index_size = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(f"{path} is not a version {VERSION} asset bundle")
+        start = HEADER.size
+        self.index = json.loads(bytes(self.map[start : start + index_size]))
+        self.view = memoryview(self.map)
+        # Baked sizes of each source image, smallest first
+        self.levels = {}
+        for entry in self.index.values():
+            if "source" in entry:
+                sizes = self.levels.setdefault(entry["source"], [])
+                sizes.append((entry["width"], entry["height"]))
+        for sizes in self.levels.values():
+            sizes.sort()
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def names(self, kind=None):
+        return [
+            name
+            for name, entry in self.index.items()
+            if kind is None or entry["kind"] == kind
+        ]
+
+    def data(self, name):
+        """The asset's bytes, as a view into the mapping."""
+        entry = self.index[name]
+        offset = entry["offset"]
+        return self.view[offset : offset + entry["size"]]
+
+    def file(self, name):
+        """A file object over a copy of the asset's bytes, for pygame."""
+        return io.BytesIO(self.data(name))
+
+    def image(self, name):
+        return pygame.image.load(self.file(name), name)
+
+    def font(self, name, size):
+        return pygame.font.Font(self.file(name), size)
+
+    def raw_image(self, name):
+        """A Surface over baked pixels, sharing the mapped memory."""
+        entry = self.index[name]
+        size = (entry["width"], entry["height"])
+        surface = pygame.image.frombuffer(self.data(name), size, entry["format"])
+        if entry["opaque"] and pygame.display.get_surface() is not None:
+            # Same byte order as the display, so this is a straight copy
+            surface = surface.convert()
+        return surface
+
+    def close(self):
+        self.view.release()
+        self.map.close()
+
+
+def raw_name(name, size):
+    return f"{name}@{size[0]}x{size[1]}"
+
+
+def bake(surface, size):
+    """Index fields and pixels for ``surface`` scaled to ``size``."""
+    if surface.get_bitsize() < 24:
+        surface = surface.convert(32, 0)
+    scaled = pygame.transform.smoothscale(surface, size)
+    entry = {
+        "kind": "raw",
+        "width": size[0],
+        "height": size[1],
+        "format": RAW_FORMAT,
+        "opaque": not scaled.get_flags() & pygame.SRCALPHA,
+    }
+    return entry, pygame.image.tobytes(scaled, RAW_FORMAT)
+
+
+def build_bundle(path=BUNDLE_PATH, directory=ASSET_DIR):
+    """Pack every asset file in ``directory`` into a bundle at ``path``."""
+    names = sorted(
+        name
+        for name in os.listdir(directory)
+        if os.path.splitext(name)[1].lower() in KINDS
+    )
+    # (name, index fields, bytes)
+    assets = []
+    for name in names:
+        with open(os.path.join(directory, name), "rb") as file:
+            blob = file.read()
+        assets.append((name, {"kind": KINDS[os.path.splitext(name)[1].lower()]}, blob))
+        if name not in PREBAKED:
+            continue
+        image = pygame.image.load(io.BytesIO(blob), name)
+        # Levels of different sizes can round to the same one
+        sizes = {
+            (max(1, round(width * scale)), max(1, round(height * scale)))
+            for width, height in PREBAKED[name]
+            for scale in MIP_SCALES
+        }
+        for size in sorted(sizes, reverse=True):
+            entry, pixels = bake(image, size)
+            entry["source"] = name
+            assets.append((raw_name(name, size), entry, pixels))
+
+    # Offsets depend on the index size, so lay out until it stops changing
+    index = {}
+    index_size = 0
+    while True:
+        offset = _aligned(HEADER.size + index_size)
+        for name, fields, blob in assets:
+            index[name] = {"offset": offset, "size": len(blob), **fields}
+            offset = _aligned(offset + len(blob))
+        encoded = json.dumps(index, separators=(",", ":")).encode()
+        if len(encoded) == index_size:
+            break
+        index_size = len(encoded)
+
+    with open(path + ".tmp", "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, index_size))
+        file.write(encoded)
+        for name, _, blob in assets:
+            file.seek(index[name]["offset"])
+            file.write(blob)
+    os.replace(path + ".tmp", path)
+    return index
+
+
+def _aligned(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def bundle():
+    """The game's asset bundle, mapped on first use; None if not built."""
+    global _bundle
+    if _bundle is None and os.path.exists(BUNDLE_PATH):
+        _bundle = AssetBundle(BUNDLE_PATH)
+    return _bundle
+
+
+def load_image(name):
+    assets = bundle()
+    if assets is not None and name in assets:
+        return assets.image(name)
+    return pygame.image.load(os.path.join(ASSET_DIR, name))
+
+
+def load_scaled(name, size):
+    """Image ``name`` at ``size``, from the nearest baked level if there is one."""
+    size = tuple(size)
+    assets = bundle()
+    image = None
+    if assets is not None:
+        for level in assets.levels.get(name, ()):
+            # The smallest level at least as big, so scaling only shrinks
+            if level[0] >= size[0] and level[1] >= size[1]:
+                image = assets.raw_image(raw_name(name, level))
+                break
+    if image is None:
+        image = load_image(name)
+        if image.get_bitsize() < 24:
+            image = image.convert(32, 0)
+    if image.get_size() != size:
+        image = pygame.transform.smoothscale(image, size)
+    return derived(image, lambda other: load_scaled(name, other))
+
+
+def derived(surface, make):
+    """Record that ``make(size)`` makes ``surface`` at another size."""
+    _recipes[surface] = make
+    return surface
+
+
+def recipe(image):
+    """How to make ``image`` at another size, or None."""
+    return _recipes.get(image)
+
+
+def rescaled(image, size):
+    """``image`` made at ``size`` from baked levels; None if it can't be."""
+    make = _recipes.get(image)
+    return make(size) if make else None
+
+
+def load_font(name, size):
+    assets = bundle()
+    if assets is not None and name in assets:
+        return assets.font(name, size)
+    return pygame.font.Font(os.path.join(ASSET_DIR, name), size)
+
+
+def load_data(name):
+    assets = bundle()
+    if assets is not None and name in assets:
+        return bytes(assets.data(name))
+    with open(os.path.join(ASSET_DIR, name), "rb") as file:
+        return file.read()
+
+
+def asset_exists(name):
+    assets = bundle()
+    if assets is not None and name in assets:
+        return True
+    return os.path.exists(os.path.join(ASSET_DIR, name))
+
+
+def benchmark(rounds=20):
+    """Startup image loading from loose files versus the mapped bundle."""
+    assets = bundle() or AssetBundle(BUNDLE_PATH)
+    names = assets.names("image")
+    targets = [(name, size) for name in PREBAKED for size in PREBAKED[name]]
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for name in names:
+            pygame.image.load(os.path.join(ASSET_DIR, name))
+    loose = (time.perf_counter() - start) / rounds
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        mapped = AssetBundle(BUNDLE_PATH)
+        for name in names:
+            mapped.image(name)
+        mapped.close()
+    bundled = (time.perf_counter() - start) / rounds
+
+    # What the game actually wants: each image at its drawn size
+    decoded_bytes = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for name, size in targets:
+            image = pygame.image.load(os.path.join(ASSET_DIR, name))
+            pygame.transform.smoothscale(image, size)
+            decoded_bytes += (
+                image.get_bytesize() * image.get_width() * image.get_height()
+            )
+    decoded = (time.perf_counter() - start) / rounds
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for name, size in targets:
+            assets.raw_image(raw_name(name, size))
+    baked = (time.perf_counter() - start) / rounds
+    baked_pixels = sum(4 * w * h for _, (w, h) in targets)
+
+    print(f"{len(names)} images, {os.path.getsize(BUNDLE_PATH)} byte bundle")
+    print(f"  loose files:   {loose * 1000:.1f} ms")
+    print(f"  mapped bundle: {bundled * 1000:.1f} ms")
+    print(f"{len(targets)} images at their drawn size")
+    print(
+        f"  decode and scale: {decoded * 1000:.1f} ms, "
+        f"{decoded_bytes / rounds / 1e6:.1f} MB decoded"
+    )
+    print(
+        f"  baked pixels:     {baked * 1000:.2f} ms, "
+        f"{baked_pixels / 1e6:.1f} MB mapped"
+    )
+
+    # A canvas at a lower render scale wants each image smaller again
+    print("at lower render scales")
+    for scale in MIP_SCALES[1:]:
+        scaled = [
+            (load_scaled(name, size), (round(size[0] * scale), round(size[1] * scale)))
+            for name, size in targets
+        ]
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for image, size in scaled:
+                pygame.transform.smoothscale(image, size)
+        runtime = (time.perf_counter() - start) / rounds
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for image, size in scaled:
+                rescaled(image, size)
+        levels = (time.perf_counter() - start) / rounds
+        print(
+            f"  {scale}: scaling {runtime * 1000:.2f} ms, "
+            f"baked levels {levels * 1000:.2f} ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the game's asset bundle")
+    parser.add_argument(
+        "--benchmark", action="store_true", help="compare load times afterwards"
+    )
+    args = parser.parse_args()
+    index = build_bundle()
+    print(f"packed {len(index)} assets into {BUNDLE_PATH}")
+    if args.benchmark:
+        benchmark()
+
+
+if __name__ == "__main__":
+    main()
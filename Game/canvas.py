@@ -0,0 +1,431 @@
+"""Drawing in logical coordinates, on a Surface or through an SDL2 Renderer.
+
+Scenes draw in the game's logical 800x600 coordinates through a canvas.
+Both backends share the same small interface (``fill``, ``rect``, ``line``,
+``circle``, ``blit``, ``text``, ``particles``, ``present``, plus the batched
+``rects`` and ``blits`` used by render_queue.py):
+
+``SurfaceCanvas`` draws with ``pygame.draw`` and ``Surface.blit``.
+``RendererCanvas`` draws with ``pygame._sdl2.video``: rect fills and lines
+are Renderer primitives, and sprites, text and circles become static
+Textures created once and cached.  Subsurfaces, like the HUD's glyphs, draw
+as regions of one Texture for their whole sheet.  It runs on SDL's software renderer when
+there is no GPU, so the two paths can be benchmarked against each other.
+
+With a render scale below 1 every primitive lands on a smaller offscreen
+target (a Surface, or a target Texture), and ``present()`` upscales it to
+the window once per frame, with nearest-neighbour or smooth filtering.
+``to_logical`` maps window positions (mouse events, ``mouse.get_pos``) back
+to logical coordinates, whatever the window size and render scale.
+"""
+
+import os
+import weakref
+
+import pygame
+
+from assets import rescaled
+
+BACKENDS = ("surface", "sdl2", "sdl2-software")
+# Quality steps for the in-game slider, lowest to highest.  No 0.75: the
+# 4:3 upscale costs more than the smaller target saves (see benchmark())
+RENDER_SCALES = (0.25, 0.5, 1.0)
+TEXT_CACHE_SIZE = 256
+
+
+def create_canvas(backend, title, window_size, logical_size, scale=1.0, smooth=False):
+    if backend == "surface":
+        window = pygame.display.set_mode(window_size)
+        pygame.display.set_caption(title)
+        return SurfaceCanvas(window, logical_size, scale, smooth)
+    if backend in ("sdl2", "sdl2-software"):
+        return RendererCanvas(
+            title,
+            window_size,
+            logical_size,
+            scale,
+            smooth,
+            software=backend == "sdl2-software",
+        )
+    raise ValueError(f"unknown render backend: {backend}")
+
+
+class Canvas:
+    """Logical-to-target coordinate mapping shared by the backends."""
+
+    def __init__(self, logical_size, scale=1.0, smooth=False):
+        self.logical_size = logical_size
+        self.smooth = smooth
+        self.presents = 0
+        # Set by frame capture so the renderer keeps a readable copy
+        self.keep_frames = False
+        self.set_scale(scale)
+
+    def set_scale(self, scale):
+        self.scale = scale
+        width, height = self.logical_size
+        self.size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        # Scaled copies depend on the scale
+        self.images = weakref.WeakKeyDictionary()
+        self.texts = {}
+        self._make_target()
+
+    def step_quality(self, steps):
+        # Move along RENDER_SCALES, e.g. from a key binding
+        nearest = min(RENDER_SCALES, key=lambda s: abs(s - self.scale))
+        index = RENDER_SCALES.index(nearest) + steps
+        index = min(max(index, 0), len(RENDER_SCALES) - 1)
+        if RENDER_SCALES[index] != self.scale:
+            self.set_scale(RENDER_SCALES[index])
+        return self.scale
+
+    def to_logical(self, pos):
+        window_width, window_height = self.window_size()
+        width, height = self.logical_size
+        return (pos[0] * width // window_width, pos[1] * height // window_height)
+
+    def _rect(self, rect):
+        # Scale edges rather than sizes so adjacent rects stay seamless
+        x, y, w, h = rect
+        s = self.scale
+        left, top = int(x * s), int(y * s)
+        right, bottom = int((x + w) * s), int((y + h) * s)
+        return (left, top, max(1, right - left), max(1, bottom - top))
+
+    def _width(self, width):
+        return max(1, round(width * self.scale)) if width else 0
+
+    def _point(self, pos):
+        return (int(pos[0] * self.scale), int(pos[1] * self.scale))
+
+    def _scale_image(self, image):
+        if self.scale == 1.0:
+            return image
+        width, height = image.get_size()
+        size = (max(1, round(width * self.scale)), max(1, round(height * self.scale)))
+        # Bundled images come from the baked level for this scale
+        baked = rescaled(image, size)
+        if baked is not None:
+            return baked
+        if self.smooth and image.get_bitsize() >= 24:
+            return pygame.transform.smoothscale(image, size)
+        return pygame.transform.scale(image, size)
+
+    def _text(self, font, string, color):
+        # (logical size, drawable) for a rendered string, cached
+        key = (font, string, color)
+        entry = self.texts.get(key)
+        if entry is None:
+            if len(self.texts) >= TEXT_CACHE_SIZE:
+                self.texts.clear()
+            rendered = font.render(string, True, color)
+            entry = (rendered.get_size(), self._prepare(self._scale_image(rendered)))
+            self.texts[key] = entry
+        return entry
+
+    def text(self, font, string, color, pos, anchor="topleft"):
+        """Draw ``string`` with its ``anchor`` point at ``pos``; returns its rect."""
+        size, image = self._text(font, string, color)
+        rect = pygame.Rect((0, 0), size)
+        setattr(rect, anchor, pos)
+        self._draw_image(image, self._point(rect.topleft))
+        return rect
+
+    def _prepared(self, image):
+        # Sprites are assumed not to change once drawn
+        prepared = self.images.get(image)
+        if prepared is None:
+            prepared = self._prepare(self._scale_image(image))
+            self.images[image] = prepared
+        return prepared
+
+    def blit(self, image, pos):
+        self._draw_image(self._prepared(image), self._point(pos))
+
+    def blits(self, sprites):
+        # (image, pos) pairs, usually cut from one sheet
+        prepared = self._prepared
+        for image, pos in sprites:
+            self._draw_image(prepared(image), self._point(pos))
+
+
+class SurfaceCanvas(Canvas):
+    def __init__(self, window, logical_size, scale=1.0, smooth=False):
+        self.window = window
+        super().__init__(logical_size, scale, smooth)
+
+    def _make_target(self):
+        if self.size == self.window.get_size():
+            # Full resolution: draw straight into the window
+            self.target = self.window
+        else:
+            # SDL fills whole rows far faster when each row starts 64-byte
+            # aligned, so pad the pitch to 16 pixels and draw on a subsurface
+            width, height = self.size
+            padded = pygame.Surface((-(-width // 16) * 16, height))
+            self.target = padded.convert(self.window).subsurface((0, 0, width, height))
+        # pygame's nearest scale stretches by exactly 2x about twice as fast
+        # as by any other factor, so a power-of-two upscale goes through
+        # doubled intermediates
+        self.doublings = []
+        width, height = self.size
+        window_width, window_height = self.window.get_size()
+        while width * 2 < window_width and height * 2 < window_height:
+            width, height = width * 2, height * 2
+            self.doublings.append(pygame.Surface((width, height)).convert(self.window))
+        if (width * 2, height * 2) != (window_width, window_height):
+            self.doublings = []
+
+    def window_size(self):
+        return self.window.get_size()
+
+    def _prepare(self, image):
+        return image
+
+    def _draw_image(self, image, pos):
+        self.target.blit(image, pos)
+
+    def fill(self, color, rect=None):
+        if rect is None:
+            self.target.fill(color)
+        else:
+            self.target.fill(color, self._rect(rect))
+
+    def rect(self, color, rect, width=0):
+        if width:
+            pygame.draw.rect(self.target, color, self._rect(rect), self._width(width))
+        else:
+            self.target.fill(color, self._rect(rect))
+
+    def rects(self, color, rects):
+        fill = self.target.fill
+        for rect in rects:
+            fill(color, self._rect(rect))
+
+    def blits(self, sprites):
+        prepared = self._prepared
+        point = self._point
+        self.target.blits(
+            [(prepared(image), point(pos)) for image, pos in sprites], False
+        )
+
+    def line(self, color, start, end, width=1):
+        pygame.draw.line(
+            self.target, color, self._point(start), self._point(end), self._width(width)
+        )
+
+    def circle(self, color, center, radius, width=0):
+        pygame.draw.circle(
+            self.target,
+            color,
+            self._point(center),
+            max(1, round(radius * self.scale)),
+            self._width(width),
+        )
+
+    def particles(self, system):
+        system.draw(self.target, self.scale)
+
+    def present(self):
+        if self.target is not self.window:
+            size = self.window.get_size()
+            if self.smooth:
+                pygame.transform.smoothscale(self.target, size, self.window)
+            else:
+                source = self.target
+                for doubled in self.doublings:
+                    pygame.transform.scale(source, doubled.get_size(), doubled)
+                    source = doubled
+                pygame.transform.scale(source, size, self.window)
+        pygame.display.flip()
+        self.presents += 1
+
+    def frame(self):
+        # The last presented frame
+        return self.window
+
+
+class RendererCanvas(Canvas):
+    def __init__(
+        self, title, window_size, logical_size, scale=1.0, smooth=False, software=False
+    ):
+        # Private pygame module; only imported when this backend is chosen
+        from pygame._sdl2 import video
+
+        self.video = video
+        self.window = video.Window(title, window_size)
+        self.renderer = video.Renderer(self.window, accelerated=0 if software else -1)
+        self.colors = {}
+        self.circles = {}
+        self.overlay = None
+        self.frame_surface = None
+        super().__init__(logical_size, scale, smooth)
+
+    def _make_target(self):
+        renderer = self.renderer
+        renderer.target = None
+        # Filtering for the upscale and scaled textures, read at creation
+        os.environ["SDL_RENDER_SCALE_QUALITY"] = "linear" if self.smooth else "nearest"
+        if self.size == tuple(self.window.size):
+            self.target = None
+        else:
+            self.target = self.video.Texture(renderer, self.size, target=True)
+            renderer.target = self.target
+        self.circles.clear()
+        self.overlay = None
+
+    def window_size(self):
+        return tuple(self.window.size)
+
+    def _color(self, color):
+        # Renderer colours must be RGBA
+        rgba = self.colors.get(color)
+        if rgba is None:
+            rgba = self.colors[color] = tuple(pygame.Color(color))
+        self.renderer.draw_color = rgba
+
+    def _prepare(self, image):
+        return self.video.Texture.from_surface(self.renderer, image)
+
+    def _prepared(self, image):
+        # A subsurface draws as a region of its sheet's texture, so an atlas
+        # is uploaded once however many glyphs or frames are cut from it
+        sheet = image.get_abs_parent()
+        if sheet is image:
+            return super()._prepared(image)
+        prepared = self.images.get(image)
+        if prepared is None:
+            area = self._rect(image.get_abs_offset() + image.get_size())
+            prepared = self.video.Image(super()._prepared(sheet), area)
+            self.images[image] = prepared
+        return prepared
+
+    def _draw_image(self, texture, pos):
+        texture.draw(dstrect=pos)
+
+    def fill(self, color, rect=None):
+        self._color(color)
+        if rect is None:
+            self.renderer.clear()
+        else:
+            self.renderer.fill_rect(self._rect(rect))
+
+    def rect(self, color, rect, width=0):
+        self._color(color)
+        x, y, w, h = self._rect(rect)
+        width = self._width(width)
+        if not width or width * 2 >= min(w, h):
+            self.renderer.fill_rect((x, y, w, h))
+            return
+        # Border as four strips, like pygame.draw.rect
+        fill_rect = self.renderer.fill_rect
+        fill_rect((x, y, w, width))
+        fill_rect((x, y + h - width, w, width))
+        fill_rect((x, y + width, width, h - 2 * width))
+        fill_rect((x + w - width, y + width, width, h - 2 * width))
+
+    def rects(self, color, rects):
+        # One draw colour for the whole batch
+        self._color(color)
+        fill_rect = self.renderer.fill_rect
+        for rect in rects:
+            fill_rect(self._rect(rect))
+
+    def line(self, color, start, end, width=1):
+        self._color(color)
+        x0, y0 = self._point(start)
+        x1, y1 = self._point(end)
+        width = self._width(width)
+        # Thick lines as parallel 1px lines across the minor axis
+        horizontal = abs(x1 - x0) >= abs(y1 - y0)
+        for i in range(width):
+            offset = i - width // 2
+            if horizontal:
+                self.renderer.draw_line((x0, y0 + offset), (x1, y1 + offset))
+            else:
+                self.renderer.draw_line((x0 + offset, y0), (x1 + offset, y1))
+
+    def circle(self, color, center, radius, width=0):
+        radius = max(1, round(radius * self.scale))
+        width = self._width(width)
+        key = (color, radius, width)
+        texture = self.circles.get(key)
+        if texture is None:
+            image = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(image, color, (radius, radius), radius, width)
+            texture = self.circles[key] = self._prepare(image)
+        x, y = self._point(center)
+        texture.draw(dstrect=(x - radius, y - radius))
+
+    def particles(self, system):
+        if not len(system):
+            return
+        # Particles are written into a transparent Surface and streamed up
+        if self.overlay is None:
+            surface = pygame.Surface(self.size, pygame.SRCALPHA)
+            texture = self.video.Texture(self.renderer, self.size, streaming=True)
+            texture.blend_mode = 1  # SDL_BLENDMODE_BLEND
+            self.overlay = (surface, texture)
+        surface, texture = self.overlay
+        surface.fill((0, 0, 0, 0))
+        system.draw(surface, self.scale)
+        texture.update(surface)
+        texture.draw()
+
+    def present(self):
+        renderer = self.renderer
+        if self.target is not None:
+            renderer.target = None
+            self.target.draw()
+        if self.keep_frames:
+            if self.frame_surface is None:
+                self.frame_surface = pygame.Surface(self.window_size(), 0, 32)
+            renderer.to_surface(self.frame_surface)
+        renderer.present()
+        if self.target is not None:
+            renderer.target = self.target
+        self.presents += 1
+
+    def frame(self):
+        # Copy of the last presented frame, kept while keep_frames is set
+        return self.frame_surface
+
+
+def benchmark(frames=300, particles=2000):
+    import time
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from claude_game_DS import Game, GameState
+    from particles import FEATHER
+
+    for backend in ("surface", "sdl2-software"):
+        game = Game(backend=backend)
+        game.state = GameState.SNAKE_ENCOUNTER
+        game.init_level()
+        for smooth in (False, True):
+            for scale in (0.25, 0.5, 0.75, 1.0):
+                game.canvas.smooth = smooth
+                game.canvas.set_scale(scale)
+                start = time.perf_counter()
+                for _ in range(frames):
+                    if len(game.particles) < particles:
+                        game.particles.emit(FEATHER, 400, 300, 100)
+                    game.particles.update(1 / 60)
+                    game.render()
+                elapsed = time.perf_counter() - start
+                # The upscale to the window on its own
+                start = time.perf_counter()
+                for _ in range(frames):
+                    game.canvas.present()
+                present = time.perf_counter() - start
+                size = "x".join(map(str, game.canvas.size))
+                print(
+                    f"{backend} scale {scale:.2f} ({size}, "
+                    f"{'smooth' if smooth else 'nearest'}): "
+                    f"{elapsed / frames * 1000:.2f} ms/frame, "
+                    f"present {present / frames * 1000:.2f} ms"
+                )
+
+
+if __name__ == "__main__":
+    benchmark()
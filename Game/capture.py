@@ -0,0 +1,149 @@
+"""Background frame capture for QA recordings.
+
+The main loop only copies the presented frame into one of a few
+preallocated buffers; a writer thread converts and writes it to disk as a
+PNG sequence or as one raw video file.  If every buffer is still waiting for
+the writer, the frame is dropped and counted rather than stalling the game.
+
+A raw capture can be encoded afterwards with ffmpeg; the exact command is
+written next to it in ``capture.txt``.
+"""
+
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import pygame
+
+BUFFERS = 8
+
+
+def _pixel_format(surface):
+    # ffmpeg name for a 32-bit surface's in-memory byte order
+    masks = surface.get_masks()
+    shifts = surface.get_shifts()
+    channels = ["x"] * 4
+    for letter, mask, shift in zip("rgba", masks, shifts):
+        if mask:
+            channels[shift // 8] = letter
+    name = "".join(channels)
+    return name.replace("x", "0")
+
+
+class FrameCapture:
+    def __init__(self, directory, fmt="png", fps=60, buffers=BUFFERS):
+        if fmt not in ("png", "raw"):
+            raise ValueError(f"unknown capture format: {fmt}")
+        self.directory = directory
+        self.fmt = fmt
+        self.fps = fps
+        self.buffer_count = buffers
+        os.makedirs(directory, exist_ok=True)
+
+        self.buffers = None
+        self.free = queue.Queue()
+        self.pending = queue.Queue()
+        self.writer = None
+        self.raw_file = None
+
+        self.frame = 0
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.copy_time = 0.0
+        self.write_time = 0.0
+
+    def _start(self, surface):
+        # Buffers match the first captured surface
+        self.size = surface.get_size()
+        self.shifts = surface.get_shifts()[:3]
+        width, height = self.size
+        self.buffers = [
+            np.empty((height, width), np.uint32) for _ in range(self.buffer_count)
+        ]
+        for i in range(self.buffer_count):
+            self.free.put(i)
+
+        if self.fmt == "raw":
+            self.raw_file = open(os.path.join(self.directory, "capture.raw"), "wb")
+            with open(os.path.join(self.directory, "capture.txt"), "w") as info:
+                info.write(
+                    f"ffmpeg -f rawvideo -pixel_format {_pixel_format(surface)} "
+                    f"-video_size {width}x{height} -framerate {self.fps} "
+                    f"-i capture.raw capture.mp4\n"
+                )
+
+        self.writer = threading.Thread(target=self._write_frames, daemon=True)
+        self.writer.start()
+
+    def capture(self, surface):
+        """Copy ``surface`` for writing; call right after the frame is flipped."""
+        if self.buffers is None:
+            self._start(surface)
+        self.frame += 1
+        try:
+            index = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+
+        start = time.perf_counter()
+        # pixels2d is (width, height); its transpose is row-major like the buffer
+        if surface.get_bytesize() == 4:
+            np.copyto(self.buffers[index], pygame.surfarray.pixels2d(surface).T)
+        else:
+            mapped = pygame.surfarray.map_array(
+                surface, pygame.surfarray.pixels3d(surface)
+            )
+            np.copyto(self.buffers[index], mapped.T, casting="unsafe")
+        self.copy_time += time.perf_counter() - start
+
+        self.pending.put((index, self.frame))
+        self.captured += 1
+        return True
+
+    def _write_frames(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            index, frame = item
+            start = time.perf_counter()
+            if self.fmt == "raw":
+                self.buffers[index].tofile(self.raw_file)
+            else:
+                self._write_png(self.buffers[index], frame)
+            self.write_time += time.perf_counter() - start
+            self.written += 1
+            self.free.put(index)
+
+    def _write_png(self, pixels, frame):
+        rshift, gshift, bshift = self.shifts
+        rgb = np.empty(pixels.shape + (3,), np.uint8)
+        rgb[..., 0] = pixels >> rshift
+        rgb[..., 1] = pixels >> gshift
+        rgb[..., 2] = pixels >> bshift
+        image = pygame.image.frombuffer(rgb.tobytes(), self.size, "RGB")
+        path = os.path.join(self.directory, f"frame_{frame:06d}.png")
+        pygame.image.save(image, path)
+
+    def close(self):
+        if self.writer:
+            self.pending.put(None)
+            self.writer.join()
+            self.writer = None
+        if self.raw_file:
+            self.raw_file.close()
+            self.raw_file = None
+
+    def summary(self):
+        captured = max(self.captured, 1)
+        written = max(self.written, 1)
+        return (
+            f"capture: {self.captured} frames captured, {self.dropped} dropped, "
+            f"{self.written} written to {self.directory}; "
+            f"copy {self.copy_time / captured * 1000:.2f} ms/frame, "
+            f"write {self.write_time / written * 1000:.2f} ms/frame"
+        )
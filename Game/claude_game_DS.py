@@ -1,9 +1,47 @@
+import argparse
 import pygame
 import sys
 import random
 import math
 from enum import Enum
 
+from canvas import BACKENDS, create_canvas
+from ai_scheduler import AIScheduler
+from animation import AnimationSystem, Clip
+from assets import asset_exists, load_scaled
+from capture import FrameCapture
+from collision import CollisionStats, collide
+from flight import EndlessFlight
+from hitch import HITCH_DIR, HITCH_THRESHOLD, HitchDetector
+from history import HISTORY_PATH, RunHistory
+from hud import Hud
+from input_pipeline import CpuStats, InputPipeline
+from navigation import FlowField, NavGrid
+from objectives import (
+    FLOWER_VISITED,
+    LARVA_FOUND,
+    NEST_PIECE_PLACED,
+    REACHED_TOP,
+    SURVIVED,
+    Objectives,
+)
+from parallax import hills_background
+from particles import FEATHER, POLLEN, WOOD_CHIP, ParticleSystem
+from pool import AllocationTracker, Pool, rect_pool
+from render_queue import (
+    BACKGROUND,
+    ENEMIES,
+    HUD,
+    OBJECTS,
+    PIECES,
+    PLAYERS,
+    TERRAIN,
+    UI,
+    RenderQueue,
+)
+from snapshot import SnapshotRing
+from timeline import Timeline
+
 # Initialize pygame
 pygame.init()
 
@@ -21,6 +59,49 @@ BLACK = (0, 0, 0)
 RED = (255, 0, 0)
 YELLOW = (255, 255, 0)
 
+BIRD_ART = "william_bird.png"
+_bird_clips = {}
+
+
+def bird_clips(tint=None):
+    # William's sprite sheet and clips, shared by every Player with this tint
+    clips = _bird_clips.get(tint)
+    if clips is None:
+        art = asset_exists(BIRD_ART)
+        frames = []
+        for height in (34, 30):  # wings down, wings up
+            frame = pygame.Surface((40, 40), pygame.SRCALPHA)
+            if art:
+                frame.blit(load_scaled(BIRD_ART, (40, height)), (0, 40 - height))
+            else:
+                frame.fill(RED)
+            frames.append(frame)
+        # Pecking: tipped forward
+        peck = pygame.Surface((40, 40), pygame.SRCALPHA)
+        tipped = pygame.transform.rotate(frames[0], -20)
+        peck.blit(tipped, tipped.get_rect(center=(22, 22)))
+        # Hurt: flushed red
+        hurt = frames[0].copy()
+        hurt.fill((120, 0, 0), special_flags=pygame.BLEND_RGB_ADD)
+        frames += [peck, hurt]
+
+        sheet = pygame.Surface((40 * len(frames), 40), pygame.SRCALPHA)
+        for i, frame in enumerate(frames):
+            sheet.blit(frame, (40 * i, 0))
+        if tint:
+            sheet.fill(tint, special_flags=pygame.BLEND_RGB_MULT)
+
+        def cell(i):
+            return (40 * i, 0, 40, 40)
+
+        clips = _bird_clips[tint] = {
+            "idle": Clip(sheet, [cell(0)], [1.0]),
+            "fly": Clip(sheet, [cell(0), cell(1)], [0.08, 0.08]),
+            "peck": Clip(sheet, [cell(2), cell(0)], [0.12, 0.05], loop=False),
+            "hurt": Clip(sheet, [cell(3), cell(0)] * 2, [0.06] * 4, loop=False),
+        }
+    return clips
+
 
 # Game states
 class GameState(Enum):
@@ -35,10 +116,12 @@ class GameState(Enum):
     NEST_BUILDING = 8
     GAME_OVER = 9
     WIN = 10
+    ENDLESS_FLIGHT = 11
+    LEADERBOARD = 12
 
 
 class Player:
-    def __init__(self):
+    def __init__(self, animations=None, tint=None):
         # Player stats
         self.feathers = 0
         self.health = 100
@@ -56,24 +139,20 @@ class Player:
         self.flying = False
         self.facing_right = True
 
-        # Animation state
-        self.animation_frame = 0
-        self.animation_speed = 0.2
-
         # Create simple rectangle for collision detection
         self.rect = pygame.Rect(self.x, self.y, 40, 40)
-
-        # Load images
-        self.images_right = [pygame.Surface((40, 40)), pygame.Surface((40, 40))]
-        self.images_left = [pygame.Surface((40, 40)), pygame.Surface((40, 40))]
-
-        # Color the player surfaces red for now (will be replaced with actual sprites)
-        for img in self.images_right + self.images_left:
-            img.fill(RED)
-
-        self.current_image = self.images_right[0]
-
-    def update(self, obstacles):
+        # Scratch rect for the peck area, reused every frame
+        self.peck_rect = pygame.Rect(0, 0, 20, 20)
+
+        # Animation: clips follow the bird's state, and the game's
+        # AnimationSystem advances every animator in one pass
+        if animations is None:
+            animations = AnimationSystem(capacity=1)
+        self.animator = animations.add(bird_clips(tint))
+        self.animator.play("idle")
+        self.sync_sprite()
+
+    def update(self, obstacles, stats=None):
         # Gravity
         self.velocity_y += 0.5
         if self.velocity_y > 10:
@@ -89,7 +168,7 @@ class Player:
 
         collision = False
         for obstacle in obstacles:
-            if self.rect.colliderect(obstacle):
+            if collide(self.rect, self.current_mask, obstacle, stats=stats):
                 collision = True
                 # Handle collision (simplified for now)
                 if self.velocity_y > 0:  # Falling
@@ -112,21 +191,25 @@ class Player:
         self.x = self.rect.x
         self.y = self.rect.y
 
-        # Animation
-        self.animation_frame += self.animation_speed
-        if self.animation_frame >= len(self.images_right):
-            self.animation_frame = 0
-
-        if self.facing_right:
-            self.current_image = self.images_right[int(self.animation_frame)]
-        else:
-            self.current_image = self.images_left[int(self.animation_frame)]
+        # Animation: pecking and hurt play out before flying or idling again
+        if self.animator.clip.loop or self.animator.finished:
+            self.animator.play("fly" if self.flying or self.jumping else "idle")
+        self.sync_sprite()
 
         # Reset horizontal velocity for next frame
         self.velocity_x *= 0.9
         if abs(self.velocity_x) < 0.1:
             self.velocity_x = 0
 
+    def sync_sprite(self):
+        # Current frame and its collision mask
+        self.current_image = self.animator.image(self.facing_right)
+        self.current_mask = self.animator.mask(self.facing_right)
+
+    def hurt(self, damage):
+        self.health -= damage
+        self.animator.play("hurt", restart=True)
+
     def jump(self):
         if not self.jumping:
             self.velocity_y = -12
@@ -146,38 +229,40 @@ class Player:
         self.velocity_x = 5
         self.facing_right = True
 
-    def peck(self, target_objects):
+    def peck_area(self):
         # Define a small area in front of the woodpecker
-        peck_rect = pygame.Rect(
-            self.rect.right if self.facing_right else self.rect.left - 20,
-            self.rect.centery - 10,
-            20,
-            20,
-        )
+        self.peck_rect.x = self.rect.right if self.facing_right else self.rect.left - 20
+        self.peck_rect.y = self.rect.centery - 10
+        return self.peck_rect
+
+    def peck(self, target_objects, particles=None, stats=None):
+        peck_rect = self.peck_area()
+        self.animator.play("peck", restart=True)
+
+        # A few loose feathers with every peck
+        if particles is not None:
+            particles.emit(FEATHER, self.rect.centerx, self.rect.centery, 3)
 
         # Check for collision with peckable objects
         for obj in target_objects:
-            if peck_rect.colliderect(obj.rect):
+            if collide(peck_rect, None, obj.rect, stats=stats):
                 return obj
         return None
 
-    def draw(self, screen):
-        screen.blit(self.current_image, (self.x, self.y))
+    def draw(self, queue):
+        queue.blit(self.current_image, (self.x, self.y), layer=PLAYERS)
 
         # Draw peck area for debugging
-        if self.facing_right:
-            pygame.draw.rect(
-                screen, YELLOW, (self.rect.right, self.rect.centery - 10, 20, 20), 1
-            )
-        else:
-            pygame.draw.rect(
-                screen, YELLOW, (self.rect.left - 20, self.rect.centery - 10, 20, 20), 1
-            )
+        queue.rect(YELLOW, self.peck_area(), 1, layer=PLAYERS, key=1)
 
 
 class PeckableObject:
     def __init__(self, x, y, width, height, type="tree"):
         self.rect = pygame.Rect(x, y, width, height)
+        self.reset(x, y, width, height, type)
+
+    def reset(self, x, y, width, height, type="tree"):
+        self.rect.update(x, y, width, height)
         self.type = type
         self.health = 3
         self.has_larva = random.choice([True, False])
@@ -191,60 +276,92 @@ class PeckableObject:
         else:
             self.color = YELLOW
 
-    def peck(self):
+    def peck(self, particles=None, events=None):
         self.health -= 1
         self.pecked = True
+        if particles is not None:
+            # Wood chips fly back out of the hole
+            particles.emit(
+                WOOD_CHIP, self.rect.centerx, self.rect.centery, 25, -math.pi / 2, 1.2
+            )
+        # The larva is found once, on the peck that breaks through
+        if events is not None and self.has_larva and self.health == 0:
+            events.publish(LARVA_FOUND)
         return self.has_larva and self.health <= 0
 
-    def draw(self, screen):
-        pygame.draw.rect(screen, self.color, self.rect)
+    def draw(self, queue):
+        queue.rect(self.color, self.rect, layer=OBJECTS)
         if self.pecked:
             # Show "damage" from pecking
-            pygame.draw.line(
-                screen,
+            queue.line(
                 BLACK,
                 (self.rect.left, self.rect.top),
                 (self.rect.right, self.rect.bottom),
                 2,
+                layer=OBJECTS,
+                key=1,
             )
 
 
 class Snake:
     def __init__(self, x, y):
-        self.x = x
-        self.y = y
         self.width = 80
         self.height = 30
         self.speed = 2
         self.rect = pygame.Rect(x, y, self.width, self.height)
-        self.active = True
+        self.reset(x, y)
 
-    def update(self, player_x):
-        # Snake follows player's x position
-        if self.x < player_x:
-            self.x += self.speed
+    def reset(self, x, y):
+        self.x = x
+        self.y = y
+        self.rect.update(x, y, self.width, self.height)
+        self.active = True
+        # Unit step from the flow field, set by FlowField.steer each tick
+        self.heading = (0, 0)
+
+    def update(self, player_x, heading=None, steps=1):
+        # ``steps`` ticks at once for enemies the AI scheduler updates less often
+        dx, dy = heading or (0, 0)
+
+        distance = self.speed * steps
+        if dx or dy:
+            # Follow the shared flow field around obstacles
+            self.x += dx * distance
+            self.y += dy * distance
+        elif self.x < player_x:
+            # Snake follows player's x position
+            self.x += min(distance, player_x - self.x)
         else:
-            self.x -= self.speed
+            self.x -= min(distance, self.x - player_x)
 
         self.rect.x = self.x
+        self.rect.y = self.y
 
-    def draw(self, screen):
+    def draw(self, queue):
         if self.active:
-            pygame.draw.rect(screen, (0, 100, 0), self.rect)  # Dark green snake
+            queue.rect((0, 100, 0), self.rect, layer=ENEMIES)  # Dark green snake
             # Draw snake eyes
-            pygame.draw.circle(
-                screen, BLACK, (self.rect.left + 10, self.rect.top + 10), 3
+            queue.circle(
+                BLACK,
+                (self.rect.left + 10, self.rect.top + 10),
+                3,
+                layer=ENEMIES,
+                key=1,
             )
 
 
 class NestPiece:
     def __init__(self, x, y, piece_type):
-        self.x = x
-        self.y = y
-        self.piece_type = piece_type
         self.width = 40
         self.height = 20
         self.rect = pygame.Rect(x, y, self.width, self.height)
+        self.reset(x, y, piece_type)
+
+    def reset(self, x, y, piece_type):
+        self.x = x
+        self.y = y
+        self.piece_type = piece_type
+        self.rect.update(x, y, self.width, self.height)
         self.placed = False
 
         # Color based on type
@@ -257,8 +374,8 @@ class NestPiece:
         else:
             self.color = BROWN
 
-    def draw(self, screen):
-        pygame.draw.rect(screen, self.color, self.rect)
+    def draw(self, queue, key=0):
+        queue.rect(self.color, self.rect, layer=PIECES, key=key)
 
     def move(self, dx, dy):
         self.x += dx
@@ -286,16 +403,18 @@ class Button:
         self.is_hovered = False
 
     def update(self, mouse_pos):
-        self.is_hovered = self.rect.collidepoint(mouse_pos)
+        # Returns True when the hover state changed
+        hovered = self.rect.collidepoint(mouse_pos)
+        changed = hovered != self.is_hovered
+        self.is_hovered = hovered
+        return changed
 
-    def draw(self, screen):
+    def draw(self, queue):
         color = self.hover_color if self.is_hovered else self.color
-        pygame.draw.rect(screen, color, self.rect)
-        pygame.draw.rect(screen, BLACK, self.rect, 2)  # Border
+        queue.rect(color, self.rect, layer=UI)
+        queue.rect(BLACK, self.rect, 2, layer=UI, key=1)  # Border
 
-        text_surface = self.font.render(self.text, True, BLACK)
-        text_rect = text_surface.get_rect(center=self.rect.center)
-        screen.blit(text_surface, text_rect)
+        queue.text(self.font, self.text, BLACK, self.rect.center, "center", key=2)
 
     def is_clicked(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
@@ -337,13 +456,18 @@ class WorldMap:
         self.font = pygame.font.SysFont("Arial", 16)
         self.title_font = pygame.font.SysFont("Arial", 24)
 
-    def draw(self, screen, unlocked_zones):
+    def draw(self, queue, unlocked_zones):
         # Draw map background
-        screen.fill((230, 230, 200))  # Light tan
+        queue.fill((230, 230, 200))  # Light tan
 
         # Draw title
-        title = self.title_font.render("Choose Your Adventure", True, BLACK)
-        screen.blit(title, (self.width // 2 - title.get_width() // 2, 50))
+        queue.text(
+            self.title_font,
+            "Choose Your Adventure",
+            BLACK,
+            (self.width // 2, 50),
+            "midtop",
+        )
 
         # Update unlocked status
         for zone in self.zones:
@@ -354,25 +478,25 @@ class WorldMap:
             # Draw paths between zones
             if i > 0:
                 prev_zone = self.zones[i - 1]
-                pygame.draw.line(
-                    screen, BLACK, prev_zone["position"], zone["position"], 2
-                )
+                queue.line(BLACK, prev_zone["position"], zone["position"], 2, layer=UI)
 
             # Draw zone circle
             color = zone["color"] if zone["unlocked"] else (150, 150, 150)
-            pygame.draw.circle(screen, color, zone["position"], 30)
-            pygame.draw.circle(screen, BLACK, zone["position"], 30, 2)
+            queue.circle(color, zone["position"], 30, layer=UI, key=1)
+            queue.circle(BLACK, zone["position"], 30, 2, layer=UI, key=2)
 
             # Draw zone name
-            text = self.font.render(zone["name"], True, BLACK)
-            screen.blit(
-                text,
-                (zone["position"][0] - text.get_width() // 2, zone["position"][1] + 40),
+            queue.text(
+                self.font,
+                zone["name"],
+                BLACK,
+                (zone["position"][0], zone["position"][1] + 40),
+                "midtop",
             )
 
             # Highlight selected zone
             if self.selected_zone == zone["name"]:
-                pygame.draw.circle(screen, WHITE, zone["position"], 35, 3)
+                queue.circle(WHITE, zone["position"], 35, 3, layer=UI, key=3)
 
     def handle_click(self, mouse_pos, unlocked_zones):
         for zone in self.zones:
@@ -386,14 +510,96 @@ class WorldMap:
         return None
 
 
+# HUD readouts: name, label, format spec and widest value in characters
+HUD_FIELDS = [
+    ("health", "Health: ", "d", 4),
+    ("score", "Score: ", "d", 5),
+    ("feathers", "Feathers: ", "d", 3),
+    ("time", "Time: ", ".1f", 5),
+]
+
+# Screens that only change on input; the main loop idles on them
+STATIC_STATES = (
+    GameState.MENU,
+    GameState.STORY,
+    GameState.MAP,
+    GameState.DECISION,
+    GameState.GAME_OVER,
+    GameState.WIN,
+    GameState.LEADERBOARD,
+)
+# Full-rate frames after the last change before idling
+IDLE_AFTER = 10
+
+
+# Level name, completing event and count, score and feathers awarded.
+# A count of None means "every nest piece".
+LEVEL_GOALS = {
+    GameState.FLYING_TUTORIAL: ("Flying Tutorial", REACHED_TOP, 1, 50, 3),
+    GameState.PECKING_GAME: ("Pecking Game", LARVA_FOUND, 2, 50, 0),
+    GameState.FLOWER_CHALLENGE: ("Flower Challenge", FLOWER_VISITED, 3, 50, 2),
+    GameState.SNAKE_ENCOUNTER: ("Snake Encounter", SURVIVED, 1, 75, 4),
+    GameState.NEST_BUILDING: ("Nest Building", NEST_PIECE_PLACED, None, 50, 3),
+}
+
+# Where a completed level leads, and after how many seconds
+LEVEL_TRANSITIONS = {
+    GameState.FLYING_TUTORIAL: (GameState.PECKING_GAME, 3),
+    GameState.PECKING_GAME: (GameState.DECISION, 3),
+    GameState.FLOWER_CHALLENGE: (GameState.SNAKE_ENCOUNTER, 3),
+    GameState.SNAKE_ENCOUNTER: (GameState.NEST_BUILDING, 0),
+    GameState.NEST_BUILDING: (GameState.WIN, 3),
+}
+
+# Timeline task groups and signals
+LEVEL_TASKS = "level"
+TRANSITION = "transition"
+CUTSCENE = "cutscene"
+CONTINUE = "continue"
+
+STORY_PAGES = 3
+SURVIVE_TIME = 15
+# When the second snake comes out of hiding
+AMBUSH_TIME = 8
+
+
 class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("William's Wild Adventure")
+    def __init__(
+        self,
+        render_scale=1.0,
+        smooth=False,
+        window_size=None,
+        backend="surface",
+        history_path=None,
+    ):
+        # Scenes draw in logical coordinates, possibly at a lower resolution
+        self.canvas = create_canvas(
+            backend,
+            "William's Wild Adventure",
+            window_size or (SCREEN_WIDTH, SCREEN_HEIGHT),
+            (SCREEN_WIDTH, SCREEN_HEIGHT),
+            render_scale,
+            smooth,
+        )
+        # The display Surface; the SDL2 renderer backend has none
+        self.screen = pygame.display.get_surface()
+        # Draw commands are queued, sorted and batched before hitting the canvas
+        self.render_queue = RenderQueue()
+        # Backdrop behind the levels; their camera never moves, so it stays flat
+        self.level_background = hills_background((SCREEN_WIDTH, SCREEN_HEIGHT))
         self.clock = pygame.time.Clock()
         self.running = True
         self.state = GameState.MENU
-        self.player = Player()
+        # Sprite animation for every animated entity, advanced in one pass
+        self.animations = AnimationSystem()
+        self.player = Player(self.animations)
+        self.flow_field = None
+        # Endless flight mode, set up the first time it is played
+        self.flight = None
+        # Enemy AI runs less often far away and off screen
+        self.ai = AIScheduler((0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
+        # Second woodpecker in networked co-op (see net.py)
+        self.partner = None
         self.obstacles = []
         self.peckable_objects = []
         self.enemies = []
@@ -405,10 +611,49 @@ class Game:
         self.story_phase = 0
         self.font = pygame.font.SysFont("Arial", 24)
         self.small_font = pygame.font.SysFont("Arial", 18)
+        self.title_font = pygame.font.SysFont("Arial", 48)
+        self.hud = Hud(self.font, BLACK, HUD_FIELDS)
         self.world_map = WorldMap(SCREEN_WIDTH, SCREEN_HEIGHT)
 
+        # Level objects are recycled through pools on every init_level
+        self.peckable_pool = Pool(PeckableObject)
+        self.snake_pool = Pool(Snake)
+        self.nest_piece_pool = Pool(NestPiece)
+        self.rect_pool = rect_pool()
+
+        # Level goals, driven by published gameplay events
+        self.objectives = Objectives()
+
+        # Cutscenes, delayed transitions and timed spawns on simulation time
+        self.timeline = Timeline()
+
+        # Static screens are only redrawn when dirty
+        self.dirty = True
+        self.rendered_state = None
+
+        # Mask-test counters for the collision checks
+        self.collisions = CollisionStats()
+
+        # Wood chips, feathers and pollen
+        self.particles = ParticleSystem(bounds=(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
+
+        # Rollback history: the last few seconds of ticks plus a level checkpoint
+        self.tick = 0
+        self.history = SnapshotRing()
+        self.checkpoint = SnapshotRing(capacity=1)
+        self.checkpoint_pending = True
+        self.levels_built = 0
+
         # Game progress
         self.completed_levels = set()
+
+        # Finished runs go to a local database, written off the frame loop;
+        # without a path (headless games) nothing is recorded
+        self.run_history = RunHistory(history_path)
+        self.run = None
+        # Leaderboard queries in flight: adventure, endless and level times
+        self.leaderboard = None
+        self.leaderboard_drawn = False
         self.current_zone = "Tree Tops"
 
         # Initialize menu buttons
@@ -430,34 +675,53 @@ class Game:
         self.buttons.clear()
 
         # Add menu buttons
-        start_button = Button(SCREEN_WIDTH // 2 - 100, 250, 200, 50, "Start Adventure")
+        start_button = Button(SCREEN_WIDTH // 2 - 100, 230, 200, 50, "Start Adventure")
         instructions_button = Button(
-            SCREEN_WIDTH // 2 - 100, 320, 200, 50, "Instructions"
+            SCREEN_WIDTH // 2 - 100, 290, 200, 50, "Instructions"
+        )
+        flight_button = Button(SCREEN_WIDTH // 2 - 100, 350, 200, 50, "Endless Flight")
+        leaderboard_button = Button(
+            SCREEN_WIDTH // 2 - 100, 410, 200, 50, "Leaderboard"
+        )
+        quit_button = Button(SCREEN_WIDTH // 2 - 100, 470, 200, 50, "Quit")
+
+        self.buttons.extend(
+            [
+                start_button,
+                instructions_button,
+                flight_button,
+                leaderboard_button,
+                quit_button,
+            ]
         )
-        quit_button = Button(SCREEN_WIDTH // 2 - 100, 390, 200, 50, "Quit")
-
-        self.buttons.extend([start_button, instructions_button, quit_button])
 
     def init_level(self):
-        # Reset level-specific elements
-        self.obstacles.clear()
-        self.peckable_objects.clear()
-        self.enemies.clear()
-        self.nest_pieces.clear()
-        self.nest_slots.clear()
+        # Return level-specific elements to their pools
+        self.rect_pool.release_all(self.obstacles)
+        self.peckable_pool.release_all(self.peckable_objects)
+        self.snake_pool.release_all(self.enemies)
+        self.nest_piece_pool.release_all(self.nest_pieces)
+        self.rect_pool.release_all(self.nest_slots)
+        self.timeline.cancel_group(LEVEL_TASKS)
+        self.timeline.cancel_group(TRANSITION)
+        self.ai.reset()
         self.level_timer = 0
+        self.checkpoint_pending = True
+        # Building a level draws from the RNG; snapshots read it only then
+        self.levels_built += 1
+        self.particles.clear()
 
         # Add ground as an obstacle
-        ground = pygame.Rect(0, SCREEN_HEIGHT - 50, SCREEN_WIDTH, 50)
+        ground = self.rect_pool.acquire(0, SCREEN_HEIGHT - 50, SCREEN_WIDTH, 50)
         self.obstacles.append(ground)
 
         if self.state == GameState.FLYING_TUTORIAL:
             # Add some platforms for the flying tutorial
             self.obstacles.extend(
                 [
-                    pygame.Rect(200, 450, 100, 20),
-                    pygame.Rect(400, 350, 100, 20),
-                    pygame.Rect(600, 250, 100, 20),
+                    self.rect_pool.acquire(200, 450, 100, 20),
+                    self.rect_pool.acquire(400, 350, 100, 20),
+                    self.rect_pool.acquire(600, 250, 100, 20),
                 ]
             )
 
@@ -470,7 +734,7 @@ class Game:
         elif self.state == GameState.PECKING_GAME:
             # Add trees to peck
             for i in range(5):
-                tree = PeckableObject(
+                tree = self.peckable_pool.acquire(
                     100 + i * 150, SCREEN_HEIGHT - 300, 40, 250, "tree"
                 )
                 self.peckable_objects.append(tree)
@@ -482,9 +746,11 @@ class Game:
             self.player.rect.y = self.player.y
 
         elif self.state == GameState.SNAKE_ENCOUNTER:
-            # Add a snake enemy
-            snake = Snake(SCREEN_WIDTH - 100, SCREEN_HEIGHT - 80)
-            self.enemies.append(snake)
+            # Add a snake enemy, and a second one hiding until the ambush
+            snake = self.snake_pool.acquire(SCREEN_WIDTH - 100, SCREEN_HEIGHT - 80)
+            lurker = self.snake_pool.acquire(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 80)
+            lurker.active = False
+            self.enemies.extend([snake, lurker])
 
             # Reset player position
             self.player.x = 100
@@ -506,7 +772,7 @@ class Game:
         elif self.state == GameState.FLOWER_CHALLENGE:
             # Add flowers for hovering challenge
             for i in range(4):
-                flower = PeckableObject(
+                flower = self.peckable_pool.acquire(
                     150 + i * 180, SCREEN_HEIGHT - 130, 50, 80, "flower"
                 )
                 self.peckable_objects.append(flower)
@@ -517,25 +783,143 @@ class Game:
             self.player.rect.x = self.player.x
             self.player.rect.y = self.player.y
 
+        elif self.state == GameState.ENDLESS_FLIGHT:
+            if self.flight is None:
+                self.flight = EndlessFlight(SCREEN_WIDTH, SCREEN_HEIGHT)
+            self.flight.reset()
+            self.flight.place_player(self.player)
+            self.start_run("endless")
+
         elif self.state == GameState.NEST_BUILDING:
             # Create nest building puzzle pieces
             piece_types = ["twig", "leaf", "moss", "twig", "leaf"]
 
             # Create pieces to place
             for i, piece_type in enumerate(piece_types):
-                piece = NestPiece(50 + i * 60, SCREEN_HEIGHT - 100, piece_type)
+                piece = self.nest_piece_pool.acquire(
+                    50 + i * 60, SCREEN_HEIGHT - 100, piece_type
+                )
                 self.nest_pieces.append(piece)
 
             # Create slots where pieces go
             for i in range(5):
-                slot = pygame.Rect(300 + i * 50, 300, 40, 20)
+                slot = self.rect_pool.acquire(300 + i * 50, 300, 40, 20)
                 self.nest_slots.append(slot)
 
-    def handle_events(self):
-        for event in pygame.event.get():
+        self.init_objectives()
+        self.start_level_tasks()
+
+        # Enemies share one flow field over this level's obstacles
+        self.flow_field = None
+        if self.enemies:
+            snake = self.enemies[0]
+            grid = NavGrid(
+                self.obstacles, SCREEN_WIDTH, SCREEN_HEIGHT, (snake.width, snake.height)
+            )
+            self.flow_field = FlowField(grid)
+
+    def init_objectives(self):
+        self.objectives.reset()
+        goal = LEVEL_GOALS.get(self.state)
+        if goal and goal[0] not in self.completed_levels:
+            name, event, count, _, _ = goal
+            if count is None:
+                count = len(self.nest_pieces)
+            self.objectives.add_goal(name, event, count, self.complete_level)
+
+    def sync_objectives(self):
+        # Recount events from the level's objects, e.g. after a rollback
+        self.init_objectives()
+        counts = self.objectives.counts
+        counts[LARVA_FOUND] = sum(
+            1 for obj in self.peckable_objects if obj.has_larva and obj.health <= 0
+        )
+        counts[FLOWER_VISITED] = sum(1 for obj in self.peckable_objects if obj.pecked)
+        counts[NEST_PIECE_PLACED] = sum(1 for piece in self.nest_pieces if piece.placed)
+
+    def complete_level(self, name):
+        _, _, _, score, feathers = LEVEL_GOALS[self.state]
+        self.completed_levels.add(name)
+        self.score += score
+        self.player.feathers += feathers
+        if self.run is not None:
+            self.run_history.record_level(
+                self.run, name, self.level_timer, self.score, self.player.health
+            )
+
+        next_state, delay = LEVEL_TRANSITIONS[self.state]
+        self.timeline.start(self.transition(next_state, delay), TRANSITION)
+
+    def transition(self, next_state, delay):
+        # Show the completed level for a moment before moving on
+        level = self.state
+        if delay:
+            yield delay
+        # Unless the player has left it in the meantime (map, game over)
+        if self.state == level:
+            self.state = next_state
+            self.init_level()
+
+    def start_level_tasks(self):
+        if self.state == GameState.SNAKE_ENCOUNTER:
+            self.timeline.start(self.survive(), LEVEL_TASKS)
+            self.timeline.start(self.ambush(), LEVEL_TASKS)
+
+    def sync_timeline(self):
+        # Restart the level's timed tasks from the level clock, e.g. after a rollback
+        self.timeline.cancel_group(LEVEL_TASKS)
+        self.start_level_tasks()
+        goal = LEVEL_GOALS.get(self.state)
+        if goal and goal[0] not in self.completed_levels:
+            # The completion was rolled back, and its transition with it
+            self.timeline.cancel_group(TRANSITION)
+        self.timeline.cancel_group(CUTSCENE)
+        if self.state == GameState.STORY:
+            self.timeline.start(self.story(self.story_phase), CUTSCENE)
+
+    def wait_level_time(self, seconds):
+        # Sleep until the level clock reaches ``seconds``; a rollback may move it
+        while self.level_timer < seconds:
+            yield seconds - self.level_timer
+
+    def survive(self):
+        yield from self.wait_level_time(SURVIVE_TIME)
+        self.objectives.publish(SURVIVED)
+
+    def ambush(self):
+        yield from self.wait_level_time(AMBUSH_TIME)
+        for enemy in self.enemies:
+            enemy.active = True
+
+    def story(self, first_page=0):
+        # One page per ENTER, then on to the first level
+        for page in range(first_page, STORY_PAGES):
+            self.story_phase = page
+            self.dirty = True
+            yield CONTINUE
+        self.state = GameState.FLYING_TUTORIAL
+        self.init_level()
+
+    def handle_events(self, events=None):
+        if events is None:
+            events = pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
 
+            # Anything but plain mouse motion may change a static screen;
+            # hover changes are caught in update()
+            if event.type != pygame.MOUSEMOTION:
+                self.dirty = True
+
+            # Mouse positions in logical coordinates
+            if event.type in (
+                pygame.MOUSEBUTTONDOWN,
+                pygame.MOUSEBUTTONUP,
+                pygame.MOUSEMOTION,
+            ):
+                pos = self.canvas.to_logical(event.pos)
+
             # Button clicks
             for button in self.buttons:
                 if button.is_clicked(event):
@@ -544,9 +928,7 @@ class Game:
             # Map clicks
             if self.state == GameState.MAP:
                 if event.type == pygame.MOUSEBUTTONDOWN:
-                    zone = self.world_map.handle_click(
-                        event.pos, self.player.unlocked_zones
-                    )
+                    zone = self.world_map.handle_click(pos, self.player.unlocked_zones)
                     if zone:
                         self.current_zone = zone
                         if zone == "Tree Tops":
@@ -562,10 +944,10 @@ class Game:
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     # Check if clicked on a piece
                     for piece in self.nest_pieces:
-                        if piece.rect.collidepoint(event.pos) and not piece.placed:
+                        if piece.rect.collidepoint(pos) and not piece.placed:
                             self.dragging_piece = piece
-                            self.drag_offset_x = piece.rect.x - event.pos[0]
-                            self.drag_offset_y = piece.rect.y - event.pos[1]
+                            self.drag_offset_x = piece.rect.x - pos[0]
+                            self.drag_offset_y = piece.rect.y - pos[1]
                             break
 
                 elif event.type == pygame.MOUSEBUTTONUP:
@@ -576,19 +958,14 @@ class Game:
                                 self.dragging_piece.rect.x = slot.x
                                 self.dragging_piece.rect.y = slot.y
                                 self.dragging_piece.placed = True
-                                # Check if all pieces are placed
-                                if all(piece.placed for piece in self.nest_pieces):
-                                    self.completed_levels.add("Nest Building")
-                                    self.score += 50
-                                    self.player.feathers += 3
-                                    # Wait a bit then go to win state
-                                    self.level_timer = 0
+                                self.objectives.publish(NEST_PIECE_PLACED)
+                                break
                         delattr(self, "dragging_piece")
 
                 elif event.type == pygame.MOUSEMOTION:
                     if hasattr(self, "dragging_piece"):
-                        self.dragging_piece.rect.x = event.pos[0] + self.drag_offset_x
-                        self.dragging_piece.rect.y = event.pos[1] + self.drag_offset_y
+                        self.dragging_piece.rect.x = pos[0] + self.drag_offset_x
+                        self.dragging_piece.rect.y = pos[1] + self.drag_offset_y
                         self.dragging_piece.x = self.dragging_piece.rect.x
                         self.dragging_piece.y = self.dragging_piece.rect.y
 
@@ -600,32 +977,41 @@ class Game:
                         GameState.PECKING_GAME,
                         GameState.FLOWER_CHALLENGE,
                         GameState.SNAKE_ENCOUNTER,
+                        GameState.ENDLESS_FLIGHT,
                     ]:
                         self.player.jump()
 
                 if event.key == pygame.K_p:
-                    if self.state == GameState.PECKING_GAME:
-                        pecked_object = self.player.peck(self.peckable_objects)
-                        if pecked_object:
-                            found_larva = pecked_object.peck()
-                            if found_larva:
-                                self.score += 10
-                                self.player.feathers += 1
-
-                    elif self.state == GameState.FLOWER_CHALLENGE:
-                        pecked_object = self.player.peck(self.peckable_objects)
-                        if pecked_object and not pecked_object.pecked:
-                            pecked_object.pecked = True
-                            self.score += 5
+                    self.player_peck(self.player)
+
+                # Render quality slider: F9 faster, F10 sharper, F11 smoothing
+                if event.key == pygame.K_F9:
+                    self.canvas.step_quality(-1)
+                elif event.key == pygame.K_F10:
+                    self.canvas.step_quality(1)
+                elif event.key == pygame.K_F11:
+                    self.canvas.smooth = not self.canvas.smooth
+                    self.canvas.set_scale(self.canvas.scale)
+
+                if event.key == pygame.K_r:
+                    if self.state in [
+                        GameState.FLYING_TUTORIAL,
+                        GameState.PECKING_GAME,
+                        GameState.FLOWER_CHALLENGE,
+                        GameState.SNAKE_ENCOUNTER,
+                        GameState.NEST_BUILDING,
+                    ]:
+                        self.retry_from_checkpoint()
 
                 if event.key == pygame.K_RETURN:
                     if self.state == GameState.STORY:
-                        self.story_phase += 1
-                        if self.story_phase >= 3:  # After showing 3 story screens
-                            self.state = GameState.FLYING_TUTORIAL
-                            self.init_level()
+                        self.timeline.signal(CONTINUE)
 
-                    elif self.state in [GameState.GAME_OVER, GameState.WIN]:
+                    elif self.state in [
+                        GameState.GAME_OVER,
+                        GameState.WIN,
+                        GameState.LEADERBOARD,
+                    ]:
                         self.state = GameState.MENU
                         self.init_menu()
 
@@ -641,19 +1027,29 @@ class Game:
                             self.init_level()
 
                 if event.key == pygame.K_ESCAPE:
-                    if self.state not in [
+                    if self.state == GameState.ENDLESS_FLIGHT:
+                        # Leaving ends the run; it isn't part of the adventure
+                        if self.run is not None:
+                            self.finish_run("quit")
+                        self.state = GameState.MENU
+                        self.init_menu()
+                    elif self.state not in [
                         GameState.MENU,
                         GameState.STORY,
                         GameState.GAME_OVER,
                         GameState.WIN,
+                        GameState.LEADERBOARD,
                     ]:
                         self.state = GameState.MAP
 
     def handle_button_click(self, button):
         if self.state == GameState.MENU:
             if button.text == "Start Adventure":
+                self.buttons.clear()
                 self.state = GameState.STORY
-                self.story_phase = 0
+                self.start_run("adventure")
+                self.timeline.cancel_group(CUTSCENE)
+                self.timeline.start(self.story(), CUTSCENE)
 
             elif button.text == "Instructions":
                 # Create instruction buttons
@@ -664,6 +1060,16 @@ class Game:
                 self.buttons.append(back_button)
                 self.state = GameState.INSTRUCTIONS
 
+            elif button.text == "Endless Flight":
+                self.buttons.clear()
+                self.state = GameState.ENDLESS_FLIGHT
+                self.init_level()
+
+            elif button.text == "Leaderboard":
+                self.buttons.clear()
+                self.state = GameState.LEADERBOARD
+                self.query_leaderboard()
+
             elif button.text == "Quit":
                 self.running = False
 
@@ -683,6 +1089,30 @@ class Game:
                 self.state = GameState.SNAKE_ENCOUNTER
                 self.init_level()
 
+    def player_peck(self, player):
+        if self.state == GameState.PECKING_GAME:
+            pecked_object = player.peck(
+                self.peckable_objects, self.particles, self.collisions
+            )
+            if pecked_object:
+                found_larva = pecked_object.peck(self.particles, self.objectives)
+                if found_larva:
+                    self.score += 10
+                    player.feathers += 1
+
+        elif self.state == GameState.FLOWER_CHALLENGE:
+            pecked_object = player.peck(
+                self.peckable_objects, self.particles, self.collisions
+            )
+            if pecked_object and not pecked_object.pecked:
+                pecked_object.pecked = True
+                self.score += 5
+                self.objectives.publish(FLOWER_VISITED)
+                # Pollen drifts up out of the visited flower
+                self.particles.emit(
+                    POLLEN, pecked_object.rect.centerx, pecked_object.rect.top, 40
+                )
+
     def handle_input(self):
         keys = pygame.key.get_pressed()
 
@@ -691,6 +1121,7 @@ class Game:
             GameState.PECKING_GAME,
             GameState.FLOWER_CHALLENGE,
             GameState.SNAKE_ENCOUNTER,
+            GameState.ENDLESS_FLIGHT,
         ]:
             if keys[pygame.K_LEFT]:
                 self.player.move_left()
@@ -703,9 +1134,10 @@ class Game:
 
     def update(self):
         # Update button hover states
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = self.canvas.to_logical(pygame.mouse.get_pos())
         for button in self.buttons:
-            button.update(mouse_pos)
+            if button.update(mouse_pos):
+                self.dirty = True
 
         # Update game logic based on current state
         if self.state in [
@@ -715,97 +1147,58 @@ class Game:
             GameState.SNAKE_ENCOUNTER,
         ]:
 
-            self.player.update(self.obstacles)
+            self.player.update(self.obstacles, self.collisions)
+            if self.partner:
+                self.partner.update(self.obstacles, self.collisions)
 
             # Update enemies
+            if self.flow_field:
+                self.flow_field.update_target(*self.player.rect.center)
+                self.flow_field.steer(self.enemies)
+            self.ai.update(self.enemies, self.player.rect.center, self.update_enemy)
             for enemy in self.enemies:
-                enemy.update(self.player.x)
+                if not enemy.active:
+                    continue
+
+                # Check for collision with either woodpecker
+                for player in [self.player, self.partner]:
+                    if player and collide(
+                        player.rect,
+                        player.current_mask,
+                        enemy.rect,
+                        stats=self.collisions,
+                    ):
+                        player.hurt(10)
+                        # Push player away from snake
+                        if player.x < enemy.x:
+                            player.x -= 30
+                        else:
+                            player.x += 30
+                        player.rect.x = player.x
 
-                # Check for collision with player
-                if enemy.rect.colliderect(self.player.rect):
-                    self.player.health -= 10
-                    # Push player away from snake
-                    if self.player.x < enemy.x:
-                        self.player.x -= 30
-                    else:
-                        self.player.x += 30
-                    self.player.rect.x = self.player.x
+                if self.player.health <= 0:
+                    self.state = GameState.GAME_OVER
 
-                    if self.player.health <= 0:
-                        self.state = GameState.GAME_OVER
+            self.particles.update(1 / FPS)
+            self.animations.update(1 / FPS)
 
             # Update timer
             self.level_timer += 1 / 60  # Assuming 60 FPS
 
-            # Level-specific updates
+            # Level-specific updates; counted goals complete through events
             if self.state == GameState.FLYING_TUTORIAL:
                 # Check if player reached the highest platform
                 highest_platform = self.obstacles[
                     3
                 ]  # The third platform added (index 3 because ground is at 0)
-                if (
-                    self.player.rect.colliderect(highest_platform)
-                    and "Flying Tutorial" not in self.completed_levels
-                ):
-                    self.completed_levels.add("Flying Tutorial")
-                    self.score += 50
-                    self.player.feathers += 3
-                    # Show a transition after a delay
-                    if self.level_timer > 3:  # 3 seconds after completion
-                        self.state = GameState.PECKING_GAME
-                        self.init_level()
-
-            elif self.state == GameState.PECKING_GAME:
-                # Check if player found enough larvae
-                larvae_found = sum(
-                    1
-                    for obj in self.peckable_objects
-                    if obj.pecked and obj.has_larva and obj.health <= 0
-                )
-                if larvae_found >= 2 and "Pecking Game" not in self.completed_levels:
-                    self.completed_levels.add("Pecking Game")
-                    self.score += 50
-                    # Transition to decision point
-                    if self.level_timer > 3:
-                        self.state = GameState.DECISION
-                        self.init_level()
-
-            elif self.state == GameState.FLOWER_CHALLENGE:
-                # Check if player visited all flowers
-                flowers_visited = sum(1 for obj in self.peckable_objects if obj.pecked)
-                if (
-                    flowers_visited >= 3
-                    and "Flower Challenge" not in self.completed_levels
-                ):
-                    self.completed_levels.add("Flower Challenge")
-                    self.score += 50
-                    self.player.feathers += 2
-                    # Transition to next level
-                    if self.level_timer > 3:
-                        self.state = GameState.SNAKE_ENCOUNTER
-                        self.init_level()
-
-            elif self.state == GameState.SNAKE_ENCOUNTER:
-                # Check if player escaped the snake for long enough
-                if (
-                    self.level_timer > 15
-                    and "Snake Encounter" not in self.completed_levels
-                ):  # 15 seconds survival
-                    self.completed_levels.add("Snake Encounter")
-                    self.score += 75
-                    self.player.feathers += 4
-                    # Transition to next level
-                    self.state = GameState.NEST_BUILDING
-                    self.init_level()
-
-            elif self.state == GameState.NEST_BUILDING:
-                # Check if all pieces are placed
-                if "Nest Building" in self.completed_levels and self.level_timer > 3:
-                    self.state = GameState.WIN
+                if self.objectives.waiting_for(
+                    REACHED_TOP
+                ) and self.player.rect.colliderect(highest_platform):
+                    self.objectives.publish(REACHED_TOP)
 
             # Check for falling off screen
             if self.player.y > SCREEN_HEIGHT:
-                self.player.health -= 25
+                self.player.hurt(25)
                 self.player.x = 100
                 self.player.y = SCREEN_HEIGHT - 150
                 self.player.rect.x = self.player.x
@@ -814,100 +1207,450 @@ class Game:
                 if self.player.health <= 0:
                     self.state = GameState.GAME_OVER
 
-    # In the Game class, add this method:
-def render(self):
-    self.screen.fill(SKY_BLUE)
-    
-    if self.state == GameState.MENU:
-        self.render_menu()
-    elif self.state == GameState.STORY:
-        # Draw story text
-        story_text = [
-            "Once upon a time...",
-            "Press ENTER to continue..."
-        ]
-        y = 100
-        for line in story_text[self.story_phase : self.story_phase + 2]:
-            text = self.font.render(line, True, BLACK)
-            self.screen.blit(text, (SCREEN_WIDTH//2 - text.get_width()//2, y))
-            y += 40
-            
-    elif self.state in [GameState.FLYING_TUTORIAL, 
-                       GameState.PECKING_GAME,
-                       GameState.FLOWER_CHALLENGE,
-                       GameState.SNAKE_ENCOUNTER,
-                       GameState.NEST_BUILDING]:
-        # Draw game elements
-        for obstacle in self.obstacles:
-            pygame.draw.rect(self.screen, GREEN, obstacle)
-        
-        for obj in self.peckable_objects:
-            obj.draw(self.screen)
-            
-        for enemy in self.enemies:
-            enemy.draw(self.screen)
-            
-        for piece in self.nest_pieces:
-            piece.draw(self.screen)
-            
-        self.player.draw(self.screen)
-        
-        # Draw UI elements
-        health_text = self.font.render(f"Health: {self.player.health}", True, BLACK)
-        self.screen.blit(health_text, (10, 10))
-        
-    elif self.state == GameState.MAP:
-        self.world_map.draw(self.screen, self.player.unlocked_zones)
-        
-    elif self.state == GameState.DECISION:
-        # Draw decision background
-        self.screen.fill(SKY_BLUE)
-        prompt = self.font.render("Choose your path:", True, BLACK)
-        self.screen.blit(prompt, (SCREEN_WIDTH//2 - prompt.get_width()//2, 200))
+        elif self.state == GameState.ENDLESS_FLIGHT:
+            points, damage = self.flight.update(self.player, self.collisions)
+            self.score += points
+            if damage:
+                self.player.hurt(damage)
+            self.particles.update(1 / FPS)
+            self.animations.update(1 / FPS)
+            self.level_timer += 1 / FPS
+
+            # Falling out of the sky costs health and puts William back on a branch
+            if self.player.y > SCREEN_HEIGHT:
+                self.player.hurt(25)
+                self.flight.place_player(self.player)
+
+            if self.player.health <= 0:
+                self.state = GameState.GAME_OVER
+
+        # Wake the scheduled tasks that are due
+        self.timeline.advance(1 / FPS)
+
+        # A run ends on winning or losing
+        if self.run is not None and self.state in (GameState.WIN, GameState.GAME_OVER):
+            self.finish_run()
+        if self.leaderboard and not self.leaderboard_drawn:
+            # Redraw once the queries are answered
+            if all(pending.ready for pending in self.leaderboard.values()):
+                self.dirty = True
+
+        # Record this tick for rollback; the first tick of a level is its checkpoint
+        self.tick += 1
+        self.history.capture(self, self.tick)
+        if self.checkpoint_pending:
+            self.checkpoint.capture(self, self.tick)
+            self.checkpoint_pending = False
+
+    def start_run(self, mode):
+        # Every run starts with a fresh bird, whatever came before
+        self.score = 0
+        self.player.health = 100
+        self.player.feathers = 0
+        self.completed_levels.clear()
+        self.run = self.run_history.begin_run(mode)
+
+    def finish_run(self, outcome=None):
+        if outcome is None:
+            outcome = "win" if self.state == GameState.WIN else "game over"
+        self.run_history.end_run(
+            self.run, outcome, self.score, self.player.health, self.player.feathers
+        )
+        self.run = None
+        self.query_leaderboard()
+
+    def query_leaderboard(self):
+        # Answered by the history thread after the writes queued before them
+        self.leaderboard = {
+            "adventure": self.run_history.top_runs("adventure"),
+            "endless": self.run_history.top_runs("endless"),
+            "times": self.run_history.best_times(),
+        }
+        self.leaderboard_drawn = False
+
+    def diagnostics(self):
+        # What a hitch bundle records about the game
+        return {
+            "state": self.state.name,
+            "zone": self.current_zone,
+            "tick": self.tick,
+            "level_time": self.level_timer,
+            "enemies": len(self.enemies),
+            "active_enemies": sum(1 for enemy in self.enemies if enemy.active),
+            "peckable_objects": len(self.peckable_objects),
+            "nest_pieces": len(self.nest_pieces),
+            "obstacles": len(self.obstacles),
+            "buttons": len(self.buttons),
+            "particles": self.particles.count,
+            "timeline_tasks": self.timeline.pending(),
+            "draw_commands": self.render_queue.submitted,
+            "branches": len(self.flight.branches) if self.flight else 0,
+            "trunks": len(self.flight.trunks) if self.flight else 0,
+        }
+
+    def update_enemy(self, enemy, steps, coarse):
+        # Off-screen enemies head straight for the player instead of steering
+        heading = None if coarse or not self.flow_field else enemy.heading
+        enemy.update(self.player.x, heading, steps)
+
+    def rewind(self, ticks):
+        # Roll back to the oldest held tick if asked for more than the history holds
+        target = max(self.tick - ticks, self.history.oldest_tick)
+        if self.history.restore(self, target):
+            self.tick = target
+
+    def retry_from_checkpoint(self):
+        if self.checkpoint.restore(self, self.checkpoint.latest_tick):
+            self.tick = self.checkpoint.latest_tick
+            self.checkpoint_pending = False
+
+    def needs_render(self):
+        # Static screens are redrawn only when something on them changed
+        return (
+            self.dirty
+            or self.state not in STATIC_STATES
+            or self.state != self.rendered_state
+        )
+
+    def render(self):
+        self.dirty = False
+        self.rendered_state = self.state
+        queue = self.render_queue
+        queue.begin()
+        queue.fill(SKY_BLUE)
+
+        if self.state == GameState.MENU:
+            self.render_menu()
+        elif self.state == GameState.STORY:
+            # Draw story text
+            story_text = ["Once upon a time...", "Press ENTER to continue..."]
+            y = 100
+            for line in story_text[self.story_phase : self.story_phase + 2]:
+                queue.text(self.font, line, BLACK, (SCREEN_WIDTH // 2, y), "midtop")
+                y += 40
+
+        elif self.state in [
+            GameState.FLYING_TUTORIAL,
+            GameState.PECKING_GAME,
+            GameState.FLOWER_CHALLENGE,
+            GameState.SNAKE_ENCOUNTER,
+            GameState.NEST_BUILDING,
+        ]:
+            # Draw game elements; the queue orders them by layer
+            self.level_background.draw(queue, 0, BACKGROUND)
+            for obstacle in self.obstacles:
+                queue.rect(GREEN, obstacle, layer=TERRAIN)
+
+            for obj in self.peckable_objects:
+                obj.draw(queue)
+
+            for enemy in self.enemies:
+                enemy.draw(queue)
+
+            dragged = getattr(self, "dragging_piece", None)
+            for piece in self.nest_pieces:
+                # The piece being dragged stays on top of the rest
+                piece.draw(queue, 1 if piece is dragged else 0)
+
+            queue.particles(self.particles)
+
+            if self.partner:
+                self.partner.draw(queue)
+            self.player.draw(queue)
+
+            # Draw UI elements; only changed readouts are recomposed
+            self.hud.update(
+                health=self.player.health,
+                score=self.score,
+                feathers=self.player.feathers,
+                time=self.level_timer,
+            )
+            self.hud.draw(queue, HUD)
+
+        elif self.state == GameState.ENDLESS_FLIGHT:
+            self.flight.draw(queue, BACKGROUND, TERRAIN)
+            queue.particles(self.particles)
+            self.player.draw(queue)
+            self.hud.update(
+                health=self.player.health,
+                score=self.score,
+                feathers=self.player.feathers,
+                time=self.level_timer,
+            )
+            self.hud.draw(queue, HUD)
+
+        elif self.state == GameState.MAP:
+            self.world_map.draw(queue, self.player.unlocked_zones)
+
+        elif self.state == GameState.GAME_OVER:
+            self.render_leaderboard("Game Over")
+
+        elif self.state == GameState.WIN:
+            self.render_leaderboard("William built his nest!")
+
+        elif self.state == GameState.LEADERBOARD:
+            self.render_leaderboard("Leaderboard")
+
+        elif self.state == GameState.DECISION:
+            queue.text(
+                self.font,
+                "Choose your path:",
+                BLACK,
+                (SCREEN_WIDTH // 2, 200),
+                "midtop",
+            )
+
+        # Draw buttons for any state that has them
         for button in self.buttons:
-            button.draw(self.screen)
-            
-    # Draw buttons for any state that has them
-    for button in self.buttons:
-        button.draw(self.screen)
-        
-    pygame.display.flip()
+            button.draw(queue)
+
+        queue.flush(self.canvas)
+        # Upscale to the window if needed, then flip
+        self.canvas.present()
 
     def render_menu(self):
-        # Draw menu background
-        self.screen.fill(SKY_BLUE)
+        queue = self.render_queue
 
         # Draw title
-        title_font = pygame.font.SysFont("Arial", 48)
-        title = title_font.render("William's Wild Adventure", True, BLACK)
-        self.screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 100))
-
-        # draw menu buttons
-        for button in self.buttons:
-            button.draw(self.screen)
+        queue.text(
+            self.title_font,
+            "William's Wild Adventure",
+            BLACK,
+            (SCREEN_WIDTH // 2, 100),
+            "midtop",
+        )
 
         # small footer hint
-        footer_font = pygame.font.SysFont("Arial", 18)
-        hint = footer_font.render("Press ESC to quit", True, BLACK)
-        self.screen.blit(
-            hint, (SCREEN_WIDTH // 2 - hint.get_width() // 2, SCREEN_HEIGHT - 40)
+        queue.text(
+            self.small_font,
+            "Press ESC to quit",
+            BLACK,
+            (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 40),
+            "midtop",
         )
 
+    def render_leaderboard(self, title):
+        queue = self.render_queue
+        queue.text(self.title_font, title, BLACK, (SCREEN_WIDTH // 2, 60), "midtop")
+        queue.text(
+            self.small_font,
+            "Press ENTER to continue",
+            BLACK,
+            (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 40),
+            "midtop",
+        )
+        if not self.leaderboard:
+            return
+        if not all(pending.ready for pending in self.leaderboard.values()):
+            queue.text(
+                self.font, "Loading...", BLACK, (SCREEN_WIDTH // 2, 200), "midtop"
+            )
+            return
+        self.leaderboard_drawn = True
+
+        columns = [
+            ("Adventure", SCREEN_WIDTH // 6, self.leaderboard["adventure"].rows),
+            ("Endless Flight", SCREEN_WIDTH // 2, self.leaderboard["endless"].rows),
+        ]
+        for heading, x, rows in columns:
+            queue.text(self.font, heading, BLACK, (x, 150), "midtop")
+            lines = [
+                f"{i}. {score} pts, {seconds:.0f} s, {outcome}"
+                for i, (score, outcome, seconds, _) in enumerate(rows, 1)
+            ]
+            for i, line in enumerate(lines or ["No runs yet"]):
+                queue.text(self.small_font, line, BLACK, (x, 190 + i * 26), "midtop")
+
+        x = SCREEN_WIDTH * 5 // 6
+        queue.text(self.font, "Best Times", BLACK, (x, 150), "midtop")
+        rows = self.leaderboard["times"].rows
+        lines = [f"{level}: {seconds:.1f} s" for level, seconds in rows]
+        for i, line in enumerate(lines or ["No levels yet"]):
+            queue.text(self.small_font, line, BLACK, (x, 190 + i * 26), "midtop")
+
     # ──────────────────────────────────────────────────────────────
     #  SMALL DRIVER SO THE GAME ACTUALLY RUNS
     # ──────────────────────────────────────────────────────────────
 
 
-def main() -> None:
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="William's Wild Adventure")
+    parser.add_argument(
+        "--endless", action="store_true", help="start straight in endless flight"
+    )
+    parser.add_argument(
+        "--history",
+        metavar="PATH",
+        default=HISTORY_PATH,
+        help="run history database (default: next to the game)",
+    )
+    parser.add_argument(
+        "--latency-stats", action="store_true", help="report input-to-photon latency"
+    )
+    parser.add_argument(
+        "--alloc-stats", action="store_true", help="report per-frame allocations"
+    )
+    parser.add_argument(
+        "--collision-stats", action="store_true", help="report collision tests"
+    )
+    parser.add_argument(
+        "--no-idle", action="store_true", help="redraw static screens every frame"
+    )
+    parser.add_argument(
+        "--render-stats", action="store_true", help="report draw commands per frame"
+    )
+    parser.add_argument(
+        "--cpu-stats", action="store_true", help="report CPU use and frames drawn"
+    )
+    parser.add_argument(
+        "--timeline-stats", action="store_true", help="report scheduled task wake-ups"
+    )
+    parser.add_argument(
+        "--ai-stats", action="store_true", help="report enemy AI updates per tick"
+    )
+    # Any --hitch-* option turns on the hitch detector
+    parser.add_argument(
+        "--hitch-threshold",
+        type=float,
+        metavar="MS",
+        help="frames longer than this are hitches "
+        f"(default: {HITCH_THRESHOLD * 1000:.0f})",
+    )
+    parser.add_argument(
+        "--hitch-dir",
+        help=f"where hitch diagnostic bundles are written (default: {HITCH_DIR})",
+    )
+    parser.add_argument(
+        "--hitch-stats", action="store_true", help="report hitches at exit"
+    )
+    parser.add_argument(
+        "--history-stats",
+        action="store_true",
+        help="report run history writes and transactions",
+    )
+    parser.add_argument("--capture", metavar="DIR", help="record frames to DIR")
+    parser.add_argument(
+        "--capture-format", choices=["png", "raw"], default="png", help="frame format"
+    )
+    parser.add_argument(
+        "--render-scale",
+        type=float,
+        default=1.0,
+        help="internal resolution as a fraction of 800x600 (F9/F10 in game)",
+    )
+    parser.add_argument(
+        "--smooth", action="store_true", help="smooth rather than nearest upscaling"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="surface",
+        help="draw with pygame Surfaces or an SDL2 Renderer",
+    )
+    parser.add_argument(
+        "--window",
+        metavar="WxH",
+        type=lambda size: tuple(int(n) for n in size.lower().split("x")),
+        help="window size, if different from 800x600",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
     """Launch the game."""
-    game = Game()
+    args = parse_args(argv)
+    game = Game(args.render_scale, args.smooth, args.window, args.backend, args.history)
+    if args.endless:
+        game.buttons.clear()
+        game.state = GameState.ENDLESS_FLIGHT
+        game.init_level()
+    inputs = InputPipeline(FPS)
+    cpu = CpuStats()
+    quiet_frames = 0
+
+    allocations = None
+    if args.alloc_stats:
+        allocations = AllocationTracker()
+        allocations.start()
+
+    capture = None
+    if args.capture:
+        capture = FrameCapture(args.capture, args.capture_format, FPS)
+        game.canvas.keep_frames = True
+
+    # Long frames get a diagnostic bundle written to the hitch directory
+    hitches = None
+    threshold = args.hitch_threshold
+    if args.hitch_stats or args.hitch_dir or threshold is not None:
+        if threshold is None:
+            threshold = HITCH_THRESHOLD * 1000
+        hitches = HitchDetector(
+            args.hitch_dir or HITCH_DIR, threshold / 1000, context=game.diagnostics
+        )
+        hitches.start()
+
     while game.running:
-        game.handle_events()
+        if hitches:
+            hitches.begin_frame()
+        if allocations:
+            allocations.begin_frame()
+        game.collisions.begin_frame()
+        game.handle_events(inputs.take())
+        if hitches:
+            hitches.mark("events")
         game.handle_input()
         game.update()
-        game.render()  # Use the new render method
-        game.clock.tick(FPS)
-
+        if hitches:
+            hitches.mark("update")
+        rendered = args.no_idle or game.needs_render()
+        if rendered:
+            game.render()
+            inputs.presented()
+            if capture:
+                capture.capture(game.canvas.frame())
+            quiet_frames = 0
+        else:
+            quiet_frames += 1
+        if hitches:
+            hitches.mark("render")
+            hitches.waiting()
+        if allocations:
+            allocations.end_frame()
+        # Wait out the frame while stamping events as they arrive; on an
+        # unchanged static screen, sleep until input instead
+        idle = quiet_frames >= IDLE_AFTER
+        cpu.frame(rendered, idle)
+        inputs.wait_for_next_frame(idle)
+        game.clock.tick()
+        if hitches:
+            hitches.mark("wait")
+            hitches.end_frame(idle)
+
+    if args.latency_stats:
+        print(inputs.latency.summary())
+    if allocations:
+        print(allocations.summary())
+    if args.render_stats:
+        print(game.render_queue.summary())
+    if args.cpu_stats:
+        print(cpu.summary())
+    if args.collision_stats:
+        print(game.collisions.summary())
+    if args.timeline_stats:
+        print(game.timeline.summary())
+    if args.ai_stats:
+        print(game.ai.summary())
+    if hitches:
+        hitches.stop()
+        if args.hitch_stats:
+            print(hitches.summary())
+    # Write out the runs still queued before exiting
+    game.run_history.close()
+    if args.history_stats:
+        print(game.run_history.summary())
+    if capture:
+        capture.close()
+        print(capture.summary())
     pygame.quit()
     sys.exit()
 
@@ -0,0 +1,316 @@
+"""Gym-style vectorized environments over headless Game instances.
+
+``VecEnv`` steps N games in lockstep and returns batched NumPy arrays.  The
+per-game work is just applying the action and ``Game.update()``; building
+observations (nearest obstacles, enemy offsets), rewards and done flags
+happens once for the whole batch with array operations.  ``SubprocVecEnv``
+splits the games across worker processes to use more cores.
+
+Actions are the input bit masks from net.py (``INPUT_LEFT | INPUT_FLY``...),
+so there are 32 discrete actions.  Pass ``pixels={"size": (84, 84), ...}``
+for pixel observations from pixel_obs.py instead of feature vectors.
+"""
+
+import multiprocessing
+import os
+import random
+import time
+
+import numpy as np
+import pygame
+
+from claude_game_DS import SCREEN_HEIGHT, SCREEN_WIDTH, Game, GameState
+from net import apply_input
+from pixel_obs import PixelObservation
+
+NUM_ACTIONS = 32
+NEAREST_OBSTACLES = 3
+NEAREST_ENEMIES = 2
+MAX_OBSTACLES = 16
+MAX_ENEMIES = 16
+MAX_STEPS = 60 * 60  # one minute of game time
+
+# player x, y, vx, vy, health; then dx, dy, w, h per obstacle; dx, dy per enemy
+OBS_SIZE = 5 + 4 * NEAREST_OBSTACLES + 2 * NEAREST_ENEMIES
+
+# Reward weights
+SCORE_REWARD = 1.0
+HEALTH_REWARD = 0.5
+
+ENDED_STATES = (GameState.GAME_OVER, GameState.WIN)
+SCALE = np.array([SCREEN_WIDTH, SCREEN_HEIGHT], np.float32)
+FAR_AWAY = 10.0  # in screen sizes, for padding missing obstacles/enemies
+
+
+class VecEnv:
+    def __init__(
+        self, num_envs, level="FLYING_TUTORIAL", max_steps=MAX_STEPS, pixels=None
+    ):
+        self.num_envs = num_envs
+        self.level = GameState[level]
+        self.level_name = {
+            GameState.FLYING_TUTORIAL: "Flying Tutorial",
+            GameState.PECKING_GAME: "Pecking Game",
+            GameState.FLOWER_CHALLENGE: "Flower Challenge",
+            GameState.SNAKE_ENCOUNTER: "Snake Encounter",
+            GameState.NEST_BUILDING: "Nest Building",
+        }[self.level]
+        self.max_steps = max_steps
+        self.games = [Game() for _ in range(num_envs)]
+
+        # Preallocated batch buffers
+        self.features = np.zeros((num_envs, OBS_SIZE), np.float32)
+        self.renderers = None
+        if pixels:
+            self.renderers = [PixelObservation(**pixels) for _ in range(num_envs)]
+            frame = self.renderers[0].reset(self.games[0])
+            self.obs = np.zeros((num_envs,) + frame.shape, np.uint8)
+        else:
+            self.obs = self.features
+        self.rewards = np.zeros(num_envs, np.float32)
+        self.dones = np.zeros(num_envs, bool)
+        self.steps = np.zeros(num_envs, np.int64)
+
+        # Player x, y, vx, vy, health, score gathered from the games each step
+        self.players = np.zeros((num_envs, 6), np.float32)
+        self.previous = np.zeros((num_envs, 6), np.float32)
+
+        # Obstacles are static within a level: copied once per reset
+        self.obstacles = np.full((num_envs, MAX_OBSTACLES, 4), FAR_AWAY, np.float32)
+        self.enemies = np.full((num_envs, MAX_ENEMIES, 2), FAR_AWAY, np.float32)
+
+    def reset(self, seed=None):
+        if seed is not None:
+            random.seed(seed)
+        for i in range(self.num_envs):
+            self._reset_game(i)
+        self._gather()
+        self.previous[:] = self.players
+        self._observe()
+        if self.renderers:
+            for i, (game, renderer) in enumerate(zip(self.games, self.renderers)):
+                self.obs[i] = renderer.reset(game)
+        return self.obs.copy()
+
+    def _reset_game(self, i):
+        game = self.games[i]
+        game.completed_levels.clear()
+        game.score = 0
+        player = game.player
+        player.health = 100
+        player.velocity_x = player.velocity_y = 0
+        player.jumping = player.flying = False
+        game.state = self.level
+        game.init_level()
+        self.steps[i] = 0
+
+        rects = np.array(
+            [(r.x, r.y, r.width, r.height) for r in game.obstacles[:MAX_OBSTACLES]],
+            np.float32,
+        ).reshape(-1, 4)
+        self.obstacles[i] = FAR_AWAY
+        self.obstacles[i, : len(rects), :2] = rects[:, :2] / SCALE
+        self.obstacles[i, : len(rects), 2:] = rects[:, 2:] / SCALE
+
+    def _gather(self):
+        # The only per-game Python work besides update(): read a few fields
+        players = self.players
+        enemies = self.enemies
+        # Pad in pixels so one division rescales real and missing enemies alike
+        enemies[:] = FAR_AWAY * SCALE
+        for i, game in enumerate(self.games):
+            player = game.player
+            players[i] = (
+                player.rect.centerx,
+                player.rect.centery,
+                player.velocity_x,
+                player.velocity_y,
+                player.health,
+                game.score,
+            )
+            for j, enemy in enumerate(game.enemies[:MAX_ENEMIES]):
+                enemies[i, j] = enemy.rect.center
+        enemies /= SCALE
+
+    def _observe(self):
+        obs = self.features
+        position = self.players[:, :2] / SCALE
+        obs[:, 0:2] = position
+        obs[:, 2:4] = self.players[:, 2:4] / 10.0
+        obs[:, 4] = self.players[:, 4] / 100.0
+
+        # Nearest obstacles by distance from the player to each rect's centre
+        centres = self.obstacles[:, :, :2] + self.obstacles[:, :, 2:] / 2
+        offsets = centres - position[:, np.newaxis]
+        order = np.argsort((offsets**2).sum(axis=2), axis=1)[:, :NEAREST_OBSTACLES]
+        nearest = np.take_along_axis(offsets, order[:, :, np.newaxis], axis=1)
+        sizes = np.take_along_axis(
+            self.obstacles[:, :, 2:], order[:, :, np.newaxis], axis=1
+        )
+        block = np.concatenate([nearest, sizes], axis=2)
+        obs[:, 5 : 5 + 4 * NEAREST_OBSTACLES] = block.reshape(self.num_envs, -1)
+
+        # Nearest enemies
+        offsets = self.enemies - position[:, np.newaxis]
+        order = np.argsort((offsets**2).sum(axis=2), axis=1)[:, :NEAREST_ENEMIES]
+        nearest = np.take_along_axis(offsets, order[:, :, np.newaxis], axis=1)
+        obs[:, 5 + 4 * NEAREST_OBSTACLES :] = nearest.reshape(self.num_envs, -1)
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        for game, bits in zip(self.games, actions.tolist()):
+            apply_input(game, game.player, bits)
+            game.update()
+        self.steps += 1
+
+        self._gather()
+        delta = self.players - self.previous
+        self.rewards[:] = SCORE_REWARD * delta[:, 5] + HEALTH_REWARD * delta[:, 4]
+        self.previous[:] = self.players
+        self._observe()
+        if self.renderers:
+            for i, (game, renderer) in enumerate(zip(self.games, self.renderers)):
+                self.obs[i] = renderer.observe(game)
+
+        dones = self.dones
+        dones[:] = self.steps >= self.max_steps
+        infos = [{} for _ in range(self.num_envs)]
+        for i, game in enumerate(self.games):
+            if (
+                game.state != self.level
+                or game.state in ENDED_STATES
+                or self.level_name in game.completed_levels
+            ):
+                dones[i] = True
+
+        # Auto-reset finished games, handing back their last observation
+        if dones.any():
+            for i in np.flatnonzero(dones).tolist():
+                infos[i]["terminal_observation"] = self.obs[i].copy()
+                infos[i]["completed"] = (
+                    self.level_name in self.games[i].completed_levels
+                )
+                self._reset_game(i)
+                if self.renderers:
+                    self.obs[i] = self.renderers[i].reset(self.games[i])
+            self._gather()
+            self.previous[:] = self.players
+            self._observe()
+
+        return self.obs.copy(), self.rewards.copy(), dones.copy(), infos
+
+    def close(self):
+        for game in self.games:
+            game.run_history.close()
+        self.games.clear()
+
+
+def _worker(connection, num_envs, level, max_steps):
+    # Workers never open a window.  SDL chose its video driver when this
+    # process imported the game, so restart the display on the dummy one.
+    if "SDL_VIDEODRIVER" not in os.environ:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        pygame.display.quit()
+        pygame.display.init()
+    env = VecEnv(num_envs, level, max_steps)
+    while True:
+        command, data = connection.recv()
+        if command == "step":
+            connection.send(env.step(data))
+        elif command == "reset":
+            connection.send(env.reset(data))
+        elif command == "close":
+            env.close()
+            connection.close()
+            break
+
+
+class SubprocVecEnv:
+    """Same interface as VecEnv, with the games split across processes."""
+
+    def __init__(
+        self, num_envs, level="FLYING_TUTORIAL", workers=None, max_steps=MAX_STEPS
+    ):
+        workers = min(workers or os.cpu_count() or 1, num_envs)
+        self.num_envs = num_envs
+        self.chunks = [len(c) for c in np.array_split(np.arange(num_envs), workers)]
+        # Spawn rather than fork: SDL state shouldn't be inherited
+        context = multiprocessing.get_context("spawn")
+        self.connections = []
+        self.processes = []
+        for size in self.chunks:
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_worker, args=(child, size, level, max_steps), daemon=True
+            )
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+
+    def reset(self, seed=None):
+        for i, connection in enumerate(self.connections):
+            connection.send(("reset", None if seed is None else seed + i))
+        return np.concatenate([connection.recv() for connection in self.connections])
+
+    def step(self, actions):
+        start = 0
+        for connection, size in zip(self.connections, self.chunks):
+            connection.send(("step", actions[start : start + size]))
+            start += size
+        results = [connection.recv() for connection in self.connections]
+        obs, rewards, dones, infos = zip(*results)
+        return (
+            np.concatenate(obs),
+            np.concatenate(rewards),
+            np.concatenate(dones),
+            [info for chunk in infos for info in chunk],
+        )
+
+    def close(self):
+        for connection in self.connections:
+            connection.send(("close", None))
+        for process in self.processes:
+            process.join()
+
+
+def pixel_benchmark(num_envs=16, steps=300):
+    for pixels in (
+        {"size": (84, 84)},
+        {"size": (84, 84), "grayscale": True, "stack": 4},
+        {"size": (160, 120), "grayscale": True, "stack": 4},
+    ):
+        env = VecEnv(num_envs, "SNAKE_ENCOUNTER", pixels=pixels)
+        obs = env.reset(seed=0)
+        rng = np.random.default_rng(0)
+        start = time.perf_counter()
+        for _ in range(steps):
+            env.step(rng.integers(0, NUM_ACTIONS, num_envs))
+        elapsed = time.perf_counter() - start
+        print(
+            f"pixels {pixels}: obs {obs.shape}, {num_envs * steps / elapsed:.0f} env steps/s"
+        )
+
+
+def benchmark(num_envs=32, steps=600):
+    for name, make in (("in-process", VecEnv), ("subprocess", SubprocVecEnv)):
+        for level in ("FLYING_TUTORIAL", "SNAKE_ENCOUNTER"):
+            env = make(num_envs, level)
+            env.reset(seed=0)
+            rng = np.random.default_rng(0)
+            start = time.perf_counter()
+            episodes = 0
+            for _ in range(steps):
+                _, _, dones, _ = env.step(rng.integers(0, NUM_ACTIONS, num_envs))
+                episodes += int(dones.sum())
+            elapsed = time.perf_counter() - start
+            env.close()
+            print(
+                f"{name} {level}: {num_envs * steps / elapsed:.0f} env steps/s "
+                f"({episodes} episodes)"
+            )
+
+
+if __name__ == "__main__":
+    benchmark()
+    pixel_benchmark()
@@ -0,0 +1,230 @@
+"""Endless flight: the flight practice as an endless mode of the main game.
+
+The world scrolls left under the woodpecker.  Branches to perch on and
+hanging trunks to dodge stream in from the right; both are rects from fixed
+pools, filled once when the mode starts and recycled as soon as they scroll
+off the left edge, so a run of any length allocates nothing new.  The
+backdrop is a parallax background (see parallax.py): the forest picture
+baked next to its mirror image so the seams match, with a row of bushes
+scrolling faster in front of it.
+
+Landing on a branch earns a perch bonus; flying into a trunk hurts.
+"""
+
+import os
+import random
+import time
+
+import pygame
+
+from assets import asset_exists, load_scaled
+from parallax import ParallaxBackground, hills_layer, mirrored_layer, sky_layer
+from pool import rect_pool
+
+BRANCHES = 6
+TRUNKS = 4
+BRANCH_SIZE = (200, 40)
+TRUNK_WIDTH = 40
+# Horizontal gap between branches, in pixels
+BRANCH_GAP = (120, 260)
+TRUNK_CHANCE = 0.35
+# Scroll speed in pixels per tick, ramping up with distance
+BASE_SPEED = 3.0
+MAX_SPEED = 7.0
+SPEED_RAMP = 0.00005
+PERCH_BONUS = 10
+TRUNK_DAMAGE = 20
+
+BRANCH_COLOR = (139, 69, 19)
+BARK_COLOR = (92, 51, 23)
+BUSH_COLOR = (38, 84, 44)
+TRUNK_COLOR = (101, 67, 33)
+
+
+class EndlessFlight:
+    def __init__(self, width, height, rng=random):
+        self.width = width
+        self.height = height
+        self.rng = rng
+
+        layers = []
+        if asset_exists("background_forest.png"):
+            forest = load_scaled("background_forest.png", (width, height))
+            layers.append((mirrored_layer(forest), 0.5, 0))
+        else:
+            layers.append((sky_layer((width, height)), 0, 0))
+        layers.append(
+            (hills_layer(width, 90, BUSH_COLOR, waves=5, seed=4), 0.8, height - 70)
+        )
+        self.background = ParallaxBackground((width, height), layers)
+
+        # Fixed pools: every rect the mode will ever use is made up front
+        self.branch_pool = rect_pool()
+        self.trunk_pool = rect_pool()
+        self.branch_pool.free = [
+            pygame.Rect(0, 0, *BRANCH_SIZE) for _ in range(BRANCHES)
+        ]
+        self.trunk_pool.free = [
+            pygame.Rect(0, 0, TRUNK_WIDTH, 1) for _ in range(TRUNKS)
+        ]
+        self.branches = []
+        self.trunks = []
+        # Branches already perched on this run
+        self.perched = set()
+        self.reset()
+
+    def reset(self):
+        self.branch_pool.release_all(self.branches)
+        self.trunk_pool.release_all(self.trunks)
+        self.perched.clear()
+        self.distance = 0.0
+        self.scroll = 0.0
+        self.speed = BASE_SPEED
+        self.next_gap = 0
+        # A first branch to start from
+        self._spawn_branch(60, self.height - 200)
+
+    def place_player(self, player):
+        # On the first branch fully on screen
+        branch = next((b for b in self.branches if b.left >= 0), self.branches[0])
+        player.x = player.rect.x = branch.x + 40
+        player.y = player.rect.y = branch.top - player.rect.height
+        player.velocity_y = 0
+
+    def _spawn_branch(self, x, y):
+        if not self.branch_pool.free:
+            return None
+        branch = self.branch_pool.acquire(x, y, *BRANCH_SIZE)
+        self.branches.append(branch)
+        self.next_gap = self.rng.randint(*BRANCH_GAP)
+        return branch
+
+    def _spawn(self):
+        # Stream in a new branch once the last one has fully entered
+        last = self.branches[-1] if self.branches else None
+        if last is not None and last.right + self.next_gap > self.width:
+            return
+        x = self.width if last is None else last.right + self.next_gap
+        y = self.rng.randint(self.height // 3, self.height - 120)
+        if self._spawn_branch(x, y) is None:
+            return
+        if self.trunk_pool.free and self.rng.random() < TRUNK_CHANCE:
+            # Hanging over the gap before the branch, leaving room to fly under
+            bottom = self.rng.randint(80, max(80, y - 120))
+            trunk = self.trunk_pool.acquire(
+                x - self.next_gap // 2 - TRUNK_WIDTH // 2, 0, TRUNK_WIDTH, bottom
+            )
+            self.trunks.append(trunk)
+
+    def _scroll(self, objects, pool, dx):
+        # Move left and recycle whatever has left the screen
+        for rect in objects:
+            rect.x -= dx
+        while objects and objects[0].right < 0:
+            gone = objects.pop(0)
+            self.perched.discard(id(gone))
+            pool.release(gone)
+
+    def update(self, player, stats=None):
+        """Advance one tick; returns (points scored, damage taken)."""
+        self.speed = min(MAX_SPEED, BASE_SPEED + self.distance * SPEED_RAMP)
+        # Whole pixels, carrying the fraction so speed stays exact
+        self.scroll += self.speed
+        dx = int(self.scroll)
+        self.scroll -= dx
+        self.distance += dx
+
+        self._scroll(self.branches, self.branch_pool, dx)
+        self._scroll(self.trunks, self.trunk_pool, dx)
+        self._spawn()
+
+        # Branches carry a perched bird along
+        if not player.jumping and not player.flying:
+            for branch in self.branches:
+                if player.rect.bottom == branch.top and (
+                    branch.left < player.rect.right and player.rect.left < branch.right
+                ):
+                    player.x -= dx
+                    player.rect.x = player.x
+                    break
+
+        player.update(self.branches, stats)
+        player.x = player.rect.x = max(
+            0, min(player.rect.x, self.width - player.rect.width)
+        )
+
+        points = 0
+        for branch in self.branches:
+            if player.rect.bottom == branch.top and id(branch) not in self.perched:
+                if branch.left < player.rect.right and player.rect.left < branch.right:
+                    self.perched.add(id(branch))
+                    points += PERCH_BONUS
+
+        damage = 0
+        for trunk in self.trunks:
+            if player.rect.colliderect(trunk):
+                damage += TRUNK_DAMAGE
+                # Each trunk hurts once; it is out of the way after that
+                trunk.y = -trunk.height
+        return points, damage
+
+    def draw(self, queue, background, terrain):
+        self.background.draw(queue, int(self.distance), background)
+
+        for branch in self.branches:
+            queue.rect(BRANCH_COLOR, branch, layer=terrain)
+            queue.rect(BARK_COLOR, branch, 3, layer=terrain, key=1)
+        for trunk in self.trunks:
+            queue.rect(TRUNK_COLOR, trunk, layer=terrain)
+
+
+def benchmark(ticks=60 * 60 * 10, render_every=10):
+    """Soak test: a long autopiloted run must hold memory and work steady."""
+    import tracemalloc
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from claude_game_DS import Game, GameState
+
+    game = Game()
+    game.state = GameState.ENDLESS_FLIGHT
+    game.init_level()
+    flight = game.flight
+    pools = (flight.branch_pool, flight.trunk_pool)
+
+    tracemalloc.start()
+    window = ticks // 10
+    start = time.perf_counter()
+    baseline = None
+    print(f"{ticks} ticks ({ticks / 60 / 60:.0f} minutes of flight)")
+    for tick in range(1, ticks + 1):
+        # Autopilot: flap whenever below the middle of the screen
+        player = game.player
+        player.health = 100
+        if player.rect.centery > flight.height // 2:
+            if player.jumping:
+                player.fly()
+            else:
+                player.jump()
+        game.update()
+        if tick % render_every == 0:
+            game.render()
+        if tick % window == 0:
+            elapsed = time.perf_counter() - start
+            memory = tracemalloc.get_traced_memory()[0]
+            if baseline is None:
+                baseline = memory
+            print(
+                f"  tick {tick}: {elapsed / window * 1e6:.0f} us per tick, "
+                f"{memory - baseline:+d} B traced, "
+                f"{len(flight.branches)} branches, {len(flight.trunks)} trunks, "
+                f"{flight.distance / 1000:.0f}k px flown"
+            )
+            start = time.perf_counter()
+    tracemalloc.stop()
+    created = sum(pool.created for pool in pools)
+    reused = sum(pool.reused for pool in pools)
+    print(f"pools: {created} rects created while flying, {reused} reused")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,242 @@
+"""Run history and leaderboard in a local SQLite database.
+
+Every run (an adventure or an endless flight) gets a row when it ends, and
+every completed level a row when it is completed, with its time, score and
+health.  The frame loop never touches the database: ``RunHistory`` queues
+writes and queries for a background thread that owns the connection.  The
+thread drains whatever has queued up and writes it in one transaction, in
+WAL mode so readers are never blocked by the writer.  Statements are fixed
+SQL strings, so sqlite3's statement cache keeps them prepared.
+
+Queries return a ``Pending`` whose ``rows`` are filled in by the thread;
+screens poll ``ready`` and draw whatever has arrived.
+
+A ``RunHistory`` with no path records nothing and starts no thread, for
+headless games (environments, benchmarks) that shouldn't touch the
+player's leaderboard.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+HISTORY_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "run_history.db"
+)
+# Most queued operations written per transaction
+BATCH = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    mode TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    started REAL NOT NULL,
+    seconds REAL NOT NULL,
+    score INTEGER NOT NULL,
+    health INTEGER NOT NULL,
+    feathers INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS levels (
+    run_id TEXT NOT NULL,
+    level TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    score INTEGER NOT NULL,
+    health INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_score ON runs (mode, score DESC);
+CREATE INDEX IF NOT EXISTS levels_by_time ON levels (level, seconds);
+"""
+
+INSERT_RUN = "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+INSERT_LEVEL = "INSERT INTO levels VALUES (?, ?, ?, ?, ?)"
+TOP_RUNS = (
+    "SELECT score, outcome, seconds, health FROM runs "
+    "WHERE mode = ? ORDER BY score DESC LIMIT ?"
+)
+BEST_TIMES = (
+    "SELECT level, MIN(seconds) FROM levels GROUP BY level ORDER BY MIN(seconds)"
+)
+
+
+class Pending:
+    """A query's result, filled in by the writer thread."""
+
+    def __init__(self):
+        self.rows = None
+        self.error = None
+        self.event = threading.Event()
+
+    @property
+    def ready(self):
+        return self.event.is_set()
+
+
+class Run:
+    def __init__(self, mode):
+        self.id = uuid.uuid4().hex
+        self.mode = mode
+        self.started = time.time()
+        self.start_clock = time.perf_counter()
+
+
+class RunHistory:
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        self.queue = queue.Queue()
+        self.writes = 0
+        self.transactions = 0
+        # Set if the database can't be opened; the history then drops writes
+        self.error = None
+        self.thread = None
+        if path is not None:
+            self.thread = threading.Thread(
+                target=self._run, name="run-history", daemon=True
+            )
+            self.thread.start()
+
+    # Frame-loop side: these only queue work
+
+    def begin_run(self, mode):
+        return Run(mode)
+
+    def record_level(self, run, level, seconds, score, health):
+        if self.thread is None:
+            return
+        self.queue.put((INSERT_LEVEL, (run.id, level, seconds, score, health)))
+
+    def end_run(self, run, outcome, score, health, feathers):
+        if self.thread is None:
+            return
+        seconds = time.perf_counter() - run.start_clock
+        row = (run.id, run.mode, outcome, run.started, seconds, score, health, feathers)
+        self.queue.put((INSERT_RUN, row))
+
+    def top_runs(self, mode, limit=5):
+        return self._query(TOP_RUNS, (mode, limit))
+
+    def best_times(self):
+        return self._query(BEST_TIMES, ())
+
+    def _query(self, sql, params):
+        pending = Pending()
+        if self.thread is None:
+            pending.rows = []
+            pending.event.set()
+            return pending
+        self.queue.put((sql, params, pending))
+        return pending
+
+    def close(self):
+        if self.thread is None or not self.thread.is_alive():
+            return
+        # Write out whatever is still queued
+        self.queue.put(None)
+        self.thread.join()
+
+    # Writer thread
+
+    def _run(self):
+        try:
+            connection = sqlite3.connect(self.path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+        except sqlite3.Error as error:
+            self.error = error
+            connection = None
+        closing = False
+        while not closing:
+            batch = [self.queue.get()]
+            while len(batch) < BATCH:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                closing = True
+                batch = [item for item in batch if item is not None]
+            self._write(connection, batch)
+        if connection is not None:
+            connection.close()
+
+    def _write(self, connection, batch):
+        # Writes in one transaction; queries run in order after the writes
+        # queued before them, so they see them
+        writes = []
+        for item in batch:
+            if len(item) == 2:
+                writes.append(item)
+                continue
+            self._commit(connection, writes)
+            writes = []
+            sql, params, pending = item
+            try:
+                if connection is None:
+                    raise self.error
+                pending.rows = connection.execute(sql, params).fetchall()
+            except sqlite3.Error as error:
+                pending.error = error
+                pending.rows = []
+            pending.event.set()
+        self._commit(connection, writes)
+
+    def _commit(self, connection, writes):
+        if not writes or connection is None:
+            return
+        with connection:
+            for sql, params in writes:
+                connection.execute(sql, params)
+        self.writes += len(writes)
+        self.transactions += 1
+
+    def summary(self):
+        return (
+            f"run history: {self.writes} rows written in "
+            f"{self.transactions} transactions"
+        )
+
+
+def benchmark(levels=5000):
+    """Time on the frame thread per record: queued versus written directly."""
+    import tempfile
+
+    directory = tempfile.mkdtemp()
+    direct = sqlite3.connect(os.path.join(directory, "direct.db"))
+    direct.execute("PRAGMA journal_mode=WAL")
+    direct.executescript(SCHEMA)
+    start = time.perf_counter()
+    for i in range(levels):
+        with direct:
+            direct.execute(INSERT_LEVEL, ("run", f"level {i % 5}", i / 100, i, 100))
+    synchronous = (time.perf_counter() - start) / levels
+    direct.close()
+
+    history = RunHistory(os.path.join(directory, "queued.db"))
+    run = history.begin_run("benchmark")
+    start = time.perf_counter()
+    for i in range(levels):
+        history.record_level(run, f"level {i % 5}", i / 100, i, 100)
+    queued = (time.perf_counter() - start) / levels
+    for i in range(levels // 10):
+        history.end_run(history.begin_run("benchmark"), "win", i, 100, 0)
+    start = time.perf_counter()
+    top = history.top_runs("benchmark", 10)
+    top.event.wait()
+    query = time.perf_counter() - start
+    history.close()
+
+    print(f"{levels} level records")
+    print(f"  committed on the frame thread: {synchronous * 1e6:.1f} us each")
+    print(f"  queued for the writer thread:  {queued * 1e6:.1f} us each")
+    print(f"  {history.summary()}")
+    print(
+        f"top 10 of {levels // 10} runs after the queue drained: {query * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    benchmark()
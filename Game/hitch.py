@@ -0,0 +1,272 @@
+"""Hitch detection with automatic diagnostic capture.
+
+The main loop marks the end of each phase of a frame (events, update,
+render, wait).  A frame that takes longer than the threshold is a hitch,
+and the detector captures a bundle for it: the game's state and entity
+counts, the phase timings of the last few frames, the garbage collections
+that ran during the frame, and stack samples of the main thread.
+
+The stack samples come from a sampler thread that wakes every half
+threshold and, if the current frame has run at least that long, samples
+the main thread's stack with ``sys._current_frames``, so it sees what the
+frame was doing while it was slow.  The main thread only stores a start
+time and a flag per frame; it never wakes the sampler.  Sampling stops once
+the loop starts waiting for the next frame (``waiting``), so an idle wait
+for input isn't sampled.  A stall in C code that holds the GIL is only
+sampled once the GIL is released.
+
+Bundles are JSON files written by a writer thread into ``HITCH_DIR``, so a
+hitch doesn't cause another one.  Frames on which the loop idles waiting
+for input are not hitches.
+"""
+
+import gc
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+HITCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hitches")
+# Seconds; three frames at 60 FPS
+HITCH_THRESHOLD = 0.05
+# Frames of phase timings kept for a bundle
+FRAMES_KEPT = 120
+# Stack samples taken in one frame at most
+MAX_SAMPLES = 8
+# Seconds between bundles, so a run of hitches doesn't flood the directory
+COOLDOWN = 1.0
+
+
+class HitchDetector:
+    def __init__(
+        self,
+        directory=HITCH_DIR,
+        threshold=HITCH_THRESHOLD,
+        history=FRAMES_KEPT,
+        context=None,
+        cooldown=COOLDOWN,
+    ):
+        self.directory = directory
+        self.threshold = threshold
+        self.sample_after = threshold / 2
+        self.cooldown = cooldown
+        # Called on a hitch for the game's state and entity counts
+        self.context = context
+        # (frame, total, {phase: seconds}) for the last ``history`` frames
+        self.frames = deque(maxlen=history)
+        self.frame = 0
+        self.phases = {}
+        self.frame_start = self.mark_time = 0.0
+        self.last_bundle = -cooldown
+        self.hitches = 0
+        self.bundles = 0
+        self.worst = 0.0
+
+        # Collections during the current frame: (generation, seconds)
+        self.collections = []
+        self._gc_start = 0.0
+
+        # (frame, seconds into the frame, stack) from the sampler thread
+        self.samples = []
+        self.main_thread = threading.get_ident()
+        # Set from begin_frame until the frame's work is done
+        self.running = False
+        self._stopping = threading.Event()
+        self.sampler = threading.Thread(
+            target=self._sample, name="hitch-sampler", daemon=True
+        )
+        self.writes = queue.Queue()
+        self.writer = threading.Thread(
+            target=self._write, name="hitch-writer", daemon=True
+        )
+
+    def start(self):
+        gc.callbacks.append(self._on_gc)
+        self.sampler.start()
+        self.writer.start()
+
+    def stop(self):
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        self._stopping.set()
+        self.sampler.join()
+        # Write out the bundles still queued
+        self.writes.put(None)
+        self.writer.join()
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._gc_start = time.perf_counter()
+        else:
+            pause = time.perf_counter() - self._gc_start
+            self.collections.append((info["generation"], pause))
+
+    # Main thread
+
+    def begin_frame(self):
+        self.frame += 1
+        self.phases = {}
+        self.collections = []
+        self.samples = []
+        self.frame_start = self.mark_time = time.perf_counter()
+        self.running = True
+
+    def mark(self, phase):
+        """End ``phase``, timed from the previous mark."""
+        now = time.perf_counter()
+        self.phases[phase] = now - self.mark_time
+        self.mark_time = now
+
+    def waiting(self):
+        """The frame's work is done; stop sampling through the wait."""
+        self.running = False
+
+    def end_frame(self, idle=False):
+        self.running = False
+        total = self.mark_time - self.frame_start
+        self.frames.append((self.frame, total, self.phases))
+        if idle or total <= self.threshold:
+            return
+        self.hitches += 1
+        self.worst = max(self.worst, total)
+        if self.mark_time - self.last_bundle < self.cooldown:
+            return
+        self.last_bundle = self.mark_time
+        # Gathered here, where the game isn't changing; encoded by the writer
+        bundle = {
+            "time": time.time(),
+            "frame": self.frame,
+            "seconds": total,
+            "threshold": self.threshold,
+            "phases": self.phases,
+            "context": self.context() if self.context else {},
+            "gc": {
+                "collections": self.collections,
+                "counts": gc.get_count(),
+                "thresholds": gc.get_threshold(),
+                "generations": gc.get_stats(),
+            },
+            "samples": [
+                {"at": at, "stack": stack}
+                for frame, at, stack in self.samples
+                if frame == self.frame
+            ],
+            "recent": [
+                {"frame": frame, "seconds": seconds, "phases": phases}
+                for frame, seconds, phases in self.frames
+            ],
+        }
+        self.writes.put(bundle)
+
+    # Sampler thread
+
+    def _sample(self):
+        while not self._stopping.wait(self.sample_after):
+            frame = self.frame
+            at = time.perf_counter() - self.frame_start
+            samples = self.samples
+            if not self.running or at < self.sample_after:
+                continue
+            if len(samples) >= MAX_SAMPLES:
+                continue
+            stack = sys._current_frames().get(self.main_thread)
+            # The frame may have ended while this thread waited for the GIL
+            if stack is None or self.frame != frame or not self.running:
+                continue
+            lines = [
+                f"{entry.filename}:{entry.lineno} in {entry.name}"
+                for entry in traceback.extract_stack(stack)
+            ]
+            samples.append((frame, at, lines))
+
+    # Writer thread
+
+    def _write(self):
+        while True:
+            bundle = self.writes.get()
+            if bundle is None:
+                return
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(bundle["time"]))
+            path = os.path.join(self.directory, f"hitch-{stamp}-{bundle['frame']}.json")
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(path + ".tmp", "w") as file:
+                    json.dump(bundle, file, indent=1, default=str)
+                os.replace(path + ".tmp", path)
+            except OSError as error:
+                print(f"hitch bundle not written: {error}", file=sys.stderr)
+                continue
+            self.bundles += 1
+
+    def summary(self):
+        return (
+            f"hitches: {self.hitches} of {self.frame} frames over "
+            f"{self.threshold * 1000:.0f} ms (worst {self.worst * 1000:.0f} ms), "
+            f"{self.bundles} bundles in {self.directory}"
+        )
+
+
+def _stall(seconds):
+    # Busy Python work, so the sampler can catch it on the stack
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def benchmark(frames=600, stall_every=100):
+    """Detector cost per frame, and a bundle for each injected stall."""
+    import tempfile
+
+    work = 0.004
+    # The main thread's calls, timed directly: a stall would hide them
+    detector = HitchDetector(tempfile.mkdtemp(), context=lambda: {"demo": 1})
+    detector.start()
+    spent = 0.0
+    for frame in range(frames):
+        start = time.perf_counter()
+        detector.begin_frame()
+        spent += time.perf_counter() - start
+        _stall(work)
+        start = time.perf_counter()
+        detector.mark("update")
+        detector.waiting()
+        detector.end_frame()
+        spent += time.perf_counter() - start
+    detector.stop()
+    print(f"{frames} frames of {work * 1000:.0f} ms work")
+    print(
+        f"  detector calls: {spent / frames * 1e6:.1f} us per frame, "
+        f"sampler wakes every {detector.sample_after * 1000:.0f} ms"
+    )
+
+    directory = tempfile.mkdtemp()
+    detector = HitchDetector(directory, context=lambda: {"demo": 1}, cooldown=0)
+    detector.start()
+    for frame in range(frames):
+        detector.begin_frame()
+        _stall(work)
+        detector.mark("update")
+        if frame % stall_every == stall_every - 1:
+            _stall(0.12)
+        detector.mark("render")
+        detector.end_frame()
+    detector.stop()
+    print(f"  {detector.summary()}")
+    names = sorted(os.listdir(directory))
+    if names:
+        with open(os.path.join(directory, names[0])) as file:
+            bundle = json.load(file)
+        samples = bundle["samples"]
+        print(
+            f"  first bundle: {bundle['seconds'] * 1000:.0f} ms frame, "
+            f"{len(samples)} stack samples, innermost "
+            f"{samples[0]['stack'][-1] if samples else 'none'}"
+        )
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,100 @@
+"""Gameplay HUD composed from a pre-rendered glyph atlas.
+
+``GlyphAtlas`` renders the digits, a little punctuation and the HUD labels
+once per font and colour into a single Surface; each glyph is a subsurface
+of it.  ``Hud`` lays a field's value out as a list of glyph blits and only
+redoes that layout when the formatted value changes.  Drawing submits the
+cached blits to the render queue, where glyphs of one atlas batch together and
+the canvas caches each glyph like any other static sprite, so no text is
+rendered per frame.
+"""
+
+import pygame
+
+GLYPHS = "0123456789.-:/% "
+FIELD_GAP = 24
+
+# Atlases by (font, colour, labels), shared by every Hud
+_atlases = {}
+
+
+class GlyphAtlas:
+    def __init__(self, font, color, labels=()):
+        rendered = [(char, font.render(char, True, color)) for char in GLYPHS]
+        rendered += [(label, font.render(label, True, color)) for label in labels]
+        width = sum(image.get_width() for _, image in rendered)
+        self.height = max(image.get_height() for _, image in rendered)
+        self.surface = pygame.Surface((width, self.height), pygame.SRCALPHA)
+
+        # Characters and labels are both looked up by their text
+        self.glyphs = {}
+        x = 0
+        for text, image in rendered:
+            self.surface.blit(image, (x, 0))
+            self.glyphs[text] = self.surface.subsurface(
+                (x, 0, image.get_width(), self.height)
+            )
+            x += image.get_width()
+        self.digit_width = max(self.glyphs[d].get_width() for d in "0123456789")
+
+    @classmethod
+    def get(cls, font, color, labels=()):
+        key = (font, color, tuple(labels))
+        atlas = _atlases.get(key)
+        if atlas is None:
+            atlas = _atlases[key] = cls(font, color, labels)
+        return atlas
+
+    def width(self, text):
+        if text in self.glyphs:
+            return self.glyphs[text].get_width()
+        return sum(self.glyphs[char].get_width() for char in text)
+
+
+class Hud:
+    def __init__(self, font, color, fields, pos=(10, 10)):
+        """``fields`` is a list of (name, label, format spec, max characters)."""
+        self.fields = fields
+        self.atlas = GlyphAtlas.get(font, color, [label for _, label, _, _ in fields])
+        self.values = {}
+        self.texts = {}
+        # name -> [(glyph, (x, y))]
+        self.layouts = {}
+        self.recomposed = 0
+
+        # Fixed slot per field, so one value growing doesn't move the others
+        self.origins = {}
+        x, y = pos
+        for name, label, _, chars in fields:
+            self.origins[name] = (x, y)
+            x += self.atlas.width(label) + chars * self.atlas.digit_width + FIELD_GAP
+
+    def update(self, **values):
+        for name, label, spec, _ in self.fields:
+            value = values.get(name)
+            if value is None or value == self.values.get(name):
+                continue
+            self.values[name] = value
+            text = format(value, spec)
+            if text == self.texts.get(name):
+                continue
+            self.texts[name] = text
+            self._compose(name, label, text)
+
+    def _compose(self, name, label, text):
+        glyphs = self.atlas.glyphs
+        x, y = self.origins[name]
+        layout = [(glyphs[label], (x, y))]
+        x += glyphs[label].get_width()
+        for char in text:
+            glyph = glyphs.get(char)
+            if glyph is not None:
+                layout.append((glyph, (x, y)))
+                x += glyph.get_width()
+        self.layouts[name] = layout
+        self.recomposed += 1
+
+    def draw(self, queue, layer):
+        for layout in self.layouts.values():
+            for glyph, pos in layout:
+                queue.blit(glyph, pos, layer=layer)
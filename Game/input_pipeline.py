@@ -0,0 +1,158 @@
+"""Timestamped input pipeline for the main loop.
+
+SDL only lets the thread that owns the window pump events, so instead of a
+separate input thread the pipeline keeps pumping while the main loop waits
+for the next frame (where ``clock.tick`` used to sleep).  Every event is
+stamped with ``perf_counter`` the moment it arrives and tagged with the
+simulation tick that will consume it.  After the frame that consumed an
+event is flipped, its input-to-photon latency is recorded.
+
+On static screens the loop can go idle: ``wait_for_next_frame(idle=True)``
+blocks in ``pygame.event.wait`` until input arrives (or a long timeout
+passes) instead of waking every 16 ms, and the next frame starts as soon
+as an event does.  ``CpuStats`` measures what that saves.
+"""
+
+import time
+from collections import deque
+
+import pygame
+
+# Events whose latency we care about
+LATENCY_EVENTS = (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN)
+LATENCY_HISTORY = 600
+# Longest idle sleep without input
+IDLE_TIMEOUT = 0.5
+
+
+class LatencyStats:
+    def __init__(self, history=LATENCY_HISTORY):
+        self.samples = deque(maxlen=history)
+        self.count = 0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def percentile(self, fraction):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+    def summary(self):
+        if not self.samples:
+            return "input latency: no samples"
+        mean = sum(self.samples) / len(self.samples)
+        return (
+            f"input latency over {len(self.samples)} events: "
+            f"mean {mean * 1000:.1f} ms, "
+            f"p50 {self.percentile(0.5) * 1000:.1f} ms, "
+            f"p95 {self.percentile(0.95) * 1000:.1f} ms, "
+            f"max {max(self.samples) * 1000:.1f} ms"
+        )
+
+
+class InputPipeline:
+    def __init__(self, fps):
+        self.frame_time = 1 / fps
+        self.next_frame = time.perf_counter()
+        self.tick = 0
+        # (tick, arrival time, event)
+        self.queue = deque()
+        # Arrival times of latency-tracked events consumed by the current frame
+        self.in_flight = []
+        self.latency = LatencyStats()
+
+    def pump(self):
+        now = time.perf_counter()
+        for event in pygame.event.get():
+            self.queue.append((self.tick + 1, now, event))
+
+    def take(self):
+        """Return the events for the next simulation tick."""
+        self.pump()
+        self.tick += 1
+        events = []
+        while self.queue and self.queue[0][0] <= self.tick:
+            _, arrived, event = self.queue.popleft()
+            events.append(event)
+            if event.type in LATENCY_EVENTS:
+                self.in_flight.append(arrived)
+        return events
+
+    def presented(self):
+        """Call right after the frame is flipped."""
+        now = time.perf_counter()
+        for arrived in self.in_flight:
+            self.latency.add(now - arrived)
+        self.in_flight.clear()
+
+    def wait_for_next_frame(self, idle=False):
+        if idle:
+            self._wait_idle()
+            return
+        # Sleep until the frame deadline, waking for (and stamping) each event
+        self.next_frame += self.frame_time
+        now = time.perf_counter()
+        if now > self.next_frame:
+            # Running behind; don't try to catch up with a burst of frames
+            self.next_frame = now
+            self.pump()
+            return
+        while now < self.next_frame:
+            timeout = int((self.next_frame - now) * 1000)
+            if timeout <= 0:
+                self.pump()
+                break
+            event = pygame.event.wait(timeout)
+            now = time.perf_counter()
+            if event.type != pygame.NOEVENT:
+                self.queue.append((self.tick + 1, now, event))
+
+    def _wait_idle(self):
+        # Sleep until input arrives; the next frame then starts at once
+        event = pygame.event.wait(int(IDLE_TIMEOUT * 1000))
+        now = time.perf_counter()
+        if event.type != pygame.NOEVENT:
+            self.queue.append((self.tick + 1, now, event))
+        self.next_frame = now
+
+
+class CpuStats:
+    """Process CPU time against wall-clock time, and frames drawn vs skipped."""
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.start_wall = self.mark_wall = time.perf_counter()
+        self.start_cpu = self.mark_cpu = time.process_time()
+        self.frames = 0
+        self.rendered = 0
+        self.idle = 0
+        # CPU share over the last full interval
+        self.recent = 0.0
+
+    def frame(self, rendered, idle):
+        self.frames += 1
+        self.rendered += rendered
+        self.idle += idle
+        now = time.perf_counter()
+        if now - self.mark_wall >= self.interval:
+            cpu = time.process_time()
+            self.recent = (cpu - self.mark_cpu) / (now - self.mark_wall)
+            self.mark_wall, self.mark_cpu = now, cpu
+
+    def usage(self):
+        wall = time.perf_counter() - self.start_wall
+        return (time.process_time() - self.start_cpu) / wall if wall else 0.0
+
+    def summary(self):
+        frames = max(self.frames, 1)
+        return (
+            f"cpu: {self.usage() * 100:.1f}% of a core over "
+            f"{time.perf_counter() - self.start_wall:.1f} s "
+            f"({self.recent * 100:.1f}% over the last {self.interval:g} s); "
+            f"{self.rendered}/{self.frames} frames drawn "
+            f"({self.rendered / frames * 100:.0f}%), "
+            f"{self.idle} idle waits"
+        )
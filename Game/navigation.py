@@ -0,0 +1,249 @@
+"""Grid navigation and a shared flow field toward the player.
+
+``NavGrid`` rasterizes the level's obstacles once per ``init_level``, grown
+by the agent's half size so a cell is free only if an agent centred on it
+fits.  Enemies crawl along the ground, so only free cells resting on
+something solid are walkable.  Walkable cells link to their neighbours
+(walking, or climbing and dropping one cell), and a ledge links to the
+cell below it that an agent walking off would land on.
+
+``FlowField`` runs one breadth-first wavefront over those links from the
+walkable cell under the player and stores a step direction per cell; it is
+rebuilt only when the player moves into a different cell.  Cells in mid-air
+step straight down, so an agent that walks off a ledge falls.  Every enemy
+then steers by a single array lookup, however many there are.
+
+Run this file directly to benchmark with hundreds of snakes.
+"""
+
+import time
+
+import numpy as np
+
+CELL_SIZE = 20
+UNREACHABLE = np.iinfo(np.int32).max
+
+# 8-neighbour offsets as (dx, dy) with their unit step directions.  Straight
+# steps come first so ties in the wavefront distance prefer them over diagonals.
+NEIGHBOURS = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (1, -1), (-1, 1), (1, 1)]
+STEP_X = np.array([dx / np.hypot(dx, dy) for dx, dy in NEIGHBOURS] + [0.0], np.float32)
+STEP_Y = np.array([dy / np.hypot(dx, dy) for dx, dy in NEIGHBOURS] + [0.0], np.float32)
+NO_STEP = len(NEIGHBOURS)
+FALL = NEIGHBOURS.index((0, 1))
+
+
+def _shift(array, dx, dy, fill):
+    # out[y, x] = array[y + dy, x + dx], padded with ``fill``
+    out = np.full_like(array, fill)
+    h, w = array.shape
+    out[max(0, -dy) : h - max(0, dy), max(0, -dx) : w - max(0, dx)] = array[
+        max(0, dy) : h - max(0, -dy), max(0, dx) : w - max(0, -dx)
+    ]
+    return out
+
+
+class NavGrid:
+    def __init__(
+        self, obstacles, width, height, agent_size=(0, 0), cell_size=CELL_SIZE
+    ):
+        self.cell_size = cell_size
+        self.columns = -(-width // cell_size)
+        self.rows = -(-height // cell_size)
+        self.free = np.ones((self.rows, self.columns), bool)
+
+        # Block every cell whose centre lies in an obstacle grown by the agent
+        half_w, half_h = agent_size[0] / 2, agent_size[1] / 2
+        centres_x = (np.arange(self.columns) + 0.5) * cell_size
+        centres_y = (np.arange(self.rows) + 0.5) * cell_size
+        for rect in obstacles:
+            cols = (centres_x > rect.left - half_w) & (centres_x < rect.right + half_w)
+            rows = (centres_y > rect.top - half_h) & (centres_y < rect.bottom + half_h)
+            self.free[np.ix_(rows, cols)] = False
+
+        # Walkable: free with a blocked cell (or the level's bottom) below
+        supported = np.ones_like(self.free)
+        supported[:-1] = ~self.free[1:]
+        self.walkable = self.free & supported
+
+        # Row a body falling from each cell lands on, -1 if it never does
+        self.landing = np.full(self.free.shape, -1, np.int32)
+        below = np.full(self.columns, -1, np.int32)
+        for row in range(self.rows - 1, -1, -1):
+            below = np.where(
+                self.walkable[row], row, np.where(self.free[row], below, -1)
+            )
+            self.landing[row] = below
+
+        # Drops off ledges deeper than one cell: (from row, from column,
+        # landing row, landing column); shallower ones are neighbour links
+        drops = []
+        for side in (-1, 1):
+            rows, columns = np.nonzero(self.walkable)
+            beside = columns + side
+            inside = (beside >= 0) & (beside < self.columns)
+            rows, columns, beside = rows[inside], columns[inside], beside[inside]
+            landing = self.landing[rows, beside]
+            deep = self.free[rows, beside] & ~self.walkable[rows, beside]
+            deep &= landing > rows + 1
+            drops.append(np.stack([rows, columns, landing, beside])[:, deep])
+        self.drops = np.concatenate(drops, axis=1)
+
+    def cell(self, x, y):
+        column = min(max(int(x) // self.cell_size, 0), self.columns - 1)
+        row = min(max(int(y) // self.cell_size, 0), self.rows - 1)
+        return column, row
+
+
+class FlowField:
+    def __init__(self, grid):
+        self.grid = grid
+        self.goal = None
+        self.distance = np.full(grid.free.shape, UNREACHABLE, np.int32)
+        self.step = np.full(grid.free.shape, NO_STEP, np.uint8)
+        self.rebuilds = 0
+
+    def update_target(self, x, y):
+        """Point the field at (x, y); only does work when the cell changes.
+
+        A target in the air is chased along the ground beneath it.
+        """
+        column, row = self.grid.cell(x, y)
+        landing = self.grid.landing[row, column]
+        goal = (column, int(landing) if landing >= 0 else row)
+        if goal == self.goal:
+            return False
+        self.goal = goal
+        self._rebuild()
+        return True
+
+    def _rebuild(self):
+        grid = self.grid
+        walkable = grid.walkable
+        drop_from = grid.drops[0], grid.drops[1]
+        drop_to = grid.drops[2], grid.drops[3]
+        distance = self.distance
+        distance.fill(UNREACHABLE)
+
+        # Breadth-first wavefront, one ring of cells per iteration.  The
+        # frontier lives inside a one-cell border so growing it to all 8
+        # neighbours is a separable 3x3 dilation over array views.
+        column, row = self.goal
+        padded = np.zeros((walkable.shape[0] + 2, walkable.shape[1] + 2), bool)
+        frontier = padded[1:-1, 1:-1]
+        frontier[row, column] = True
+        distance[row, column] = 0
+        unvisited = walkable.copy()
+        unvisited[row, column] = False
+        ring = 0
+        while frontier.any():
+            ring += 1
+            # Ledges whose drop lands on the last ring reach it in one move
+            dropped = frontier[drop_to]
+            across = padded[:, :-2] | padded[:, 1:-1] | padded[:, 2:]
+            grown = across[:-2] | across[1:-1] | across[2:]
+            np.logical_and(grown, unvisited, out=frontier)
+            frontier[drop_from[0][dropped], drop_from[1][dropped]] = True
+            frontier &= unvisited
+            distance[frontier] = ring
+            unvisited &= ~frontier
+
+        # Each cell steps toward its closest neighbour; blocked cells too, so
+        # an agent pushed into a wall finds its way back out
+        neighbour_distance = np.stack(
+            [_shift(distance, dx, dy, UNREACHABLE) for dx, dy in NEIGHBOURS]
+        )
+        best = neighbour_distance.argmin(axis=0)
+        closer = neighbour_distance.min(axis=0) < distance
+        self.step[...] = np.where(closer, best, NO_STEP)
+
+        # Ledges whose way on is the drop step sideways off the edge...
+        if grid.drops.size:
+            through = distance[drop_to] + 1 == distance[drop_from]
+            shorter = distance[drop_to] < neighbour_distance.min(axis=0)[drop_from]
+            take = through & shorter
+            sides = np.where(drop_to[1] > drop_from[1], 1, 0)[take]
+            self.step[drop_from[0][take], drop_from[1][take]] = sides
+        # ...and mid-air cells fall
+        falling = grid.free & ~walkable & (grid.landing >= 0)
+        self.step[falling] = FALL
+        self.rebuilds += 1
+
+    def direction(self, x, y):
+        """Unit step toward the goal from (x, y), or (0, 0) at the goal."""
+        column, row = self.grid.cell(x, y)
+        step = self.step[row, column]
+        return STEP_X[step], STEP_Y[step]
+
+    def directions(self, xs, ys):
+        # Vectorized lookup for many agents at once
+        size = self.grid.cell_size
+        columns = np.clip(xs.astype(np.intp) // size, 0, self.grid.columns - 1)
+        rows = np.clip(ys.astype(np.intp) // size, 0, self.grid.rows - 1)
+        steps = self.step[rows, columns]
+        return STEP_X[steps], STEP_Y[steps]
+
+    def steer(self, agents):
+        """Set each agent's ``heading`` from one lookup for all of them."""
+        count = len(agents)
+        xs = np.fromiter((agent.rect.centerx for agent in agents), np.intp, count)
+        ys = np.fromiter((agent.rect.centery for agent in agents), np.intp, count)
+        dxs, dys = self.directions(xs, ys)
+        for agent, dx, dy in zip(agents, dxs.tolist(), dys.tolist()):
+            agent.heading = (dx, dy)
+
+
+def benchmark(snakes=500, frames=600):
+    import os
+    import random
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from claude_game_DS import SCREEN_HEIGHT, SCREEN_WIDTH, Game, GameState
+
+    game = Game()
+    game.state = GameState.SNAKE_ENCOUNTER
+    game.init_level()
+    template = game.enemies[0]
+    for _ in range(snakes - 1):
+        game.enemies.append(
+            game.snake_pool.acquire(
+                random.randrange(0, SCREEN_WIDTH - template.width),
+                random.randrange(0, SCREEN_HEIGHT - 100),
+            )
+        )
+
+    start = time.perf_counter()
+    grid = NavGrid(game.obstacles, SCREEN_WIDTH, SCREEN_HEIGHT, (80, 30))
+    build_ms = (time.perf_counter() - start) * 1000
+    field = FlowField(grid)
+
+    rebuild_time = follow_time = 0.0
+    for frame in range(frames):
+        # Sweep the player back and forth across the level
+        phase = frame % 300
+        px = 50 + (phase if phase < 150 else 300 - phase) * 4.5
+        py = SCREEN_HEIGHT - 120 - 200 * abs(np.sin(frame / 40))
+
+        start = time.perf_counter()
+        field.update_target(px, py)
+        rebuild_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        field.steer(game.enemies)
+        for enemy in game.enemies:
+            enemy.update(px, enemy.heading)
+        follow_time += time.perf_counter() - start
+
+    print(f"{snakes} snakes, {frames} frames, {grid.columns}x{grid.rows} grid")
+    print(f"grid build: {build_ms:.2f} ms (once per init_level)")
+    print(
+        f"field rebuilds: {field.rebuilds}, "
+        f"{rebuild_time / max(field.rebuilds, 1) * 1000:.2f} ms each"
+    )
+    print(
+        f"following: {follow_time / frames * 1000:.2f} ms/frame, "
+        f"{follow_time / frames / snakes * 1e6:.2f} us per snake"
+    )
+
+
+if __name__ == "__main__":
+    benchmark()
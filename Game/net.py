@@ -0,0 +1,553 @@
+"""Two-player networked co-op over UDP.
+
+The host runs the authoritative Game and treats the joining woodpecker as
+``game.partner``.  Each tick the client sends only its input bits (with the
+last few ticks repeated so a lost packet costs nothing); every few ticks the
+host answers with the Player and enemy state, XOR-delta'd against the last
+state the client acknowledged and zlib-compressed.  The client predicts its
+own woodpecker locally and replays unacknowledged inputs on top of every
+authoritative state it receives.
+
+    python net.py host 5000           # host a game on port 5000
+    python net.py join 127.0.0.1 5000  # join it
+    python net.py loopback            # headless test through a lossy relay
+"""
+
+import asyncio
+import os
+import random
+import struct
+import sys
+import time
+import zlib
+
+import numpy as np
+import pygame
+
+# Input bits
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_FLY = 4
+INPUT_JUMP = 8
+INPUT_PECK = 16
+# Held inputs, which keep repeating while the client's packets are late;
+# jump and peck fire once on the tick the key goes down
+HELD_INPUTS = INPUT_LEFT | INPUT_RIGHT | INPUT_FLY
+
+# Message types
+MSG_HELLO = 0
+MSG_INPUT = 1
+MSG_STATE = 2
+
+# Inputs repeated in every input packet to ride out packet loss
+INPUT_REDUNDANCY = 8
+# Host sends a state update every STATE_INTERVAL ticks (10 Hz at 60 FPS)
+STATE_INTERVAL = 6
+# States kept around as delta baselines
+BASELINE_HISTORY = 32
+NO_BASELINE = 0xFFFFFFFF
+
+# type, newest input tick, acked state tick, send time, input count
+INPUT_HEADER = struct.Struct("<BIIdB")
+# type, tick, baseline tick, last applied input tick, echoed send time
+STATE_HEADER = struct.Struct("<BIIId")
+
+PLAYER_FIELDS = 7  # x, y, vx, vy, health, feathers, flags
+ENEMY_FIELDS = 3  # x, y, active
+GAME_FIELDS = 4  # state, score, level_timer, enemy count
+
+PARTNER_COLOR = (30, 90, 200)
+
+
+def input_bits(keys, previous_keys):
+    # Continuous movement plus jump / peck on the tick the key goes down
+    bits = 0
+    if keys[pygame.K_LEFT]:
+        bits |= INPUT_LEFT
+    if keys[pygame.K_RIGHT]:
+        bits |= INPUT_RIGHT
+    if keys[pygame.K_UP] or keys[pygame.K_w]:
+        bits |= INPUT_FLY
+    if keys[pygame.K_SPACE] and not previous_keys[pygame.K_SPACE]:
+        bits |= INPUT_JUMP
+    if keys[pygame.K_p] and not previous_keys[pygame.K_p]:
+        bits |= INPUT_PECK
+    return bits
+
+
+def apply_input(game, player, bits):
+    if bits & INPUT_LEFT:
+        player.move_left()
+    if bits & INPUT_RIGHT:
+        player.move_right()
+    if bits & INPUT_FLY:
+        player.fly()
+    if bits & INPUT_JUMP:
+        player.jump()
+    if bits & INPUT_PECK:
+        game.player_peck(player)
+
+
+def pack_player(player, out):
+    out[:] = (
+        player.x,
+        player.y,
+        player.velocity_x,
+        player.velocity_y,
+        player.health,
+        player.feathers,
+        player.jumping | player.flying << 1 | player.facing_right << 2,
+    )
+
+
+def unpack_player(player, values):
+    x, y, vx, vy, health, feathers, flags = values
+    player.x = player.rect.x = int(x)
+    player.y = player.rect.y = int(y)
+    player.velocity_x = vx
+    player.velocity_y = vy
+    player.health = int(health)
+    player.feathers = int(feathers)
+    flags = int(flags)
+    player.jumping = bool(flags & 1)
+    player.flying = bool(flags & 2)
+    player.facing_right = bool(flags & 4)
+
+
+def encode_state(game, host_player, client_player):
+    # Flat float32 vector: game scalars, both woodpeckers, then enemies
+    n_enemies = len(game.enemies)
+    state = np.empty(
+        GAME_FIELDS + 2 * PLAYER_FIELDS + ENEMY_FIELDS * n_enemies, np.float32
+    )
+    state[:GAME_FIELDS] = game.state.value, game.score, game.level_timer, n_enemies
+    offset = GAME_FIELDS
+    pack_player(host_player, state[offset : offset + PLAYER_FIELDS])
+    offset += PLAYER_FIELDS
+    pack_player(client_player, state[offset : offset + PLAYER_FIELDS])
+    offset += PLAYER_FIELDS
+    if n_enemies:
+        state[offset:] = np.array(
+            [(enemy.x, enemy.y, enemy.active) for enemy in game.enemies], np.float32
+        ).ravel()
+    return state
+
+
+def decode_state(game, state, host_player, client_player):
+    state_value, score, level_timer, n_enemies = state[:GAME_FIELDS].tolist()
+    if int(state_value) != game.state.value:
+        game.state = type(game.state)(int(state_value))
+        game.init_level()
+    game.score = int(score)
+    game.level_timer = level_timer
+    offset = GAME_FIELDS
+    unpack_player(host_player, state[offset : offset + PLAYER_FIELDS].tolist())
+    offset += PLAYER_FIELDS
+    unpack_player(client_player, state[offset : offset + PLAYER_FIELDS].tolist())
+    offset += PLAYER_FIELDS
+    enemies = state[offset:].reshape(-1, ENEMY_FIELDS).tolist()
+    for enemy, (x, y, active) in zip(game.enemies, enemies[: int(n_enemies)]):
+        enemy.x = enemy.rect.x = int(x)
+        enemy.y = enemy.rect.y = int(y)
+        enemy.active = bool(active)
+
+
+def usable_baseline(state, baseline):
+    # A state of a different size (the enemy count changed) needs a keyframe
+    return baseline is not None and baseline.shape == state.shape
+
+
+def delta_compress(state, baseline):
+    raw = state.view(np.uint32)
+    if baseline is not None:
+        if not usable_baseline(state, baseline):
+            raise ValueError("baseline and state differ in size")
+        raw = raw ^ baseline.view(np.uint32)
+    return zlib.compress(raw.tobytes(), 6)
+
+
+def delta_decompress(payload, baseline):
+    """The state, or None if ``baseline`` can't be the one it was delta'd on."""
+    raw = np.frombuffer(zlib.decompress(payload), np.uint32).copy()
+    if baseline is not None:
+        if not usable_baseline(raw, baseline):
+            return None
+        raw ^= baseline.view(np.uint32)
+    return raw.view(np.float32)
+
+
+class NetStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.packets_sent = 0
+        self.packets_received = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.states_received = 0
+        self.keyframes = 0
+        self.rtt = None
+        self.corrections = 0
+        self.correction_error = 0.0
+
+    def sent(self, nbytes):
+        self.packets_sent += 1
+        self.bytes_sent += nbytes
+
+    def received(self, nbytes):
+        self.packets_received += 1
+        self.bytes_received += nbytes
+
+    def sample_rtt(self, rtt):
+        # Exponential moving average like TCP's SRTT
+        self.rtt = rtt if self.rtt is None else 0.875 * self.rtt + 0.125 * rtt
+
+    def summary(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-6)
+        lines = [
+            f"sent {self.packets_sent} packets, {self.bytes_sent * 8 / elapsed / 1000:.1f} kbit/s",
+            f"received {self.packets_received} packets, "
+            f"{self.bytes_received * 8 / elapsed / 1000:.1f} kbit/s",
+        ]
+        if self.rtt is not None:
+            lines.append(f"rtt {self.rtt * 1000:.1f} ms")
+        if self.states_received:
+            lines.append(
+                f"{self.states_received} states ({self.keyframes} keyframes), "
+                f"{self.corrections} corrections, "
+                f"mean error {self.correction_error / max(self.corrections, 1):.1f} px"
+            )
+        return "\n".join(lines)
+
+
+class CoopEndpoint(asyncio.DatagramProtocol):
+    """Host or client side of a co-op session.
+
+    Call ``tick()`` once per simulation step, after the local inputs for the
+    step are known and before ``game.update()``.
+    """
+
+    def __init__(self, game, is_host, remote_addr=None):
+        self.game = game
+        self.is_host = is_host
+        self.remote_addr = remote_addr
+        self.transport = None
+        self.stats = NetStats()
+        self.tick_count = 0
+
+        if game.partner is None:
+            # Same bird, tinted, animated alongside the local player
+            game.partner = type(game.player)(game.animations, PARTNER_COLOR)
+
+        # Host: remote inputs by client tick; client: own inputs for replay
+        self.inputs = {}
+        self.last_bits = 0
+        self.last_applied_input = 0
+
+        # Delta baselines by tick
+        self.baselines = {}
+        self.acked_state = NO_BASELINE
+        self.remote_send_time = 0.0
+
+    # -- asyncio.DatagramProtocol -----------------------------------------
+
+    def connection_made(self, transport):
+        self.transport = transport
+        if self.remote_addr:
+            self.send(struct.pack("<B", MSG_HELLO))
+
+    def datagram_received(self, data, addr):
+        if self.remote_addr is None:
+            self.remote_addr = addr
+        self.stats.received(len(data))
+        kind = data[0]
+        if kind == MSG_INPUT and self.is_host:
+            self.receive_input(data)
+        elif kind == MSG_STATE and not self.is_host:
+            self.receive_state(data)
+
+    def send(self, data):
+        if self.transport and self.remote_addr:
+            self.transport.sendto(data, self.remote_addr)
+            self.stats.sent(len(data))
+
+    # -- per tick ---------------------------------------------------------
+
+    def tick(self, local_bits):
+        self.tick_count += 1
+        if self.is_host:
+            self.host_tick()
+        else:
+            self.client_tick(local_bits)
+
+    def host_tick(self):
+        # Apply the client's next input; one missing while later ones have
+        # arrived was lost, and the last input stands in for it
+        if self.inputs:
+            self.last_applied_input += 1
+            self.last_bits = self.inputs.pop(self.last_applied_input, self.last_bits)
+            for tick in [t for t in self.inputs if t < self.last_applied_input]:
+                del self.inputs[tick]
+            apply_input(self.game, self.game.partner, self.last_bits)
+        else:
+            # Nothing new yet: the partner keeps doing what it was holding.
+            # The late input still applies when it arrives, so the client's
+            # replay stays in step with the host
+            apply_input(self.game, self.game.partner, self.last_bits & HELD_INPUTS)
+
+        if self.tick_count % STATE_INTERVAL == 0 and self.remote_addr:
+            self.send_state()
+
+    def client_tick(self, bits):
+        self.inputs[self.tick_count] = bits
+        first = max(1, self.tick_count - INPUT_REDUNDANCY + 1)
+        history = bytes(
+            self.inputs.get(t, 0) for t in range(first, self.tick_count + 1)
+        )
+        header = INPUT_HEADER.pack(
+            MSG_INPUT,
+            self.tick_count,
+            self.acked_state,
+            time.perf_counter(),
+            len(history),
+        )
+        self.send(header + history)
+
+    # -- host ---------------------------------------------------------------
+
+    def receive_input(self, data):
+        _, newest, acked_state, send_time, count = INPUT_HEADER.unpack_from(data)
+        self.remote_send_time = send_time
+        if acked_state != NO_BASELINE:
+            self.acked_state = acked_state
+        if not self.last_applied_input:
+            # Start applying from the first input we ever see
+            self.last_applied_input = newest - count
+        bits = data[INPUT_HEADER.size :]
+        for i, value in enumerate(bits):
+            tick = newest - count + 1 + i
+            if tick > self.last_applied_input:
+                self.inputs[tick] = value
+
+    def send_state(self):
+        game = self.game
+        state = encode_state(game, game.player, game.partner)
+        baseline = self.baselines.get(self.acked_state)
+        if not usable_baseline(state, baseline):
+            baseline = None
+        baseline_tick = self.acked_state if baseline is not None else NO_BASELINE
+        payload = delta_compress(state, baseline)
+        header = STATE_HEADER.pack(
+            MSG_STATE,
+            self.tick_count,
+            baseline_tick,
+            self.last_applied_input,
+            self.remote_send_time,
+        )
+        self.send(header + payload)
+
+        self.baselines[self.tick_count] = state
+        for tick in [
+            t
+            for t in self.baselines
+            if t < self.tick_count - BASELINE_HISTORY * STATE_INTERVAL
+        ]:
+            del self.baselines[tick]
+
+    # -- client -------------------------------------------------------------
+
+    def receive_state(self, data):
+        _, tick, baseline_tick, applied_input, echo = STATE_HEADER.unpack_from(data)
+        if self.acked_state != NO_BASELINE and tick <= self.acked_state:
+            return  # Reordered; a newer state already arrived
+
+        if baseline_tick == NO_BASELINE:
+            baseline = None
+            self.stats.keyframes += 1
+        else:
+            baseline = self.baselines.get(baseline_tick)
+            if baseline is None:
+                return  # Baseline was never received; wait for the next keyframe
+        state = delta_decompress(data[STATE_HEADER.size :], baseline)
+        if state is None:
+            return  # Not delta'd on our copy of the baseline; wait for a keyframe
+        self.baselines[tick] = state
+        self.acked_state = tick
+        for old in [
+            t for t in self.baselines if t < tick - BASELINE_HISTORY * STATE_INTERVAL
+        ]:
+            del self.baselines[old]
+
+        self.stats.states_received += 1
+        if echo:
+            self.stats.sample_rtt(time.perf_counter() - echo)
+
+        # On the client our woodpecker is game.player and the host's is partner
+        game = self.game
+        predicted = game.player.x, game.player.y
+        decode_state(game, state, game.partner, game.player)
+
+        # Replay the inputs the host hadn't seen yet on top of its state
+        for old in [t for t in self.inputs if t <= applied_input]:
+            del self.inputs[old]
+        for t in sorted(self.inputs):
+            apply_input(game, game.player, self.inputs[t] & ~INPUT_PECK)
+            game.player.update(game.obstacles)
+
+        error = abs(game.player.x - predicted[0]) + abs(game.player.y - predicted[1])
+        if error:
+            self.stats.corrections += 1
+            self.stats.correction_error += error
+
+
+class LoopbackRelay(asyncio.DatagramProtocol):
+    """Forwards datagrams between two peers with simulated latency and loss."""
+
+    def __init__(self, latency=0.05, jitter=0.01, loss=0.05):
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.transport = None
+        self.peers = []
+        self.forwarded = 0
+        self.dropped = 0
+        # The relay has its own RNG so it doesn't disturb game randomness
+        self.rng = random.Random(0)
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if addr not in self.peers and len(self.peers) < 2:
+            self.peers.append(addr)
+        if len(self.peers) < 2 or addr not in self.peers:
+            return
+        if self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        target = self.peers[1] if addr == self.peers[0] else self.peers[0]
+        delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+        asyncio.get_running_loop().call_later(
+            delay, self.transport.sendto, data, target
+        )
+        self.forwarded += 1
+
+
+def bot_bits(tick):
+    # Scripted play-tester: wander left and right, flap and peck now and then
+    bits = INPUT_RIGHT if (tick // 90) % 2 == 0 else INPUT_LEFT
+    if tick % 45 == 0:
+        bits |= INPUT_JUMP
+    if tick % 45 in range(5, 15):
+        bits |= INPUT_FLY
+    if tick % 30 == 0:
+        bits |= INPUT_PECK
+    return bits
+
+
+async def loopback_test(
+    seconds=10.0, latency=0.05, jitter=0.01, loss=0.05, level="SNAKE_ENCOUNTER"
+):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from claude_game_DS import FPS, Game, GameState
+
+    loop = asyncio.get_running_loop()
+    relay_transport, relay = await loop.create_datagram_endpoint(
+        lambda: LoopbackRelay(latency, jitter, loss), local_addr=("127.0.0.1", 0)
+    )
+    relay_addr = relay_transport.get_extra_info("sockname")
+
+    games = []
+    for _ in range(2):
+        game = Game()
+        game.state = GameState[level]
+        game.init_level()
+        games.append(game)
+    host_game, client_game = games
+
+    host_transport, host = await loop.create_datagram_endpoint(
+        lambda: CoopEndpoint(host_game, True, relay_addr), local_addr=("127.0.0.1", 0)
+    )
+    # Register the host with the relay before the client starts talking
+    await asyncio.sleep(0.01)
+    client_transport, client = await loop.create_datagram_endpoint(
+        lambda: CoopEndpoint(client_game, False, relay_addr),
+        local_addr=("127.0.0.1", 0),
+    )
+
+    ticks = int(seconds * FPS)
+    start = time.perf_counter()
+    for tick in range(1, ticks + 1):
+        host_bits = bot_bits(tick + 20)
+        client_bits = bot_bits(tick)
+
+        apply_input(host_game, host_game.player, host_bits)
+        host.tick(host_bits)
+        host_game.update()
+
+        apply_input(client_game, client_game.player, client_bits)
+        client.tick(client_bits)
+        client_game.update()
+
+        # Keep real time so latency is meaningful
+        await asyncio.sleep(max(0.0, start + tick / FPS - time.perf_counter()))
+
+    print(
+        f"loopback: {seconds:.0f}s, latency {latency * 1000:.0f}+-{jitter * 1000:.0f} ms, loss {loss:.0%}"
+    )
+    print(f"relay forwarded {relay.forwarded}, dropped {relay.dropped}")
+    print("host:\n  " + host.stats.summary().replace("\n", "\n  "))
+    print("client:\n  " + client.stats.summary().replace("\n", "\n  "))
+
+    for transport in (host_transport, client_transport, relay_transport):
+        transport.close()
+    return host.stats, client.stats
+
+
+def play(is_host, address):
+    """Run the normal game loop with a co-op session attached."""
+    from claude_game_DS import FPS, Game, GameState
+
+    game = Game()
+    game.state = GameState.PECKING_GAME
+    game.init_level()
+
+    loop = asyncio.new_event_loop()
+    if is_host:
+        _, endpoint = loop.run_until_complete(
+            loop.create_datagram_endpoint(
+                lambda: CoopEndpoint(game, True), local_addr=address
+            )
+        )
+    else:
+        _, endpoint = loop.run_until_complete(
+            loop.create_datagram_endpoint(
+                lambda: CoopEndpoint(game, False, address), local_addr=("0.0.0.0", 0)
+            )
+        )
+
+    previous_keys = pygame.key.get_pressed()
+    while game.running:
+        # Let asyncio deliver whatever datagrams arrived since the last frame
+        loop.run_until_complete(asyncio.sleep(0))
+
+        game.handle_events()
+        game.handle_input()
+        keys = pygame.key.get_pressed()
+        endpoint.tick(input_bits(keys, previous_keys))
+        previous_keys = keys
+        game.update()
+        game.render()
+        game.clock.tick(FPS)
+
+    print(endpoint.stats.summary())
+    loop.close()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] == "loopback":
+        asyncio.run(loopback_test())
+    elif sys.argv[1] == "host":
+        play(True, ("0.0.0.0", int(sys.argv[2])))
+    elif sys.argv[1] == "join":
+        play(False, (sys.argv[2], int(sys.argv[3])))
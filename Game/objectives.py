@@ -0,0 +1,52 @@
+"""Event-driven objective tracking.
+
+Gameplay code publishes events as they happen (a larva found, a flower
+visited, a nest piece placed) and ``Objectives`` bumps a counter.  Only goals
+waiting on that event are checked, and each goal fires its callback exactly
+once, so nothing has to rescan the level's objects every frame.
+"""
+
+# Events
+LARVA_FOUND = "larva_found"
+FLOWER_VISITED = "flower_visited"
+NEST_PIECE_PLACED = "nest_piece_placed"
+REACHED_TOP = "reached_top"
+SURVIVED = "survived"
+
+
+class Objectives:
+    def __init__(self):
+        self.counts = {}
+        # event -> [(name, target, on_complete)]
+        self.goals = {}
+
+    def reset(self):
+        self.counts.clear()
+        self.goals.clear()
+
+    def add_goal(self, name, event, target, on_complete):
+        self.goals.setdefault(event, []).append((name, target, on_complete))
+        # Events may already have been counted (e.g. after a rollback)
+        self._check(event)
+
+    def waiting_for(self, event):
+        return bool(self.goals.get(event))
+
+    def count(self, event):
+        return self.counts.get(event, 0)
+
+    def publish(self, event, amount=1):
+        self.counts[event] = self.counts.get(event, 0) + amount
+        if event in self.goals:
+            self._check(event)
+
+    def _check(self, event):
+        goals = self.goals.get(event)
+        if not goals:
+            return
+        count = self.counts.get(event, 0)
+        done = [goal for goal in goals if count >= goal[1]]
+        for goal in done:
+            goals.remove(goal)
+        for name, _, on_complete in done:
+            on_complete(name)
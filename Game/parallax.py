@@ -0,0 +1,190 @@
+"""Parallax backgrounds from pre-baked, horizontally tileable layers.
+
+Each layer is baked once into a converted Surface at least as wide as the
+view whose left and right edges meet seamlessly, and scrolls at its own
+fraction of the camera's speed.  Any scroll position then takes at most
+two blits of the layer's one Surface: the tile shifted left, and the same
+tile again after its right edge (the canvas clips both).  Blitting the
+whole tile rather than per-frame subsurfaces means the canvas scales or
+uploads each layer once and keeps reusing it.
+
+Layers that don't scroll are merged into one surface when the background
+is built.  While the camera holds still, every layer is flattened into a
+cached view-sized surface, so a static level costs one blit per frame.
+"""
+
+import math
+import os
+import random
+import time
+
+import pygame
+
+from assets import derived, recipe
+
+SKY_TOP = (110, 180, 235)
+SKY_BOTTOM = (190, 225, 245)
+
+
+def _converted(surface):
+    if pygame.display.get_surface() is None:
+        return surface
+    if surface.get_flags() & pygame.SRCALPHA:
+        return surface.convert_alpha()
+    return surface.convert()
+
+
+def sky_layer(size, top=SKY_TOP, bottom=SKY_BOTTOM):
+    width, height = size
+    surface = pygame.Surface(size)
+    for y in range(height):
+        t = y / max(1, height - 1)
+        color = [round(a + (b - a) * t) for a, b in zip(top, bottom)]
+        surface.fill(color, (0, y, width, 1))
+    return _converted(surface)
+
+
+def hills_layer(width, height, color, waves=3, seed=0):
+    """A ridge line along the bottom of the layer, tileable every ``width``."""
+    rng = random.Random(seed)
+    # Whole periods across the tile, so both edges meet
+    terms = [
+        (rng.randint(1, 6), rng.uniform(0.15, 0.35), rng.uniform(0, math.tau))
+        for _ in range(waves)
+    ]
+    surface = pygame.Surface((width, height), pygame.SRCALPHA)
+    points = [(0, height)]
+    for x in range(0, width + 1, 4):
+        wave = sum(a * math.sin(math.tau * n * x / width + p) for n, a, p in terms)
+        points.append((x, height * (0.5 - wave / (2 * waves))))
+    points.append((width, height))
+    pygame.draw.polygon(surface, color, points)
+    return _converted(surface)
+
+
+def mirrored_layer(image):
+    """The image next to its mirror image, which tiles seamlessly."""
+    width, height = image.get_size()
+    surface = pygame.Surface((width * 2, height))
+    surface.blit(image, (0, 0))
+    surface.blit(pygame.transform.flip(image, True, False), (width, 0))
+    surface = _converted(surface)
+    # Mirror a baked level of the image when it's wanted at another size
+    make = recipe(image)
+    if make:
+        derived(surface, lambda size: mirrored_layer(make((size[0] // 2, size[1]))))
+    return surface
+
+
+def hills_background(view_size):
+    """Sky with three ranges of hills, nearer ones scrolling faster."""
+    width, height = view_size
+    return ParallaxBackground(
+        view_size,
+        [
+            (sky_layer(view_size), 0, 0),
+            (hills_layer(width, 260, (150, 185, 200), seed=1), 0.2, height - 320),
+            (hills_layer(width, 220, (95, 150, 100), seed=2), 0.5, height - 220),
+            (hills_layer(width, 160, (55, 115, 60), seed=3), 0.8, height - 160),
+        ],
+    )
+
+
+class ParallaxBackground:
+    def __init__(self, view_size, layers):
+        """``layers`` is a back-to-front list of (surface, speed, y).
+
+        A speed of 1 moves with the camera, 0 stays put.
+        """
+        self.view_size = view_size
+        static = [layer for layer in layers if layer[1] == 0]
+        self.layers = [layer for layer in layers if layer[1] != 0]
+        for surface, _, _ in self.layers:
+            if surface.get_width() < view_size[0]:
+                raise ValueError("a scrolling layer must be at least the view's width")
+
+        self.static = None
+        if static:
+            self.static = pygame.Surface(view_size)
+            for surface, _, y in static:
+                self.static.blit(surface, (0, y))
+            self.static = _converted(self.static)
+
+        self.camera = None
+        self.flat = None
+        self.flat_camera = None
+        # Blits submitted this frame, and flattened surfaces built so far
+        self.blits = 0
+        self.flattened = 0
+
+    def _offset(self, surface, speed, camera_x):
+        return int(camera_x * speed) % surface.get_width()
+
+    def draw(self, queue, camera_x, layer, key=1):
+        still = camera_x == self.camera
+        self.camera = camera_x
+        if still and self.layers:
+            if self.flat_camera != camera_x:
+                self._flatten(camera_x)
+            queue.blit(self.flat, (0, 0), layer=layer, key=key)
+            self.blits = 1
+            return
+
+        self.blits = 0
+        if self.static is not None:
+            queue.blit(self.static, (0, 0), layer=layer, key=key)
+            self.blits += 1
+        view_width = self.view_size[0]
+        for i, (surface, speed, y) in enumerate(self.layers, key + 1):
+            offset = self._offset(surface, speed, camera_x)
+            queue.blit(surface, (-offset, y), layer=layer, key=i)
+            self.blits += 1
+            if surface.get_width() - offset < view_width:
+                queue.blit(
+                    surface, (surface.get_width() - offset, y), layer=layer, key=i
+                )
+                self.blits += 1
+
+    def _flatten(self, camera_x):
+        # A new Surface each time: canvases cache drawn images by identity
+        flat = pygame.Surface(self.view_size)
+        if self.static is not None:
+            flat.blit(self.static, (0, 0))
+        for surface, speed, y in self.layers:
+            offset = self._offset(surface, speed, camera_x)
+            flat.blit(surface, (-offset, y))
+            flat.blit(surface, (surface.get_width() - offset, y))
+        self.flat = _converted(flat)
+        self.flat_camera = camera_x
+        self.flattened += 1
+
+
+def benchmark(frames=600):
+    """Per-frame cost of a scrolling and a still parallax background."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from canvas import SurfaceCanvas
+    from render_queue import BACKGROUND, RenderQueue
+
+    size = (800, 600)
+    canvas = SurfaceCanvas(pygame.display.set_mode(size), size)
+    queue = RenderQueue()
+    background = hills_background(size)
+
+    for name, speed in [("scrolling", 3), ("still", 0)]:
+        blits = 0
+        start = time.perf_counter()
+        for frame in range(frames):
+            queue.begin()
+            background.draw(queue, frame * speed, BACKGROUND)
+            queue.flush(canvas)
+            blits += background.blits
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name}: {elapsed / frames * 1000:.3f} ms per frame, "
+            f"{blits / frames:.1f} blits per frame"
+        )
+    print(f"flattened {background.flattened} times")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,184 @@
+"""Array-backed particle effects: wood chips, feathers and pollen.
+
+Particles live in structure-of-arrays NumPy storage with a fixed capacity.
+Integration and culling are a handful of vectorized operations over the
+live prefix of the arrays, and drawing writes every particle straight into
+the target Surface's pixels in one batched assignment per particle kind.
+Run this file directly to benchmark particles per millisecond.
+"""
+
+import time
+
+import numpy as np
+import pygame
+
+MAX_PARTICLES = 65536
+
+# Particle kinds
+WOOD_CHIP = 0
+FEATHER = 1
+POLLEN = 2
+
+# Per-kind behaviour, indexed by kind
+COLORS = [(120, 72, 30), (250, 250, 245), (255, 220, 60)]
+GRAVITY = np.array([900.0, 60.0, -20.0], np.float32)  # px/s^2
+DRAG = np.array([0.2, 2.5, 1.5], np.float32)  # fraction of velocity lost per second
+SPEED = [(120.0, 260.0), (20.0, 80.0), (10.0, 40.0)]  # px/s
+LIFETIME = [(0.4, 0.9), (1.0, 2.0), (1.5, 3.0)]  # seconds
+SIZE = [2, 2, 1]  # px
+
+
+class ParticleSystem:
+    def __init__(self, capacity=MAX_PARTICLES, bounds=None, seed=None):
+        self.capacity = capacity
+        self.count = 0
+        # Culling rectangle; particles leaving it are removed
+        self.bounds = bounds
+
+        self.x = np.zeros(capacity, np.float32)
+        self.y = np.zeros(capacity, np.float32)
+        self.vx = np.zeros(capacity, np.float32)
+        self.vy = np.zeros(capacity, np.float32)
+        self.life = np.zeros(capacity, np.float32)
+        self.kind = np.zeros(capacity, np.uint8)
+
+        # Separate from the game's random module so effects never change
+        # gameplay (or rollback snapshots)
+        self.rng = np.random.default_rng(seed)
+
+        # Mapped pixel colors, cached per surface format
+        self._mapped = {}
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def emit(self, kind, x, y, count, direction=0.0, spread=np.pi):
+        """Spawn ``count`` particles at (x, y) heading around ``direction``."""
+        count = min(count, self.capacity - self.count)
+        if count <= 0:
+            return
+        start, end = self.count, self.count + count
+
+        angle = direction + self.rng.uniform(-spread, spread, count)
+        speed = self.rng.uniform(*SPEED[kind], count)
+        self.x[start:end] = x
+        self.y[start:end] = y
+        self.vx[start:end] = np.cos(angle) * speed
+        self.vy[start:end] = np.sin(angle) * speed
+        self.life[start:end] = self.rng.uniform(*LIFETIME[kind], count)
+        self.kind[start:end] = kind
+        self.count = end
+
+    def update(self, dt):
+        n = self.count
+        if not n:
+            return
+        x, y = self.x[:n], self.y[:n]
+        vx, vy = self.vx[:n], self.vy[:n]
+        life = self.life[:n]
+        kind = self.kind[:n]
+
+        # Semi-implicit Euler with per-kind gravity and drag
+        damping = 1.0 - DRAG[kind] * dt
+        vx *= damping
+        vy *= damping
+        vy += GRAVITY[kind] * dt
+        x += vx * dt
+        y += vy * dt
+        life -= dt
+
+        alive = life > 0
+        if self.bounds:
+            left, top, width, height = self.bounds
+            alive &= (x >= left) & (x < left + width)
+            alive &= (y >= top) & (y < top + height)
+
+        # Compact survivors to the front of the arrays
+        survivors = int(np.count_nonzero(alive))
+        if survivors != n:
+            for array in (self.x, self.y, self.vx, self.vy, self.life, self.kind):
+                array[:survivors] = array[:n][alive]
+            self.count = survivors
+
+    def _colors(self, surface):
+        key = (surface.get_bitsize(), surface.get_masks())
+        if key not in self._mapped:
+            # map_rgb is signed when alpha is set; pixels2d is unsigned
+            self._mapped[key] = [
+                surface.map_rgb(color) & 0xFFFFFFFF for color in COLORS
+            ]
+        return self._mapped[key]
+
+    def draw(self, surface, scale=1.0):
+        # ``scale`` maps particle positions onto a smaller render target
+        n = self.count
+        if not n:
+            return
+        width, height = surface.get_size()
+        if scale == 1.0:
+            xi = self.x[:n].astype(np.intp)
+            yi = self.y[:n].astype(np.intp)
+        else:
+            xi = (self.x[:n] * scale).astype(np.intp)
+            yi = (self.y[:n] * scale).astype(np.intp)
+        kind = self.kind[:n]
+
+        # 32-bit surfaces take mapped ints; anything else goes through RGB
+        if surface.get_bytesize() == 4:
+            pixels = pygame.surfarray.pixels2d(surface)
+            colors = self._colors(surface)
+        else:
+            pixels = pygame.surfarray.pixels3d(surface)
+            colors = COLORS
+
+        for k, color in enumerate(colors):
+            mask = kind == k
+            px, py = xi[mask], yi[mask]
+            size = max(1, round(SIZE[k] * scale))
+            for dx in range(size):
+                for dy in range(size):
+                    qx, qy = px + dx, py + dy
+                    visible = (qx >= 0) & (qx < width) & (qy >= 0) & (qy < height)
+                    pixels[qx[visible], qy[visible]] = color
+
+        # Unlock the surface
+        del pixels
+
+
+def benchmark(particles=50000, frames=200):
+    import os
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    screen = pygame.display.set_mode((800, 600))
+
+    system = ParticleSystem(bounds=(0, 0, 800, 600), seed=0)
+    dt = 1 / 60
+    update_time = draw_time = 0.0
+    processed = 0
+    for _ in range(frames):
+        # Keep the population topped up
+        missing = particles - system.count
+        for kind in (WOOD_CHIP, FEATHER, POLLEN):
+            system.emit(kind, 400, 300, missing // 3)
+        processed += system.count
+
+        start = time.perf_counter()
+        system.update(dt)
+        update_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        system.draw(screen)
+        draw_time += time.perf_counter() - start
+
+    print(f"{processed / frames:.0f} particles per frame")
+    print(f"update: {processed / (update_time * 1000):.0f} particles/ms")
+    print(f"draw: {processed / (draw_time * 1000):.0f} particles/ms")
+    print(f"frame: {(update_time + draw_time) / frames * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    benchmark()
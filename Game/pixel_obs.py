@@ -0,0 +1,98 @@
+"""Small pixel observations of a Game for vision-based agents.
+
+Instead of copying the 800x600 ``Game.screen``, the scene is redrawn with
+plain rect fills straight into a tiny offscreen Surface (84x84 by default).
+The Surface's pixels are exposed through a persistent
+``pygame.surfarray.pixels3d`` view, so reading a frame copies nothing.
+Fills and ``pygame.draw`` work on the locked Surface; only blits would not,
+and the renderer doesn't blit.
+
+Grayscale conversion and frame stacking write into a preallocated ring
+that holds every frame twice, so the last ``stack`` frames are always one
+contiguous, chronologically ordered view.
+"""
+
+import numpy as np
+import pygame
+
+from claude_game_DS import GREEN, RED, SCREEN_HEIGHT, SCREEN_WIDTH, SKY_BLUE
+
+SNAKE_COLOR = (0, 100, 0)
+GRAY_WEIGHTS = np.array([0.299, 0.587, 0.114], np.float32)
+
+
+class PixelObservation:
+    def __init__(self, size=(84, 84), grayscale=False, stack=1):
+        self.width, self.height = size
+        self.grayscale = grayscale
+        self.stack = stack
+        self.sx = self.width / SCREEN_WIDTH
+        self.sy = self.height / SCREEN_HEIGHT
+
+        self.surface = pygame.Surface(size)
+        # (height, width, 3) view of the Surface's own memory
+        self.pixels = pygame.surfarray.pixels3d(self.surface).transpose(1, 0, 2)
+
+        # Frames are written at i and i + stack
+        shape = (2 * stack, self.height, self.width)
+        if not grayscale:
+            shape += (3,)
+        self.ring = np.zeros(shape, np.uint8)
+        self.index = 0
+        self._gray = np.zeros((self.height, self.width), np.float32)
+
+    def _rect(self, rect):
+        return (
+            int(rect.x * self.sx),
+            int(rect.y * self.sy),
+            max(1, int(rect.width * self.sx)),
+            max(1, int(rect.height * self.sy)),
+        )
+
+    def draw(self, game):
+        surface = self.surface
+        surface.fill(SKY_BLUE)
+        for obstacle in game.obstacles:
+            surface.fill(GREEN, self._rect(obstacle))
+        for obj in game.peckable_objects:
+            surface.fill(obj.color, self._rect(obj.rect))
+        for enemy in game.enemies:
+            if enemy.active:
+                surface.fill(SNAKE_COLOR, self._rect(enemy.rect))
+        for piece in game.nest_pieces:
+            surface.fill(piece.color, self._rect(piece.rect))
+        surface.fill(RED, self._rect(game.player.rect))
+
+    def observe(self, game):
+        """Draw ``game`` and return the current observation.
+
+        Without grayscale or stacking this is the zero-copy pixel view, which
+        the next call overwrites.
+        """
+        self.draw(game)
+        if not self.grayscale and self.stack == 1:
+            return self.pixels
+        self._push()
+        return self.frames()
+
+    def _push(self):
+        if self.grayscale:
+            np.dot(self.pixels, GRAY_WEIGHTS, out=self._gray)
+            frame = self._gray
+        else:
+            frame = self.pixels
+        self.index = (self.index + 1) % self.stack
+        self.ring[self.index] = frame
+        self.ring[self.index + self.stack] = frame
+
+    def frames(self):
+        # Oldest to newest, without copying
+        start = self.index + 1
+        return self.ring[start : start + self.stack]
+
+    def reset(self, game):
+        # Fill the whole stack with the first frame of an episode
+        self.draw(game)
+        for _ in range(self.stack):
+            self._push()
+        return self.frames() if self.stack > 1 or self.grayscale else self.pixels
@@ -0,0 +1,201 @@
+"""Object pools and per-frame allocation instrumentation.
+
+Pooled objects are handed back on level reset instead of being dropped, so
+re-entering a level (or spawning short-lived effects) reuses them rather
+than feeding the garbage collector.  ``AllocationTracker`` reports how much
+each frame allocates using ``tracemalloc`` plus GC pause times, since GC
+pauses show up as hitches.
+
+Run this file directly for a headless allocation report over every level.
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+import pygame
+
+
+class Pool:
+    """Free list for one kind of object.
+
+    ``acquire(*args)`` builds ``factory(*args)`` when the pool is empty and
+    otherwise calls ``reset(obj, *args)`` on a recycled object; ``reset``
+    defaults to the object's own ``reset`` method.
+    """
+
+    def __init__(self, factory, reset=None):
+        self.factory = factory
+        self.reset = reset
+        self.free = []
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, *args):
+        if self.free:
+            obj = self.free.pop()
+            if self.reset:
+                self.reset(obj, *args)
+            else:
+                obj.reset(*args)
+            self.reused += 1
+            return obj
+        self.created += 1
+        return self.factory(*args)
+
+    def release(self, obj):
+        self.free.append(obj)
+
+    def release_all(self, objects):
+        # Hand back every object in a list and empty it
+        self.free.extend(objects)
+        objects.clear()
+
+
+def rect_pool():
+    return Pool(pygame.Rect, pygame.Rect.update)
+
+
+class AllocationTracker:
+    """Per-frame allocation and GC statistics.
+
+    ``transient`` is the tracemalloc peak above the frame's starting point,
+    which counts short-lived objects that a before/after diff would miss;
+    ``blocks`` is the net change in allocated memory blocks.
+    """
+
+    def __init__(self, history=600, top_every=0):
+        # Every ``top_every`` frames, snapshot the biggest allocation sites
+        self.top_every = top_every
+        self.frames = deque(maxlen=history)
+        self.top_sites = []
+        self.gc_pauses = deque(maxlen=history)
+        self._gc_start = 0.0
+        self._frame_gc = 0
+        self._frame_gc_time = 0.0
+        self._snapshot = None
+        self._start_bytes = 0
+        self._start_blocks = 0
+        self.frame_count = 0
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        gc.callbacks.append(self._on_gc)
+
+    def stop(self):
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        tracemalloc.stop()
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._gc_start = time.perf_counter()
+        else:
+            pause = time.perf_counter() - self._gc_start
+            self._frame_gc += 1
+            self._frame_gc_time += pause
+            self.gc_pauses.append((info["generation"], pause))
+
+    def _take_snapshot(self):
+        # Leave out the instrumentation's own allocations
+        return tracemalloc.take_snapshot().filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ]
+        )
+
+    def begin_frame(self):
+        self._frame_gc = 0
+        self._frame_gc_time = 0.0
+        if self.top_every and self.frame_count % self.top_every == 0:
+            self._snapshot = self._take_snapshot()
+        tracemalloc.reset_peak()
+        self._start_bytes = tracemalloc.get_traced_memory()[0]
+        self._start_blocks = sys.getallocatedblocks()
+
+    def end_frame(self):
+        current, peak = tracemalloc.get_traced_memory()
+        self.frames.append(
+            (
+                peak - self._start_bytes,
+                current - self._start_bytes,
+                sys.getallocatedblocks() - self._start_blocks,
+                self._frame_gc,
+                self._frame_gc_time,
+            )
+        )
+
+        if self._snapshot is not None:
+            diff = self._take_snapshot().compare_to(self._snapshot, "lineno")
+            self.top_sites = [stat for stat in diff if stat.count_diff > 0][:10]
+            self._snapshot = None
+        self.frame_count += 1
+
+    def summary(self):
+        if not self.frames:
+            return "allocations: no frames recorded"
+        n = len(self.frames)
+        transient = sum(f[0] for f in self.frames) / n
+        net = sum(f[1] for f in self.frames) / n
+        blocks = sum(f[2] for f in self.frames) / n
+        collections = sum(f[3] for f in self.frames)
+        gc_time = sum(f[4] for f in self.frames)
+        worst = max(self.frames, key=lambda f: f[0])
+        lines = [
+            f"allocations over {n} frames: "
+            f"{transient:.0f} B transient, {net:+.0f} B net, "
+            f"{blocks:+.1f} blocks per frame",
+            f"worst frame: {worst[0]} B transient",
+            f"gc: {collections} collections, {gc_time * 1000:.2f} ms total",
+        ]
+        for stat in self.top_sites:
+            lines.append(f"  {stat}")
+        return "\n".join(lines)
+
+
+def benchmark(frames_per_level=300):
+    import os
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from claude_game_DS import Game, GameState
+
+    game = Game()
+    tracker = AllocationTracker(history=frames_per_level, top_every=100)
+    tracker.start()
+    for state in (
+        GameState.FLYING_TUTORIAL,
+        GameState.PECKING_GAME,
+        GameState.FLOWER_CHALLENGE,
+        GameState.SNAKE_ENCOUNTER,
+    ):
+        for _ in range(3):
+            game.state = state
+            game.init_level()
+        for frame in range(frames_per_level):
+            tracker.begin_frame()
+            if frame % 20 == 0:
+                game.player_peck(game.player)
+            game.update()
+            game.render()
+            tracker.end_frame()
+        print(f"{state.name}:")
+        print("  " + tracker.summary().replace("\n", "\n  "))
+        tracker.frames.clear()
+    tracker.stop()
+
+    pools = {
+        "peckables": game.peckable_pool,
+        "snakes": game.snake_pool,
+        "nest pieces": game.nest_piece_pool,
+        "rects": game.rect_pool,
+    }
+    for name, pool in pools.items():
+        print(f"{name}: {pool.created} created, {pool.reused} reused")
+
+
+if __name__ == "__main__":
+    benchmark()
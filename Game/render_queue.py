@@ -0,0 +1,176 @@
+"""Z-ordered render queue with state-sorted batching.
+
+Instead of drawing straight onto the canvas, scenes submit draw commands
+with a layer and a sort key.  ``flush`` then:
+
+- sorts by (layer, key), keeping submission order within a layer and key
+  so overlapping commands stack the way they were submitted,
+- drops exact duplicates (the same command submitted twice in a frame),
+- skips everything underneath the last full-screen fill,
+- hands each run of adjacent same-kind, same-state commands to the canvas
+  as one batch (``rects``, ``blits``).  A blit's state is the Surface its
+  image is cut from, so glyphs and frames from one sheet batch together.
+
+Things that must stack, like a button's fill, border and label, use
+increasing keys within their layer.  Commands store copies of rects, so
+callers can keep reusing scratch rects while the frame is queued.
+"""
+
+# Layers, back to front
+BACKGROUND = 0
+TERRAIN = 1
+OBJECTS = 2
+ENEMIES = 3
+PIECES = 4
+EFFECTS = 5
+PLAYERS = 6
+HUD = 7
+UI = 8
+
+# Command kinds
+CLEAR = 0
+FILL = 1
+RECT = 2
+LINE = 3
+CIRCLE = 4
+BLIT = 5
+TEXT = 6
+PARTICLES = 7
+
+
+class RenderQueue:
+    def __init__(self):
+        # (layer, key, sequence, kind, state, args)
+        self.commands = []
+        self.seen = set()
+        self.frames = 0
+        # This frame's counts
+        self.submitted = 0
+        self.duplicates = 0
+        self.occluded = 0
+        self.drawn = 0
+        self.batches = 0
+        self.totals = [0, 0, 0, 0, 0]
+
+    def begin(self):
+        if self.frames:
+            counts = (
+                self.submitted,
+                self.duplicates,
+                self.occluded,
+                self.drawn,
+                self.batches,
+            )
+            self.totals = [t + c for t, c in zip(self.totals, counts)]
+        self.frames += 1
+        self.commands.clear()
+        self.seen.clear()
+        self.submitted = self.duplicates = self.occluded = 0
+        self.drawn = self.batches = 0
+
+    def _submit(self, layer, key, kind, state, args):
+        self.submitted += 1
+        identity = (layer, key, kind, state, args)
+        if identity in self.seen:
+            self.duplicates += 1
+            return
+        self.seen.add(identity)
+        self.commands.append((layer, key, len(self.commands), kind, state, args))
+
+    def fill(self, color, rect=None, layer=BACKGROUND, key=0):
+        if rect is None:
+            # Clears keep their submission order; the last one wins
+            self._submit(layer, key, CLEAR, 0, (color,))
+        else:
+            self._submit(layer, key, FILL, color, tuple(rect))
+
+    def rect(self, color, rect, width=0, layer=OBJECTS, key=0):
+        if width:
+            self._submit(layer, key, RECT, color, (tuple(rect), width))
+        else:
+            self._submit(layer, key, FILL, color, tuple(rect))
+
+    def line(self, color, start, end, width=1, layer=OBJECTS, key=0):
+        self._submit(layer, key, LINE, color, (tuple(start), tuple(end), width))
+
+    def circle(self, color, center, radius, width=0, layer=OBJECTS, key=0):
+        self._submit(layer, key, CIRCLE, color, (tuple(center), radius, width))
+
+    def blit(self, image, pos, layer=OBJECTS, key=0):
+        sheet = image.get_parent() or image
+        self._submit(layer, key, BLIT, id(sheet), (image, tuple(pos)))
+
+    def text(self, font, string, color, pos, anchor="topleft", layer=UI, key=0):
+        self._submit(
+            layer, key, TEXT, id(font), (font, string, color, tuple(pos), anchor)
+        )
+
+    def particles(self, system, layer=EFFECTS, key=0):
+        self._submit(layer, key, PARTICLES, 0, (system,))
+
+    def flush(self, canvas):
+        # Sequence numbers are unique, so the sort never compares further
+        commands = sorted(self.commands)
+        count = len(commands)
+
+        # Nothing under the last full-screen fill can show
+        start = 0
+        for i in range(count - 1, -1, -1):
+            if commands[i][3] == CLEAR:
+                start = i
+                break
+        self.occluded = start
+        self.drawn = count - start
+
+        i = start
+        while i < count:
+            layer, key, _, kind, state, args = commands[i]
+            j = i + 1
+            while j < count:
+                other = commands[j]
+                if (
+                    other[3] != kind
+                    or other[4] != state
+                    or other[0] != layer
+                    or other[1] != key
+                ):
+                    break
+                j += 1
+            self._draw_batch(canvas, kind, state, commands[i:j])
+            self.batches += 1
+            i = j
+
+    def _draw_batch(self, canvas, kind, state, batch):
+        if kind == CLEAR:
+            # Only the last clear of a run shows
+            canvas.fill(*batch[-1][5])
+        elif kind == FILL:
+            canvas.rects(state, [command[5] for command in batch])
+        elif kind == BLIT:
+            canvas.blits([command[5] for command in batch])
+        elif kind == RECT:
+            for command in batch:
+                canvas.rect(state, *command[5])
+        elif kind == LINE:
+            for command in batch:
+                canvas.line(state, *command[5])
+        elif kind == CIRCLE:
+            for command in batch:
+                canvas.circle(state, *command[5])
+        elif kind == TEXT:
+            for command in batch:
+                canvas.text(*command[5])
+        elif kind == PARTICLES:
+            for command in batch:
+                canvas.particles(*command[5])
+
+    def summary(self):
+        frames = max(self.frames - 1, 1)
+        submitted, duplicates, occluded, drawn, batches = (
+            t / frames for t in self.totals
+        )
+        return (
+            f"render queue per frame: {submitted:.1f} commands submitted, "
+            f"{duplicates:.1f} duplicates dropped, {occluded:.1f} hidden by a "
+            f"full-screen fill, {drawn:.1f} drawn in {batches:.1f} batches"
+        )
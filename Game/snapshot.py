@@ -0,0 +1,385 @@
+"""Rollback snapshots of the Game simulation.
+
+Each tick the simulation state is packed into preallocated NumPy rows of a
+ring buffer, and restoring is a handful of array reads written back into
+the existing objects.  Capturing allocates only a short-lived list per
+entity kind for its one slice assignment, which is faster than writing the
+rows one at a time.  The RNG only moves when a level is built, so its 625
+words are read (``random.getstate``) only when ``game.levels_built`` has
+changed and are otherwise copied from the previous slot.
+
+Endless flight and co-op keep state the snapshots don't hold (the flight's
+branches, the partner woodpecker), so they can't be rolled back:
+``restore`` refuses while either is in play or the snapshot is from one.  The per-entity arrays
+start with room for ``MAX_ENTITIES`` of each kind and double whenever a
+level holds more, keeping the snapshots already taken.  Run this file directly
+to benchmark capture / restore cost per tick.
+"""
+
+import random
+import time
+
+import numpy as np
+
+# Two seconds of history at 60 FPS
+RING_SIZE = 120
+# Entities of each kind there is room for at first; grown as needed
+MAX_ENTITIES = 64
+
+# Names stored as bit masks / indices instead of strings
+LEVEL_NAMES = (
+    "Flying Tutorial",
+    "Pecking Game",
+    "Flower Challenge",
+    "Snake Encounter",
+    "Nest Building",
+)
+ZONE_NAMES = ("Tree Tops", "Home Forest", "Flower Meadow", "Lake")
+# The game state that can't be rolled back
+ENDLESS = "ENDLESS_FLIGHT"
+
+# Layout of the scalar row
+(
+    S_STATE,
+    S_LEVEL_TIMER,
+    S_STORY_PHASE,
+    S_SCORE,
+    S_COMPLETED,
+    S_ZONE,
+    S_X,
+    S_Y,
+    S_VEL_X,
+    S_VEL_Y,
+    S_JUMPING,
+    S_FLYING,
+    S_FACING_RIGHT,
+    S_ANIM_TIME,
+    S_HEALTH,
+    S_FEATHERS,
+    S_UNLOCKED,
+    S_N_OBSTACLES,
+    S_N_PECKABLES,
+    S_N_ENEMIES,
+    S_N_NEST_PIECES,
+    S_N_NEST_SLOTS,
+    S_GAUSS_NEXT,
+) = range(23)
+SCALAR_FIELDS = 23
+
+# Per-entity columns
+PECKABLE_FIELDS = 7  # x, y, w, h, health, has_larva, pecked
+ENEMY_FIELDS = 3  # x, y, active
+NEST_PIECE_FIELDS = 3  # x, y, placed
+
+# Mersenne Twister state: 624 words plus the position index
+RNG_WORDS = 625
+
+
+def _mask(names, table):
+    bits = 0
+    for i, name in enumerate(table):
+        if name in names:
+            bits |= 1 << i
+    return bits
+
+
+def _unmask(bits, table):
+    return [name for i, name in enumerate(table) if bits & (1 << i)]
+
+
+class SnapshotRing:
+    def __init__(self, capacity=RING_SIZE, max_entities=MAX_ENTITIES):
+        self.capacity = capacity
+        self.max_entities = max_entities
+
+        # Tick stored in each slot, -1 when empty
+        self.ticks = np.full(capacity, -1, dtype=np.int64)
+
+        self.scalars = np.zeros((capacity, SCALAR_FIELDS), dtype=np.float64)
+        self.obstacles = np.zeros((capacity, max_entities, 4), dtype=np.int32)
+        self.nest_slots = np.zeros((capacity, max_entities, 4), dtype=np.int32)
+        self.peckables = np.zeros(
+            (capacity, max_entities, PECKABLE_FIELDS), dtype=np.float64
+        )
+        self.enemies = np.zeros(
+            (capacity, max_entities, ENEMY_FIELDS), dtype=np.float64
+        )
+        self.nest_pieces = np.zeros(
+            (capacity, max_entities, NEST_PIECE_FIELDS), dtype=np.float64
+        )
+        self.rng = np.zeros((capacity, RNG_WORDS), dtype=np.uint32)
+
+        self.latest_tick = -1
+        self._last_slot = 0
+        # game.levels_built when the RNG was last read
+        self._rng_levels = None
+
+    def __len__(self):
+        return int(np.count_nonzero(self.ticks >= 0))
+
+    def __contains__(self, tick):
+        return tick >= 0 and self.ticks[tick % self.capacity] == tick
+
+    @property
+    def oldest_tick(self):
+        held = self.ticks[self.ticks >= 0]
+        return int(held.min()) if held.size else -1
+
+    @property
+    def nbytes(self):
+        return sum(
+            array.nbytes
+            for array in (
+                self.ticks,
+                self.scalars,
+                self.obstacles,
+                self.nest_slots,
+                self.peckables,
+                self.enemies,
+                self.nest_pieces,
+                self.rng,
+            )
+        )
+
+    def reserve(self, count):
+        """Make room for ``count`` entities of each kind."""
+        if count <= self.max_entities:
+            return
+        size = self.max_entities
+        while size < count:
+            size *= 2
+        for name in ("obstacles", "nest_slots", "peckables", "enemies", "nest_pieces"):
+            old = getattr(self, name)
+            new = np.zeros((self.capacity, size, old.shape[2]), dtype=old.dtype)
+            new[:, : self.max_entities] = old
+            setattr(self, name, new)
+        self.max_entities = size
+
+    def clear(self):
+        self.ticks.fill(-1)
+        self.latest_tick = -1
+        self._rng_levels = None
+
+    def capture(self, game, tick):
+        slot = tick % self.capacity
+        player = game.player
+
+        # RNG state is (version, 625 ints, gauss_next); it only moves when a
+        # level is built, so otherwise it is copied from the last slot
+        levels = getattr(game, "levels_built", None)
+        if levels is not None and levels == self._rng_levels:
+            self.rng[slot] = self.rng[self._last_slot]
+            gauss_next = self.scalars[self._last_slot, S_GAUSS_NEXT]
+        else:
+            _, words, gauss_next = random.getstate()
+            self.rng[slot] = words
+            self._rng_levels = levels
+            if gauss_next is None:
+                gauss_next = np.nan
+
+        self.scalars[slot] = (
+            game.state.value,
+            game.level_timer,
+            game.story_phase,
+            game.score,
+            _mask(game.completed_levels, LEVEL_NAMES),
+            ZONE_NAMES.index(game.current_zone),
+            player.x,
+            player.y,
+            player.velocity_x,
+            player.velocity_y,
+            player.jumping,
+            player.flying,
+            player.facing_right,
+            player.animator.time,
+            player.health,
+            player.feathers,
+            _mask(player.unlocked_zones, ZONE_NAMES),
+            len(game.obstacles),
+            len(game.peckable_objects),
+            len(game.enemies),
+            len(game.nest_pieces),
+            len(game.nest_slots),
+            gauss_next,
+        )
+
+        self.reserve(
+            max(
+                len(game.obstacles),
+                len(game.nest_slots),
+                len(game.peckable_objects),
+                len(game.enemies),
+                len(game.nest_pieces),
+            )
+        )
+        # One slice assignment per entity list
+        if game.obstacles:
+            self.obstacles[slot, : len(game.obstacles)] = [
+                (rect.x, rect.y, rect.width, rect.height) for rect in game.obstacles
+            ]
+        if game.nest_slots:
+            self.nest_slots[slot, : len(game.nest_slots)] = [
+                (rect.x, rect.y, rect.width, rect.height) for rect in game.nest_slots
+            ]
+        if game.peckable_objects:
+            self.peckables[slot, : len(game.peckable_objects)] = [
+                (*obj.rect, obj.health, obj.has_larva, obj.pecked)
+                for obj in game.peckable_objects
+            ]
+        if game.enemies:
+            self.enemies[slot, : len(game.enemies)] = [
+                (enemy.x, enemy.y, enemy.active) for enemy in game.enemies
+            ]
+        if game.nest_pieces:
+            self.nest_pieces[slot, : len(game.nest_pieces)] = [
+                (piece.rect.x, piece.rect.y, piece.placed) for piece in game.nest_pieces
+            ]
+
+        self.ticks[slot] = tick
+        self._last_slot = slot
+        self.latest_tick = tick
+        return slot
+
+    def restore(self, game, tick):
+        """Write the snapshot taken at ``tick`` back into ``game``.
+
+        Returns False when that tick has already been overwritten.
+        """
+        slot = tick % self.capacity
+        if self.ticks[slot] != tick:
+            return False
+
+        row = self.scalars[slot].tolist()
+        # Endless flight and the co-op partner aren't captured
+        state = type(game.state)(int(row[S_STATE]))
+        if ENDLESS in (state.name, game.state.name) or game.partner is not None:
+            return False
+        n_obstacles = int(row[S_N_OBSTACLES])
+        n_peckables = int(row[S_N_PECKABLES])
+        n_enemies = int(row[S_N_ENEMIES])
+        n_nest_pieces = int(row[S_N_NEST_PIECES])
+        n_nest_slots = int(row[S_N_NEST_SLOTS])
+
+        # Rebuild the level's objects when the snapshot belongs to another state
+        if state != game.state or (
+            len(game.obstacles) != n_obstacles
+            or len(game.peckable_objects) != n_peckables
+            or len(game.enemies) != n_enemies
+            or len(game.nest_pieces) != n_nest_pieces
+        ):
+            game.state = state
+            if state == type(state).MENU:
+                game.init_menu()
+            else:
+                game.init_level()
+            if hasattr(game, "dragging_piece"):
+                delattr(game, "dragging_piece")
+
+        game.level_timer = float(row[S_LEVEL_TIMER])
+        game.story_phase = int(row[S_STORY_PHASE])
+        game.score = int(row[S_SCORE])
+        game.completed_levels = set(_unmask(int(row[S_COMPLETED]), LEVEL_NAMES))
+        game.current_zone = ZONE_NAMES[int(row[S_ZONE])]
+
+        player = game.player
+        player.x = int(row[S_X])
+        player.y = int(row[S_Y])
+        player.rect.x = player.x
+        player.rect.y = player.y
+        player.velocity_x = float(row[S_VEL_X])
+        player.velocity_y = float(row[S_VEL_Y])
+        player.jumping = bool(row[S_JUMPING])
+        player.flying = bool(row[S_FLYING])
+        player.facing_right = bool(row[S_FACING_RIGHT])
+        player.animator.time = float(row[S_ANIM_TIME])
+        player.health = int(row[S_HEALTH])
+        player.feathers = int(row[S_FEATHERS])
+        player.unlocked_zones = _unmask(int(row[S_UNLOCKED]), ZONE_NAMES)
+        player.sync_sprite()
+
+        for rect, (x, y, w, h) in zip(
+            game.obstacles, self.obstacles[slot, :n_obstacles].tolist()
+        ):
+            rect.update(x, y, w, h)
+
+        if len(game.nest_slots) == n_nest_slots:
+            for rect, (x, y, w, h) in zip(
+                game.nest_slots, self.nest_slots[slot, :n_nest_slots].tolist()
+            ):
+                rect.update(x, y, w, h)
+
+        for obj, (x, y, w, h, health, has_larva, pecked) in zip(
+            game.peckable_objects, self.peckables[slot, :n_peckables].tolist()
+        ):
+            obj.rect.update(int(x), int(y), int(w), int(h))
+            obj.health = int(health)
+            obj.has_larva = bool(has_larva)
+            obj.pecked = bool(pecked)
+
+        for enemy, (x, y, active) in zip(
+            game.enemies, self.enemies[slot, :n_enemies].tolist()
+        ):
+            enemy.x = x
+            enemy.y = y
+            enemy.rect.x = x
+            enemy.rect.y = y
+            enemy.active = bool(active)
+
+        for piece, (x, y, placed) in zip(
+            game.nest_pieces, self.nest_pieces[slot, :n_nest_pieces].tolist()
+        ):
+            piece.x = piece.rect.x = int(x)
+            piece.y = piece.rect.y = int(y)
+            piece.placed = bool(placed)
+
+        # Objective counters follow from the restored objects
+        if hasattr(game, "sync_objectives"):
+            game.sync_objectives()
+        # Timed tasks follow the restored level clock
+        if hasattr(game, "sync_timeline"):
+            game.sync_timeline()
+
+        # Restore the RNG last so level rebuilding above doesn't consume it,
+        # and read it afresh on the next capture
+        self._rng_levels = None
+        gauss_next = float(row[S_GAUSS_NEXT])
+        random.setstate(
+            (
+                3,
+                tuple(self.rng[slot].tolist()),
+                None if gauss_next != gauss_next else gauss_next,
+            )
+        )
+        return True
+
+
+def benchmark(ticks=10000):
+    import os
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from claude_game_DS import Game, GameState
+
+    game = Game()
+    game.state = GameState.PECKING_GAME
+    game.init_level()
+    ring = SnapshotRing()
+
+    start = time.perf_counter()
+    for tick in range(ticks):
+        ring.capture(game, tick)
+    capture_us = (time.perf_counter() - start) / ticks * 1e6
+
+    # Restore only ticks still held by the ring
+    first = ticks - ring.capacity
+    start = time.perf_counter()
+    for i in range(ticks):
+        ring.restore(game, first + i % ring.capacity)
+    restore_us = (time.perf_counter() - start) / ticks * 1e6
+
+    print(f"capture: {capture_us:.1f} us/tick")
+    print(f"restore: {restore_us:.1f} us/tick")
+    print(f"ring: {ring.capacity} ticks, {ring.nbytes / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    benchmark()
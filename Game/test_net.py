@@ -0,0 +1,69 @@
+import numpy as np
+
+from net import (
+    INPUT_HEADER,
+    INPUT_JUMP,
+    INPUT_RIGHT,
+    MSG_INPUT,
+    NO_BASELINE,
+    CoopEndpoint,
+    delta_compress,
+    delta_decompress,
+    usable_baseline,
+)
+
+
+def test_delta_round_trip():
+    baseline = np.arange(24, dtype=np.float32)
+    state = baseline.copy()
+    state[5] = 99.5
+    payload = delta_compress(state, baseline)
+    np.testing.assert_array_equal(delta_decompress(payload, baseline), state)
+
+
+def test_enemy_count_change_sends_a_keyframe():
+    # Snake encounter (2 enemies) to nest building (no enemies)
+    baseline = np.arange(24, dtype=np.float32)
+    state = np.arange(18, dtype=np.float32) + 0.5
+    assert not usable_baseline(state, baseline)
+    payload = delta_compress(state, None)
+    np.testing.assert_array_equal(delta_decompress(payload, None), state)
+
+
+def test_mismatched_baseline_is_rejected():
+    baseline = np.arange(24, dtype=np.float32)
+    state = np.arange(18, dtype=np.float32)
+    payload = delta_compress(state, None)
+    # A stale header naming the old baseline must not raise
+    assert delta_decompress(payload, baseline) is None
+
+
+class _Partner:
+    def __init__(self):
+        self.moves = 0
+        self.jumps = 0
+
+    def move_right(self):
+        self.moves += 1
+
+    def jump(self):
+        self.jumps += 1
+
+
+class _Game:
+    def __init__(self):
+        self.partner = _Partner()
+
+
+def test_partner_keeps_moving_when_client_packets_drop():
+    host = CoopEndpoint(_Game(), True)
+    # One packet holding right, with a jump on its last tick, then nothing
+    bits = bytes([INPUT_RIGHT] * 3 + [INPUT_RIGHT | INPUT_JUMP])
+    header = INPUT_HEADER.pack(MSG_INPUT, 4, NO_BASELINE, 0.0, len(bits))
+    host.receive_input(header + bits)
+    for _ in range(20):
+        host.host_tick()
+    partner = host.game.partner
+    assert partner.moves == 20
+    # The jump isn't repeated while the packets are missing
+    assert partner.jumps == 1
@@ -0,0 +1,166 @@
+"""Coroutine tasks scheduled on simulation time.
+
+Cutscenes, delayed level transitions and timed spawns are written as
+generators that yield whatever they are waiting for:
+
+- a number of seconds to sleep (0 or None resumes them on the next tick),
+- a signal name (a string) to sleep until ``signal`` fires it.
+
+``Timeline`` keeps sleeping tasks in a heap ordered by wake time, so each
+``advance(dt)`` only pops and resumes the tasks that are due instead of
+every pending condition being polled every frame.  Tasks belong to a group
+(a level, a cutscene) and a whole group can be cancelled at once, e.g. when
+the level it was started for is left.
+"""
+
+import heapq
+import time
+
+
+class Task:
+    __slots__ = ("generator", "group", "done")
+
+    def __init__(self, generator, group):
+        self.generator = generator
+        self.group = group
+        self.done = False
+
+
+class Timeline:
+    def __init__(self):
+        self.now = 0.0
+        # (wake time, sequence, task); the sequence keeps ties in start order
+        self.queue = []
+        # signal -> [task]
+        self.waiting = {}
+        self.sequence = 0
+        self.running = None
+        self.ticks = 0
+        self.woken = 0
+
+    def start(self, generator, group=None):
+        """Run ``generator`` up to its first yield and schedule the rest."""
+        task = Task(generator, group)
+        self._resume(task)
+        return task
+
+    def signal(self, name):
+        tasks = self.waiting.pop(name, None)
+        if tasks:
+            for task in tasks:
+                if not task.done:
+                    self._resume(task)
+
+    def advance(self, dt):
+        self.now += dt
+        self.ticks += 1
+        queue = self.queue
+        while queue and queue[0][0] <= self.now:
+            task = heapq.heappop(queue)[2]
+            if not task.done:
+                self._resume(task)
+
+    def cancel(self, task):
+        if task.done:
+            return
+        task.done = True
+        # A task cancelling itself is closed once it yields
+        if task is not self.running:
+            task.generator.close()
+
+    def cancel_group(self, group):
+        for _, _, task in self.queue:
+            if task.group == group:
+                self.cancel(task)
+        for tasks in self.waiting.values():
+            for task in tasks:
+                if task.group == group:
+                    self.cancel(task)
+        # Drop the cancelled entries rather than let them wait out their sleep
+        self.queue = [entry for entry in self.queue if not entry[2].done]
+        heapq.heapify(self.queue)
+        for name, tasks in list(self.waiting.items()):
+            tasks = [task for task in tasks if not task.done]
+            if tasks:
+                self.waiting[name] = tasks
+            else:
+                del self.waiting[name]
+        if self.running is not None and self.running.group == group:
+            self.cancel(self.running)
+
+    def pending(self, group=None):
+        tasks = [entry[2] for entry in self.queue]
+        for waiting in self.waiting.values():
+            tasks.extend(waiting)
+        return sum(
+            1
+            for task in tasks
+            if not task.done and (group is None or task.group == group)
+        )
+
+    def _resume(self, task):
+        self.woken += 1
+        outer, self.running = self.running, task
+        try:
+            value = next(task.generator)
+        except StopIteration:
+            task.done = True
+            return
+        finally:
+            self.running = outer
+        if task.done:
+            # Cancelled while it ran
+            task.generator.close()
+        elif isinstance(value, str):
+            self.waiting.setdefault(value, []).append(task)
+        else:
+            entry = (self.now + (value or 0.0), self.sequence, task)
+            self.sequence += 1
+            heapq.heappush(self.queue, entry)
+
+    def summary(self):
+        ticks = max(self.ticks, 1)
+        return (
+            f"timeline: {self.woken / ticks:.3f} task wake-ups per tick, "
+            f"{self.pending()} tasks pending"
+        )
+
+
+def benchmark(tasks=1000, ticks=3600, dt=1 / 60):
+    """Compare polling every timed condition per tick with a task heap."""
+    delays = [(i % 600) / 10 + 1 for i in range(tasks)]
+
+    fired = 0
+    clock = 0.0
+    pending = list(delays)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        clock += dt
+        still = []
+        for delay in pending:
+            if clock > delay:
+                fired += 1
+            else:
+                still.append(delay)
+        pending = still
+    polled = time.perf_counter() - start
+
+    def wait(delay):
+        yield delay
+
+    timeline = Timeline()
+    for delay in delays:
+        timeline.start(wait(delay))
+    start = time.perf_counter()
+    for _ in range(ticks):
+        timeline.advance(dt)
+    scheduled = time.perf_counter() - start
+
+    print(f"{tasks} timers over {ticks} ticks ({fired} fired by polling)")
+    print(f"  polling every tick: {polled * 1000:.1f} ms")
+    print(f"  timeline heap:      {scheduled * 1000:.1f} ms")
+    print(f"  {timeline.summary()}")
+
+
+if __name__ == "__main__":
+    benchmark()